@@ -0,0 +1,113 @@
+"""
+Benchmarks inference backends ("torch" fp32, "int8" and "onnx") on CPU: throughput
+of paraphrasing, NER and zero-shot classification, peak RSS and agreement of outputs
+with fp32. Every backend runs in a fresh process so that peak RSS is not shared.
+
+Usage:
+    python src/ai/export_models.py
+    python benchmarks/bench_backends.py --backends torch int8 onnx
+"""
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import repackage
+from nltk import tokenize
+
+repackage.up()
+from src.ai import ai_writer
+from src.ai.ai_writer import AI_Writer
+from src.ai.paraphraser import paraphrase_sentences
+from src.utilities.utils import text_similarity
+
+DATA_PATH = Path(__file__).parent.joinpath("data", "articles.json")
+
+
+def run_backend(backend: str, batch_size: int) -> dict:
+    """Runs all models with a backend and returns outputs and timings."""
+    AI_Writer.set_inference_backend(backend)
+    # measure the models, not the inference cache
+    ai_writer.cache.enabled = False
+    with open(DATA_PATH, "r") as f:
+        articles = [article["article"] for article in json.load(f)]
+    sentences = [s for article in articles for s in tokenize.sent_tokenize(article)]
+    result = {"backend": backend}
+    start = time.perf_counter()
+    result["paraphrases"] = paraphrase_sentences(
+        sentences, batch_size=batch_size, profile="balanced"
+    )
+    result["sentences/s"] = len(sentences) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    result["entities"] = [
+        sorted({ne["word"] for ne in named_entities})
+        for named_entities in AI_Writer.get_named_entities_batch(articles, batch_size)
+    ]
+    result["ner articles/s"] = len(articles) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    result["topics"] = AI_Writer.classify_articles_to_topics(
+        articles, batch_size=batch_size
+    )
+    result["topic articles/s"] = len(articles) / (time.perf_counter() - start)
+    # ru_maxrss is in kilobytes on Linux
+    result["peak RSS MB"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    result["sentences"] = sentences
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--backends", nargs="+", default=["torch", "int8", "onnx"], help="torch first"
+    )
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(run_backend(args.worker, args.batch_size)))
+        return
+    results = []
+    for backend in args.backends:
+        output = subprocess.run(
+            [
+                sys.executable,
+                __file__,
+                "--worker",
+                backend,
+                "--batch-size",
+                str(args.batch_size),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        # the result is the last line, model loading may log before it
+        results.append(json.loads(output.strip().splitlines()[-1]))
+    reference = results[0]
+    columns = ["sentences/s", "ner articles/s", "topic articles/s", "peak RSS MB"]
+    print(f"{'backend':<8}" + "".join(f"{c:>18}" for c in columns) + f"{'agreement':>28}")
+    for result in results:
+        paraphrase_agreement = statistics.mean(
+            text_similarity(a, b)
+            for a, b in zip(result["paraphrases"], reference["paraphrases"])
+        )
+        entity_agreement = statistics.mean(
+            a == b for a, b in zip(result["entities"], reference["entities"])
+        )
+        topic_agreement = statistics.mean(
+            a == b for a, b in zip(result["topics"], reference["topics"])
+        )
+        print(
+            f"{result['backend']:<8}"
+            + "".join(f"{result[c]:>18.2f}" for c in columns)
+            + f"  text {paraphrase_agreement:.2f} ner {entity_agreement:.0%}"
+            + f" topic {topic_agreement:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+"""
+Benchmarks site-specific extractors against the newspaper parser on pages of the HTML
+archive: parse time per page of both, speed-up, share of pages missed by the
+extractor's selectors and agreement of extracted texts.
+
+Usage:
+    python benchmarks/bench_extractors.py --limit 200
+"""
+import argparse
+import time
+
+import repackage
+
+repackage.up()
+from src.parsers.extractors import extract_with_newspaper, get_extractor
+from src.parsers.html_archive import html_archive
+from src.utilities.utils import text_similarity
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="Number of pages")
+    args = parser.parse_args()
+    pages = []
+    for url in html_archive.urls():
+        if get_extractor(url) is None:
+            continue
+        page = html_archive.get(url)
+        # e.g. the page's blob was removed from the archive
+        if page is not None:
+            pages.append(page)
+        if args.limit is not None and len(pages) >= args.limit:
+            break
+    if not pages:
+        print("No archived pages with an extractor, run `run_daily` first")
+        return
+    extractor_time, newspaper_time, missed, similarities = 0.0, 0.0, 0, []
+    for page in pages:
+        start = time.perf_counter()
+        text = get_extractor(page.url)(page.html)
+        extractor_time += time.perf_counter() - start
+        start = time.perf_counter()
+        reference = extract_with_newspaper(page.url, page.html)
+        newspaper_time += time.perf_counter() - start
+        if text is None:
+            missed += 1
+        else:
+            similarities.append(text_similarity(text, reference))
+    print(f"pages:             {len(pages)}")
+    print(f"extractor ms/page: {extractor_time / len(pages) * 1000:.2f}")
+    print(f"newspaper ms/page: {newspaper_time / len(pages) * 1000:.2f}")
+    print(f"speed-up:          {newspaper_time / extractor_time:.1f}x")
+    print(f"missed:            {missed / len(pages):.1%}")
+    if similarities:
+        print(f"agreement:         {sum(similarities) / len(similarities):.3f}")
+        print(f"agreement < 0.9:   {sum(s < 0.9 for s in similarities)} pages")
+
+
+if __name__ == "__main__":
+    main()
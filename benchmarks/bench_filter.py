@@ -0,0 +1,105 @@
+"""
+Benchmarks the text filtering functions of the ingest pipeline (`filter_text`,
+`Filter.replace_unwanted_keywords` and `Filter.contains_video`) against their previous
+versions (`re.sub` per pattern, search-then-replace per keyword, video regex per call)
+on articles of the HTML archive, or on the stored sample if the archive is empty.
+
+Usage:
+    python benchmarks/bench_filter.py --limit 200 --repeat 20
+"""
+import argparse
+import json
+import re
+import time
+from pathlib import Path
+
+import repackage
+
+repackage.up()
+from src.ai.ai_writer import Filter
+from src.parsers.article_parser import filter_text
+from src.parsers.extractors import extract_text
+from src.parsers.html_archive import html_archive
+from src.utilities.text_filter import text_filter
+
+DATA_PATH = Path(__file__).parent.joinpath("data", "articles.json")
+
+
+def legacy_filter_text(text: str) -> str:
+    """Previous `filter_text`."""
+    for pattern in text_filter.removals:
+        text = re.sub(pattern=pattern, repl="", string=text, flags=re.I)
+    return text.replace("\n", "")
+
+
+def legacy_replace_unwanted_keywords(text: str) -> str:
+    """Previous `Filter.replace_unwanted_keywords`."""
+    for key, value in text_filter.replacements.items():
+        if re.search(key, text, re.IGNORECASE) is not None:
+            text = text.replace(key, value)
+    return text
+
+
+def legacy_contains_video(text: str) -> bool:
+    """Previous `Filter.contains_video`."""
+    return re.search(r"video", text, re.IGNORECASE) is not None
+
+
+# function name: (previous version, version the pipeline calls)
+FUNCTIONS = {
+    "filter_text": (legacy_filter_text, filter_text),
+    "replace_keywords": (
+        legacy_replace_unwanted_keywords,
+        Filter.replace_unwanted_keywords,
+    ),
+    "contains_video": (legacy_contains_video, Filter.contains_video),
+}
+
+
+def measure(function, articles: list[str], repeat: int) -> tuple[float, list]:
+    """Returns seconds of `repeat` passes of a function over articles, and outputs."""
+    start = time.perf_counter()
+    for _ in range(repeat):
+        outputs = [function(article) for article in articles]
+    return time.perf_counter() - start, outputs
+
+
+def load_articles(limit: int | None) -> list[str]:
+    articles = []
+    for url in html_archive.urls()[:limit]:
+        page = html_archive.get(url)
+        # e.g. the page's blob was removed from the archive
+        if page is None:
+            continue
+        articles.append(extract_text(page.url, page.html))
+    if not articles:
+        with open(DATA_PATH, "r") as f:
+            articles = [article["article"] for article in json.load(f)]
+    return articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None, help="Number of articles")
+    parser.add_argument(
+        "--repeat", type=int, default=20, help="Number of passes over the articles"
+    )
+    args = parser.parse_args()
+    articles = load_articles(args.limit)
+    size_mb = sum(len(article) for article in articles) * args.repeat / 1024**2
+    print(f"{len(articles)} articles, {size_mb:.2f} MB filtered per function")
+    print(f"{'function':<18}{'legacy ms':>11}{'ms/article':>12}{'MB/s':>10}{'differ':>8}")
+    for name, (legacy, current) in FUNCTIONS.items():
+        legacy_elapsed, legacy_outputs = measure(legacy, articles, args.repeat)
+        elapsed, outputs = measure(current, articles, args.repeat)
+        per_article = 1000 / (len(articles) * args.repeat)
+        # outputs differ where the legacy functions matched inside words ("made")
+        differing = sum(a != b for a, b in zip(legacy_outputs, outputs))
+        print(
+            f"{name:<18}{legacy_elapsed * per_article:>11.3f}"
+            f"{elapsed * per_article:>12.3f}{size_mb / elapsed:>10.2f}{differing:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
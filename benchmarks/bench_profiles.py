@@ -0,0 +1,60 @@
+"""
+Benchmarks paraphraser decoding profiles: latency per sentence on CPU and similarity
+of paraphrases to source sentences (1.0 means the sentence was copied verbatim).
+
+Usage:
+    python benchmarks/bench_profiles.py --batch-size 8
+"""
+import argparse
+import json
+import statistics
+import time
+from pathlib import Path
+
+import repackage
+from nltk import tokenize
+
+repackage.up()
+from src.ai import paraphraser
+from src.ai.paraphraser import DECODING_PROFILES, paraphrase_sentences
+from src.utilities.utils import text_similarity
+
+DATA_PATH = Path(__file__).parent.joinpath("data", "articles.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument(
+        "--profiles",
+        nargs="+",
+        choices=DECODING_PROFILES,
+        default=list(DECODING_PROFILES),
+    )
+    args = parser.parse_args()
+    with open(DATA_PATH, "r") as f:
+        articles = json.load(f)
+    sentences = [
+        sentence
+        for article in articles
+        for sentence in tokenize.sent_tokenize(article["article"])
+    ]
+    # load weights before timing and measure the models, not the inference cache
+    paraphraser.registry.get("paraphrase")
+    paraphraser.cache.enabled = False
+    print(f"{'profile':<10} {'ms/sentence':>12} {'similarity':>11}")
+    for profile in args.profiles:
+        start = time.perf_counter()
+        paraphrases = paraphrase_sentences(
+            sentences, batch_size=args.batch_size, profile=profile
+        )
+        latency = (time.perf_counter() - start) / len(sentences) * 1000
+        similarity = statistics.mean(
+            text_similarity(source, paraphrase)
+            for source, paraphrase in zip(sentences, paraphrases)
+        )
+        print(f"{profile:<10} {latency:>12.0f} {similarity:>11.3f}")
+
+
+if __name__ == "__main__":
+    main()
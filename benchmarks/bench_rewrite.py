@@ -0,0 +1,58 @@
+"""
+Benchmarks articles/minute of `AI_Writer.rewrite_headline_and_article` on CPU with
+per-sentence paraphrasing and with batched paraphrasing, and checks that both paths
+return the same text.
+
+Usage:
+    python benchmarks/bench_rewrite.py --batch-size 8 --repeat 2
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import repackage
+
+repackage.up()
+from src.ai import paraphraser
+from src.ai.ai_writer import AI_Writer
+
+DATA_PATH = Path(__file__).parent.joinpath("data", "articles.json")
+
+
+def run(articles: list[dict], batch_size: int | None, repeat: int) -> tuple:
+    """Returns articles/minute and rewritten texts of the last repetition."""
+    results = []
+    start = time.perf_counter()
+    for _ in range(repeat):
+        results = []
+        for article in articles:
+            ai_writer = AI_Writer(
+                article["headline"], article["article"], batch_size=batch_size
+            )
+            results.append(ai_writer.rewrite_headline_and_article())
+    elapsed = time.perf_counter() - start
+    return len(articles) * repeat / elapsed * 60, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+    with open(DATA_PATH, "r") as f:
+        articles = json.load(f)
+    # load weights before timing and measure the models, not the inference cache
+    paraphraser.registry.get("paraphrase")
+    paraphraser.cache.enabled = False
+    per_sentence_rate, per_sentence_results = run(articles, None, args.repeat)
+    batched_rate, batched_results = run(articles, args.batch_size, args.repeat)
+    print(f"per-sentence: {per_sentence_rate:.2f} articles/min")
+    print(f"batched (batch_size={args.batch_size}): {batched_rate:.2f} articles/min")
+    print(f"speed-up: {batched_rate / per_sentence_rate:.2f}x")
+    mismatches = sum(a != b for a, b in zip(per_sentence_results, batched_results))
+    print(f"outputs differing between paths: {mismatches}/{len(articles)}")
+
+
+if __name__ == "__main__":
+    main()
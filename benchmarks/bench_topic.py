@@ -0,0 +1,47 @@
+"""
+Benchmarks topic classifier backends on a stored sample of articles: latency per
+article on CPU and agreement of every backend with the zero-shot backend.
+
+Usage:
+    python benchmarks/bench_topic.py --batch-size 8
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+
+import repackage
+
+repackage.up()
+from src.ai.ai_writer import CLASSES
+from src.ai.topic_classifier import CLASSIFIER_BACKENDS, get_topic_classifier
+
+DATA_PATH = Path(__file__).parent.joinpath("data", "topic_sample.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--labels", nargs="+", default=CLASSES)
+    args = parser.parse_args()
+    with open(DATA_PATH, "r") as f:
+        articles = json.load(f)
+    topics = {}
+    print(f"{'backend':<10} {'startup s':>10} {'ms/article':>11} {'agreement':>10}")
+    for backend in CLASSIFIER_BACKENDS:
+        start = time.perf_counter()
+        classifier = get_topic_classifier(backend, candidate_labels=args.labels)
+        # a first call loads the weights
+        classifier.classify(articles[:1], args.labels)
+        startup = time.perf_counter() - start
+        start = time.perf_counter()
+        topics[backend] = classifier.classify(articles, args.labels, args.batch_size)
+        latency = (time.perf_counter() - start) / len(articles) * 1000
+        agreement = sum(
+            a == b for a, b in zip(topics[backend], topics["zero-shot"])
+        ) / len(articles)
+        print(f"{backend:<10} {startup:>10.1f} {latency:>11.0f} {agreement:>10.0%}")
+
+
+if __name__ == "__main__":
+    main()
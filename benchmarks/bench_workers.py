@@ -0,0 +1,80 @@
+"""
+Benchmarks scaling of article rewriting with the number of inference worker processes:
+articles/minute, speed-up over one worker and memory (PSS, which counts pages shared
+copy-on-write only once) of the parent and its workers.
+
+Usage:
+    python benchmarks/bench_workers.py --max-workers 4 --repeat 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from pathlib import Path
+
+import repackage
+
+repackage.up()
+from src.ai import paraphraser
+from src.ai.ai_writer import AI_Writer
+from src.ai.worker_pool import InferencePool, available_cpus
+
+DATA_PATH = Path(__file__).parent.joinpath("data", "articles.json")
+
+
+def pss_mb(pid: int) -> float | None:
+    """Returns proportional set size of a process in MB (Linux only)."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+
+
+def run(articles: list[dict], workers: int, batch_size: int) -> tuple[float, float]:
+    """Returns articles/minute and total PSS in MB of a pool of `workers`."""
+    ai_writers = [
+        AI_Writer(article["headline"], article["article"], batch_size=batch_size)
+        for article in articles
+    ]
+    with InferencePool(workers=workers, models=["paraphrase"]) as pool:
+        start = time.perf_counter()
+        pool.rewrite(ai_writers)
+        elapsed = time.perf_counter() - start
+        pids = [os.getpid()] + [child.pid for child in multiprocessing.active_children()]
+        memory = sum(pss_mb(pid) or 0 for pid in pids)
+    return len(articles) / elapsed * 60, memory
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--max-workers", type=int, default=available_cpus())
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument(
+        "--repeat", type=int, default=4, help="Number of copies of every article"
+    )
+    args = parser.parse_args()
+    with open(DATA_PATH, "r") as f:
+        articles = json.load(f) * args.repeat
+    # measure the models, not the inference cache
+    paraphraser.cache.enabled = False
+    workers = 1
+    baseline = None
+    print(f"{'workers':>8}{'articles/min':>16}{'speed-up':>12}{'PSS MB':>12}")
+    while workers <= args.max_workers:
+        rate, memory = run(articles, workers, args.batch_size)
+        baseline = baseline or rate
+        print(f"{workers:>8}{rate:>16.2f}{rate / baseline:>11.2f}x{memory:>12.0f}")
+        workers *= 2
+    if workers // 2 != args.max_workers:
+        rate, memory = run(articles, args.max_workers, args.batch_size)
+        print(
+            f"{args.max_workers:>8}{rate:>16.2f}{rate / baseline:>11.2f}x{memory:>12.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,80 @@
+import argparse
 from pathlib import Path
 
-from src.ai.ai_writer import AI_Writer, Filter
+from src.ai.worker_pool import InferencePool
 from src.news.news_handler import NewsHandler
-from src.parsers import article_parser
-from src.utilities.utils import CustomLogger, wait_for_web_scraping
+from src.pipeline.ingest import build_ingest_pipeline
+from src.pipeline.ledger import seen_urls
+from src.utilities.utils import CustomLogger
 
 logger = CustomLogger(Path(__file__).name)
 
 
 # TODO: apply changes from maze.py
 # TODO: check why named entities are lowercase
-def main(mode):
+def main(mode, workers=1):
     news_handler = NewsHandler()
     # 1. Get N newest articles (urls and headlines) (`news_handler.py`)
-    list_of_urls_and_headlines = news_handler.get_top_headlines()
-    for element in list_of_urls_and_headlines:
-        # filter out Videos: if 'content' from endpoint /top_headlines contains a video,
-        # omit this article
-        if Filter.contains_video(element[2]):
-            logger.warning(f"Text for `{element[0]}` Contains video. Omitted.")
-            continue
-        # TODO: check if url was already used
-        pass
-        # 2a. Scrape given urls to get full article texts (`article_parser.py`)
-        # 2b. Format and filter raw article texts (`article_parser.py`)
-        headline, article = article_parser.get_original_article_text(
-            element[0], element[1]
-        )
-        if Filter.is_too_short_text(article.text):
-            logger.warning(f"Text for `{element[0]}` too short. Omitted.")
-            continue
-        ai_writer = AI_Writer(headline=headline, article=article, mode=mode)
-        # 3a. Rewrite articles and headlines (`ai_writer.py`)
-        ai_writer.rewrite_headline()
-        ai_writer.rewrite_article()
-        # 3b. Get article main topic (`ai_writer.py`)
-        # TODO: add functionality assinging URI to AI_Writer variable
-        ai_writer.detect_topic()
-        # 3c. Get a photo from Google Storage that correspondents to the article main \
-        # topic (`ai_writer.py` + `gcs_handler.py`)
-        pass
-        # 4a. Return rewritten article text, rewritten headline and an image from Google \
-        # Storage (...)
-        uri, r_headline, r_article = (
-            ai_writer.uri,
-            ai_writer.rewritten_headline,
-            ai_writer.rewritten_article,
-        )
-        # 4b. Reformat rewritten article text, inserting html code for advertisment (...)
-        # TODO: implement
-        pass
-        # 4c. Post article + headline + image (...)
-        # TODO: implement
-        pass
-        print(uri, r_headline, r_article)
-        wait_for_web_scraping()
+    records = news_handler.get_top_headlines_records()
+    # skip articles that were already posted, before anything is downloaded
+    records = seen_urls.filter_new(records)
+    # 2a. Scrape given urls to get full article texts (`article_parser.py`)
+    # 2b. Format and filter raw article texts (`article_parser.py`), omitting videos
+    # and too short texts
+    # TODO: pass `duplicates=near_duplicates` once articles are posted, the index is
+    # shared with `run_daily` and must not hold articles that were never published
+    # 3a. Rewrite articles and headlines (`ai_writer.py`)
+    # 3b. Get article main topic (`ai_writer.py`)
+    # 3c. Get a photo from Google Storage that correspondents to the article main \
+    # topic (`ai_writer.py` + `gcs_handler.py`)
+    # all stages run concurrently, e.g. next articles are scraped during rewriting
+    pool = None
+    if workers > 1:
+        # models are loaded once here and shared by the forked workers
+        pool = InferencePool(workers=workers)
+    pipeline = build_ingest_pipeline(
+        post_article,
+        mode=mode,
+        skip_videos=True,
+        skip_short=True,
+        pool=pool,
+    )
+    try:
+        pipeline.run(records)
+    finally:
+        if pool is not None:
+            pool.close()
+        seen_urls.flush()
+    logger.info(f"Pipeline stats: {pipeline.stats()}")
+    logger.info(f"Seen URL ledger stats: {seen_urls.stats()}")
+
+
+def post_article(item: tuple) -> tuple:
+    record, ai_writer = item
+    # 4a. Return rewritten article text, rewritten headline and an image from Google \
+    # Storage (...)
+    uri, r_headline, r_article = (
+        ai_writer.uri,
+        ai_writer.rewritten_headline,
+        ai_writer.rewritten_article,
+    )
+    # 4b. Reformat rewritten article text, inserting html code for advertisment (...)
+    # TODO: implement
+    pass
+    # 4c. Post article + headline + image (...)
+    # TODO: implement, then add the posted URL to the ledger:
+    # seen_urls.add(record.url, headline=record.title)
+    pass
+    print(uri, r_headline, r_article)
+    return item
 
 
 if __name__ == "__main__":
-    main(mode="local")
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of inference worker processes sharing preloaded models",
+    )
+    main(mode="local", workers=parser.parse_args().workers)
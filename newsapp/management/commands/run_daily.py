@@ -4,14 +4,21 @@ import repackage
 from django.core.management.base import BaseCommand
 from tqdm.auto import tqdm
 
-from newsapp.models import Article, Author
+from newsapp.models import Article
+from newsapp.persistence import ArticleWriter
 
 repackage.up(3)
 from src.ai.ai_writer import AI_Writer
+from src.ai.paraphraser import DECODING_PROFILES
+from src.ai.worker_pool import InferencePool
 from src.config.config import load_config
 from src.news.news_handler import NewsHandler
-from src.parsers import article_parser
-from src.utilities.utils import wait_for_web_scraping
+from src.news.records import HeadlineRecord
+from src.parsers.html_archive import html_archive
+from src.parsers.near_duplicates import Duplicate, near_duplicates
+from src.pipeline.ingest import build_ingest_pipeline, model_seconds_saved
+from src.pipeline.jobs import job_store
+from src.pipeline.ledger import SeenUrlLedger, mirror_table
 
 config = load_config()
 
@@ -30,46 +37,134 @@ class Command(BaseCommand):
         parser.add_argument(
             "page_size", nargs="?", type=int, choices=range(1, 25), default=2
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Number of sentences paraphrased in one batch",
+        )
+        parser.add_argument(
+            "--profile",
+            type=str,
+            choices=DECODING_PROFILES,
+            default=None,
+            help="Paraphraser decoding profile (defaults to ai.decoding_profile)",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            help="Number of inference worker processes sharing preloaded models",
+        )
+        parser.add_argument(
+            "--offline",
+            action="store_true",
+            help="Parse articles only from the HTML archive, without downloading them",
+        )
+        parser.add_argument(
+            "--retry-failed",
+            action="store_true",
+            help="Retry only articles that failed in earlier runs",
+        )
 
     def handle(self, *args, **options):
         mode = options["mode"]
         news_handler = NewsHandler()
-        list_of_urls_and_headlines = news_handler.get_top_headlines(
-            sources="cnn", page=1, page_size=options["page_size"]
+        # URLs of published articles, checked before anything is downloaded
+        self.seen_urls = SeenUrlLedger(
+            urls=lambda: Article.objects.exclude(source_url=None).values_list(
+                "source_url", flat=True
+            ),
+            lookup=lambda url: Article.objects.filter(source_url=url).exists(),
+            capacity=config.get("ledger", {}).get("capacity", 100_000),
+            error_rate=config.get("ledger", {}).get("error_rate", 0.001),
+            mirror_table=mirror_table(),
+        )
+        self.seen_urls.rebuild()
+        if options["retry_failed"]:
+            records = job_store.retry_failed()
+        else:
+            records = news_handler.get_top_headlines_records(
+                sources="cnn", page=1, page_size=options["page_size"]
+            )
+            records = self.seen_urls.filter_new(records)
+            # articles left unfinished by a crashed run are resumed as well
+            records = job_store.resume(records)
+        dedup = config.get("dedup", {})
+        duplicates, on_duplicate = None, None
+        if dedup.get("enabled", True):
+            duplicates = near_duplicates
+            if dedup.get("action", "skip") == "update":
+                on_duplicate = self.update_duplicate
+        pool = None
+        if options["workers"] > 1:
+            # models are loaded once here and shared by the forked workers
+            pool = InferencePool(workers=options["workers"])
+        # authors are read once, articles are written in batches
+        self.writer = ArticleWriter()
+        # articles are downloaded, rewritten, classified and saved concurrently
+        pipeline = build_ingest_pipeline(
+            self.save_articles,
+            mode=mode,
+            batch_size=options["batch_size"],
+            profile=options["profile"],
+            offline=options["offline"],
+            pool=pool,
+            jobs=job_store,
+            duplicates=duplicates,
+            on_duplicate=on_duplicate,
+            save_batch_size=config.get("pipeline", {}).get("save_batch_size", 16),
         )
-        for element in tqdm(list_of_urls_and_headlines):
-            try:
-                headline, article = article_parser.get_original_article_text(
-                    element[0], element[1]
-                )
-                ai_writer = AI_Writer(headline=headline, article=article, mode=mode)
-                ai_writer.rewrite_headline()
-                ai_writer.rewrite_article()
-                ai_writer.detect_topic()
-                try:
-                    # Try to get the author from the database
-                    author = Author.objects.get(name_surname=ai_writer.author)
-                except Author.DoesNotExist:
-                    # If the author doesn't exist, create it
-                    author = Author(name_surname=ai_writer.author)
-                    author.save()
-                    self.stdout.write(
-                        self.style.SUCCESS(
-                            f"Author {Author.name_surname} successfully posted"
-                        )
-                    )
+        try:
+            pipeline.run(tqdm(records))
+        finally:
+            if pool is not None:
+                pool.close()
+            self.seen_urls.flush()
+        for stage, stats in pipeline.stats().items():
+            self.stdout.write(f"Stage {stage} stats: {stats}")
+        self.stdout.write(f"Jobs by state: {job_store.counts()}")
+        self.stdout.write(f"Seen URL ledger stats: {self.seen_urls.stats()}")
+        self.stdout.write(f"Database write stats: {self.writer.stats()}")
+        if duplicates is not None:
+            duplicates.prune()
+            stats = duplicates.stats()
+            saved = model_seconds_saved(pipeline.stats(), stats["duplicates"])
+            self.stdout.write(
+                f"Near duplicate stats: {stats}, model seconds saved: {saved}"
+            )
+        self.stdout.write(f"NewsAPI request stats: {news_handler.get_request_stats()}")
+        self.stdout.write(f"NewsAPI cache stats: {news_handler.cache.stats()}")
+        self.stdout.write(f"HTML archive stats: {html_archive.stats()}")
+        if news_handler.key_pool is not None:
+            self.stdout.write(
+                f"NewsAPI requests left today: {news_handler.key_pool.remaining()}"
+            )
+        self.stdout.write(f"Inference stats: {AI_Writer.get_inference_stats()}")
 
-                article = Article(
-                    headline=ai_writer.rewritten_headline,
-                    article_text=ai_writer.rewritten_article,
-                    image=ai_writer.uri,
-                    author=Author.objects.get(name_surname=ai_writer.author),
-                    topic=ai_writer.topic,
-                    pub_date=datetime.datetime.now(),
-                )
-                article.save()
-                self.stdout.write(self.style.SUCCESS("Article successfully posted"))
-            except Exception as e:
-                self.stdout.write(self.style.ERROR(e))
-            finally:
-                wait_for_web_scraping()
+    def update_duplicate(self, record: HeadlineRecord, duplicate: Duplicate) -> None:
+        """
+        Republishes the article a near duplicate was found of, instead of rewriting the
+        duplicate (e.g. live updates of a story).
+        """
+        updated = Article.objects.filter(source_url=duplicate.url).update(
+            pub_date=datetime.datetime.now()
+        )
+        if updated:
+            self.stdout.write(
+                f"Article {duplicate.url} updated by {record.url} "
+                f"(similarity {duplicate.similarity:.2f})"
+            )
+
+    def save_articles(self, items: list[tuple]) -> list[tuple]:
+        """
+        Saves a batch of rewritten articles in one transaction. Errors are raised, so
+        that jobs of the batch are marked failed and can be retried.
+        """
+        self.writer.write(items)
+        for record, _ in items:
+            self.seen_urls.add(record.url, headline=record.title)
+        self.stdout.write(
+            self.style.SUCCESS(f"{len(items)} articles successfully posted")
+        )
+        return items
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.5 on 2026-10-18 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('newsapp', '0004_alter_author_name_surname'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='source_url',
+            field=models.URLField(blank=True, max_length=500, null=True, unique=True),
+        ),
+    ]
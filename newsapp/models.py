@@ -46,12 +46,16 @@ class Article(models.Model):
     author = models.ForeignKey(Author, on_delete=models.CASCADE)
     topic = models.CharField(max_length=100)
     pub_date = models.DateTimeField(auto_now_add=True)
+    # normalized URL of the rewritten article, null for articles added by hand
+    source_url = models.URLField(max_length=500, unique=True, null=True, blank=True)
 
     def __str__(self):
         return self.headline
 
     @classmethod
-    def create(cls, headline, article_text, image, author, topic, pub_date):
+    def create(
+        cls, headline, article_text, image, author, topic, pub_date, source_url=None
+    ):
         article = cls(
             headline=headline,
             article_text=article_text,
@@ -59,5 +63,6 @@ class Article(models.Model):
             author=author,
             topic=topic,
             pub_date=pub_date,
+            source_url=source_url,
         )
         return article
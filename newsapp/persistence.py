@@ -0,0 +1,75 @@
+"""
+Bulk writing of rewritten articles. Authors are loaded once and kept in memory, and
+articles are inserted in batches, each in one transaction, instead of several queries
+and autocommits per article.
+"""
+import datetime
+import threading
+
+from django.db import transaction
+
+from newsapp.models import Article, Author
+from src.utilities.utils import normalize_url
+
+
+class ArticleWriter:
+    """Writes (record, AI_Writer) items to the database in batches."""
+
+    def __init__(self) -> None:
+        # the set of authors is fixed, so it is read once per run
+        self.authors = Author.objects.in_bulk()
+        self.counters = {"batches": 0, "articles": 0, "authors": 0}
+        self._lock = threading.Lock()
+
+    def write(self, items: list[tuple]) -> list[Article]:
+        """
+        Inserts articles of items in one transaction. Articles whose source URL is
+        already stored are ignored, so that a retried batch does not fail on them.
+
+        Args:
+            items (list[tuple]): (record, AI_Writer) tuples of rewritten articles.
+
+        Returns:
+            list[Article]: Articles passed to `bulk_create`.
+        """
+        with self._lock:
+            with transaction.atomic():
+                authors = dict(self.authors)
+                missing = {
+                    ai_writer.author
+                    for _, ai_writer in items
+                    if ai_writer.author not in authors
+                }
+                if missing:
+                    Author.objects.bulk_create(
+                        [Author(name_surname=name) for name in missing],
+                        ignore_conflicts=True,
+                    )
+                    authors.update(Author.objects.in_bulk(missing))
+                articles = [
+                    Article(
+                        headline=ai_writer.rewritten_headline,
+                        article_text=ai_writer.rewritten_article,
+                        image=ai_writer.uri,
+                        author=authors[ai_writer.author],
+                        topic=ai_writer.topic,
+                        pub_date=datetime.datetime.now(),
+                        source_url=normalize_url(record.url),
+                    )
+                    for record, ai_writer in items
+                ]
+                Article.objects.bulk_create(articles, ignore_conflicts=True)
+            # cached only once committed
+            self.authors = authors
+            self.counters["batches"] += 1
+            self.counters["articles"] += len(articles)
+            self.counters["authors"] += len(missing)
+        return articles
+
+    def stats(self) -> dict:
+        """
+        Returns numbers of written batches (transactions), articles (including ones
+        ignored as already stored) and created authors.
+        """
+        with self._lock:
+            return dict(self.counters)
@@ -1,3 +1,47 @@
+from types import SimpleNamespace
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from newsapp.models import Article, Author
+from newsapp.persistence import ArticleWriter
+from src.news.records import HeadlineRecord
+
+
+def make_item(url, author="Bob Patel"):
+    ai_writer = SimpleNamespace(
+        rewritten_headline="Headline",
+        rewritten_article="Article",
+        uri="gs://images/joe_biden/joe_biden_1.jpg",
+        author=author,
+        topic="politics",
+    )
+    return HeadlineRecord(url, "Title", None), ai_writer
+
+
+class ArticleWriterTests(TestCase):
+    def test_write_batch_in_one_transaction(self):
+        Author.objects.create(name_surname="Bob Patel")
+        writer = ArticleWriter()
+        items = [make_item(f"https://edition.cnn.com/{i}") for i in range(10)]
+        with CaptureQueriesContext(connection) as queries:
+            writer.write(items + [make_item("https://edition.cnn.com/10", "Ella Long")])
+        # savepoint, author insert and select, article insert and release
+        self.assertLessEqual(len(queries.captured_queries), 5)
+        self.assertEqual(Article.objects.count(), 11)
+        self.assertEqual(writer.stats(), {"batches": 1, "articles": 11, "authors": 1})
 
-# Create your tests here.
+    def test_stored_source_url_is_ignored(self):
+        writer = ArticleWriter()
+        writer.write([make_item("https://edition.cnn.com/1?utm_source=twitter")])
+        writer.write(
+            [
+                make_item("https://edition.cnn.com/1"),
+                make_item("https://edition.cnn.com/2"),
+            ]
+        )
+        self.assertEqual(
+            sorted(Article.objects.values_list("source_url", flat=True)),
+            ["https://edition.cnn.com/1", "https://edition.cnn.com/2"],
+        )
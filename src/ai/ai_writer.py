@@ -6,47 +6,110 @@ from pathlib import Path
 import repackage
 from nltk import tokenize
 from tqdm.auto import tqdm
-from transformers import PegasusForConditionalGeneration, PegasusTokenizerFast, pipeline
 
 repackage.up()
+from ai.chunked_ner import count_person_entities, get_named_entities_chunked
+from ai.inference_cache import cache
+from ai.inference_client import get_inference_client
+from ai.model_registry import NER_MODEL, cache_model_id, register_models, registry
+from ai.paraphraser import DECODING_PROFILES, DEFAULT_PROFILE, paraphrase_sentences
+from ai.topic_classifier import DEFAULT_LABELS, get_topic_classifier
 from config.config import load_config
 from gcp.gcs_handler import GCS_Handler
 from news.news_handler import NewsHandler
 from parsers.article_parser import get_original_article_text
-from utilities.utils import CustomLogger, wait_for_web_scraping
+from utilities.text_filter import get_text_filter, text_filter
+from utilities.utils import CustomLogger
 
-NER_MODEL = "Jean-Baptiste/camembert-ner"
-CLASSIFICATION_MODEL = "facebook/bart-large-mnli"
 TEXT_GENERATION_MODEL = "EleutherAI/gpt-neo-125M"
-CLASSES = ["politics", "business", "economy"]
+CLASSES = DEFAULT_LABELS
 
 config = load_config()
 logger = CustomLogger(Path(__file__).name)
 
 
 class AI_Writer:
-    def __init__(self, headline: str, article: str, mode: str = "local") -> None:
+    def __init__(
+        self,
+        headline: str,
+        article: str,
+        mode: str = "local",
+        batch_size: int | None = None,
+        profile: str | None = None,
+        server_url: str | None = None,
+    ) -> None:
         if mode.lower() not in config["django"]["modes"]:
             raise ValueError(f'mode must be one of {config["django"]["modes"]}')
+        if profile is None:
+            profile = config.get("ai", {}).get("decoding_profile", DEFAULT_PROFILE)
+        if profile not in DECODING_PROFILES:
+            raise ValueError(f"profile must be one of {list(DECODING_PROFILES)}")
         self.headline = headline
         self.article = article
         self.rewritten_headline = None
         self.rewritten_article = None
         self.topic = None
         self.uri = None
+        self.per_entities = None
         self.author = random.choice(config["django"]["authors"])
         self.mode = mode
+        if batch_size is None:
+            batch_size = config.get("ai", {}).get("batch_size")
+        self.batch_size = batch_size
+        self.profile = profile
+        if server_url is None:
+            server_url = config.get("ai", {}).get("server_url")
+        # if set, models run in the inference service instead of this process
+        self.server_url = server_url
 
     def rewrite_article(self) -> str:
         """Rewrites an article and sets instance variable `rewritten_article`"""
-        rewritten_article = self.rewrite_text(input_=self.article)
+        rewritten_article = self.rewrite_text(
+            input_=self.article,
+            batch_size=self.batch_size,
+            profile=self.profile,
+            server_url=self.server_url,
+        )
         self.rewritten_article = rewritten_article
         logger.info("Article rewritten")
         return rewritten_article
 
     def rewrite_headline(self) -> str:
         """Rewrites a headline and sets instance variable `rewritten_headline`"""
-        rewritten_headline = self.rewrite_text(input_=self.headline)
+        rewritten_headline = self.rewrite_text(
+            input_=self.headline,
+            batch_size=self.batch_size,
+            profile=self.profile,
+            server_url=self.server_url,
+        )
+        return self._set_rewritten_headline(rewritten_headline)
+
+    def rewrite_headline_and_article(self) -> tuple[str, str]:
+        """
+        Rewrites a headline and an article with headline sentences sharing batches with
+        article sentences. Sets instance variables `rewritten_headline` and
+        `rewritten_article`.
+        """
+        headline_sentences = tokenize.sent_tokenize(self.headline)
+        article_sentences = tokenize.sent_tokenize(self.article)
+        rewritten_sentences = self.paraphrase(
+            headline_sentences + article_sentences,
+            batch_size=self.batch_size,
+            profile=self.profile,
+            server_url=self.server_url,
+        )
+        n_headline = len(headline_sentences)
+        rewritten_headline = self.postprocess_rewritten_sentences(
+            rewritten_sentences[:n_headline]
+        )
+        self._set_rewritten_headline(rewritten_headline)
+        self.rewritten_article = self.postprocess_rewritten_sentences(
+            rewritten_sentences[n_headline:]
+        )
+        logger.info("Article rewritten")
+        return self.rewritten_headline, self.rewritten_article
+
+    def _set_rewritten_headline(self, rewritten_headline: str) -> str:
         # remove comma at the end of a headline
         if rewritten_headline.endswith("."):
             rewritten_headline = rewritten_headline[:-1]
@@ -55,82 +118,172 @@ class AI_Writer:
         return rewritten_headline
 
     def detect_topic(self, **kwargs) -> None:
-        """Detects article topic and sets instance variable `topic`."""
-        named_entities = self.get_named_entities()
-        if named_entities is None:
-            # If the article doesn't contain any named entity, \
-            # detect general topic of the article
-            logger.warning("Named entities not found in article")
-            topic = self.classify_article_to_topic(**kwargs)
-            self.topic = topic
-            return topic
-        per_named_entitites = self.get_named_entities_person(named_entities)
-        if per_named_entitites is None:
-            # If the article doesn't contain any PER (person) named entity, \
-            # detect general topic of the article
-            topic = self.classify_article_to_topic(**kwargs)
-            self.topic = topic
-            return topic
-        else:
-            if self.mode == "local":
-                # If the access to GCP is unabled assign PER named entity as a topic
-                topic = self.classify_article_to_topic(**kwargs)
-                image_path = self.get_random_image_of_person(
-                    list_of_persons=per_named_entitites
-                )
-                logger.info(
-                    "Named entities looked up locally due to \
-                        mode='local'"
-                )
-                if image_path is not None:
-                    self.uri = f"images/{image_path}"
-                    return topic
-                else:
-                    # if image for any person not found, get image for a topic
-                    for per in per_named_entitites:
-                        logger.error(f"Image(s) of {per} not found")
-                    image_path = self.get_random_image_of_person(
-                        list_of_persons=[self.topic]
-                    )
-                    self.uri = f"images/{image_path}"
-                    return topic
-            else:
-                image_uri = GCS_Handler().get_random_image_of_person(
-                    bucket_name="images", list_of_persons=per_named_entitites
+        """
+        Detects article topic and sets instance variables `topic` and `uri`.
+
+        Args:
+            **kwargs: Keyword arguments passed to `detect_topics`, e.g.
+            `candidate_labels`.
+        """
+        kwargs.setdefault("server_url", self.server_url)
+        result = self.detect_topics([self.article], mode=self.mode, **kwargs)[0]
+        if result["topic"] is not None:
+            self.topic = result["topic"]
+        if result["uri"] is not None:
+            self.uri = result["uri"]
+        return result["topic"]
+
+    @classmethod
+    def detect_topics(
+        cls,
+        articles: list[str],
+        mode: str = "local",
+        candidate_labels: list[str] | None = None,
+        batch_size: int | None = None,
+        server_url: str | None = None,
+    ) -> list[dict]:
+        """
+        Detects topics of many articles at once, running named entity recognition and
+        zero-shot classification over all of them in batches.
+
+        Args:
+            articles (list[str]): Article contents.
+            mode (str, optional): "local" to look images up in `images` directory,
+            "gcp" to look them up in Google Storage. Defaults to "local".
+            candidate_labels (list[str] | None, optional): Classes to pick from. If None
+            taken from script variable `CLASSES`. Defaults to None.
+            batch_size (int | None, optional): Number of articles in a pipeline batch.
+            If None taken from config. Defaults to None.
+            server_url (str | None, optional): URL of the inference service to run the
+            models in. If None taken from config (`ai.server_url`), if not set there
+            models run in this process. Defaults to None.
+
+        Returns:
+            list[dict]: For every article a dictionary with keys `topic` (None if an
+            image of a person was found in GCP), `per_entities` (None if the article
+            contains no PER named entity) and `uri` (image URI or None).
+        """
+        if mode.lower() not in config["django"]["modes"]:
+            raise ValueError(f'mode must be one of {config["django"]["modes"]}')
+        if server_url is None:
+            server_url = config.get("ai", {}).get("server_url")
+        results = []
+        for named_entities in cls.get_named_entities_batch(
+            articles, batch_size, server_url=server_url
+        ):
+            if not named_entities:
+                logger.warning("Named entities not found in article")
+            per_named_entities = cls.get_named_entities_person(named_entities)
+            results.append(
+                {"topic": None, "per_entities": per_named_entities, "uri": None}
+            )
+        if mode == "gcp":
+            for result in results:
+                if result["per_entities"] is None:
+                    continue
+                result["uri"] = GCS_Handler().get_random_image_of_person(
+                    bucket_name="images", list_of_persons=result["per_entities"]
                 )
-                if image_uri is None:
-                    # If there is no image of a given person (PER named entity), \
-                    # detect general topic of the article
+                if result["uri"] is None:
                     logger.warning("Named entities not found in GCP")
-                    topic = self.classify_article_to_topic()
-                    self.topic = topic
-                    return topic
                 else:
-                    # Otherwise, assing image URI found in GCP as self.uri
-                    self.uri = image_uri
                     logger.info("Named entities found in GCP")
+        # If the article doesn't contain any PER (person) named entity or there is no
+        # image of a given person in GCP, detect general topic of the article
+        to_classify = [i for i, result in enumerate(results) if result["uri"] is None]
+        topics = cls.classify_articles_to_topics(
+            [articles[i] for i in to_classify],
+            candidate_labels,
+            batch_size,
+            server_url=server_url,
+        )
+        for i, topic in zip(to_classify, topics):
+            results[i]["topic"] = topic
+            logger.info(f"`topic` set to {topic}")
+        if mode == "local":
+            for result in results:
+                if result["per_entities"] is None:
+                    continue
+                logger.info("Named entities looked up locally due to mode='local'")
+                image_path = cls.get_random_image_of_person(result["per_entities"])
+                if image_path is None:
+                    # if image for any person not found, get image for a topic
+                    for per in result["per_entities"]:
+                        logger.error(f"Image(s) of {per} not found")
+                    image_path = cls.get_random_image_of_person([result["topic"]])
+                result["uri"] = f"images/{image_path}"
+        return results
 
     def get_named_entities(self) -> list[dict]:
         """Returns named entities in an article"""
-        token_classifier = pipeline(model=NER_MODEL, aggregation_strategy="simple")
-        tokens = token_classifier(self.article)
-        return tokens
+        named_entities = self.get_named_entities_batch(
+            [self.article], server_url=self.server_url
+        )
+        return named_entities[0]
 
+    @staticmethod
+    def get_named_entities_batch(
+        articles: list[str],
+        batch_size: int | None = None,
+        server_url: str | None = None,
+    ) -> list[list[dict]]:
+        """
+        Returns named entities in many articles, running overlapping token windows of
+        the uncached ones through the NER pipeline in batches of similar length, or
+        sending them to the inference service at `server_url` if given.
+        """
+        if server_url is not None:
+            return get_inference_client(server_url).get_named_entities(articles)
+        if batch_size is None:
+            batch_size = config.get("ai", {}).get("pipeline_batch_size", 8)
+        params = {
+            "aggregation_strategy": "simple",
+            "window_size": config.get("ai", {}).get("ner_window_size", 256),
+            "stride": config.get("ai", {}).get("ner_window_stride", 32),
+        }
+        model_id = cache_model_id(NER_MODEL)
+        keys = [cache.make_key(model_id, params, article) for article in articles]
+        cached = cache.get_many("ner", keys)
+        missing = {key: a for key, a in zip(keys, articles) if key not in cached}
+        computed = {}
+        if missing:
+            outputs = get_named_entities_chunked(
+                registry.get("ner"),
+                list(missing.values()),
+                window_size=params["window_size"],
+                stride=params["stride"],
+                batch_size=batch_size,
+            )
+            computed = dict(zip(missing, outputs))
+            cache.set_many("ner", computed)
+        return [cached[key] if key in cached else computed[key] for key in keys]
+
+    @staticmethod
     def get_named_entities_person(
-        self, list_of_named_entities: list[dict]
+        list_of_named_entities: list[dict],
     ) -> list[str] | None:
         """
-        Returns named entities of type 'PER' (person) in a list of all named entities
+        Returns unique named entities of type 'PER' (person) in a list of all named
+        entities, the most often mentioned first.
         """
-        list_of_per_named_entities = []
-        for ne in list_of_named_entities:
-            if "PER" in ne.values():
-                list_of_per_named_entities.append(ne["word"])
-            else:
-                continue
+        list_of_per_named_entities = [
+            person
+            for person, _ in count_person_entities(list_of_named_entities).most_common()
+        ]
         return list_of_per_named_entities if list_of_per_named_entities else None
 
-    def get_random_image_of_person(self, list_of_persons: list[str]) -> str | None:
+    @staticmethod
+    def get_named_entities_person_counts(
+        list_of_named_entities: list[dict],
+    ) -> dict[str, int]:
+        """
+        Returns number of mentions of every named entity of type 'PER' (person) in
+        a list of all named entities.
+        """
+        return dict(count_person_entities(list_of_named_entities))
+
+    @staticmethod
+    def get_random_image_of_person(list_of_persons: list[str]) -> str | None:
         """Returns a random image of a person"""
         list_of_persons_images = []
         for person in list_of_persons:
@@ -162,21 +315,74 @@ class AI_Writer:
         """
         if article is None:
             article = self.article
-        if candidate_labels is None:
-            candidate_labels = CLASSES
-        classifier = pipeline(task="zero-shot-classification", model=CLASSIFICATION_MODEL)
-        result = classifier(
-            article,
-            candidate_labels,
-        )
-        # return label where score is max
-        scores_list = result["scores"]
-        n_max = scores_list.index(max(scores_list))
-        topic = result["labels"][n_max]
+        topic = self.classify_articles_to_topics(
+            [article], candidate_labels, server_url=self.server_url
+        )[0]
         self.topic = topic
         logger.info(f"`topic` set to {topic}")
         return topic
 
+    @staticmethod
+    def classify_articles_to_topics(
+        articles: list[str],
+        candidate_labels: list[str] | None = None,
+        batch_size: int | None = None,
+        server_url: str | None = None,
+    ) -> list[str]:
+        """
+        Classifies many articles to topics, running the uncached ones through the
+        configured classifier backend (`ai.topic_backend`) in batches of articles of
+        similar length, or sending them to the inference service at `server_url` if
+        given.
+
+        Args:
+            articles (list[str]): Article contents.
+            candidate_labels (list[str] | None, optional): Classes to pick from. If None
+            taken from script variable `CLASSES`. Defaults to None.
+            batch_size (int | None, optional): Number of articles in a pipeline batch.
+            If None taken from config. Defaults to None.
+            server_url (str | None, optional): URL of the inference service. If None
+            models run in this process. Defaults to None.
+
+        Returns:
+            list[str]: Topic of every article.
+        """
+        if server_url is not None:
+            return get_inference_client(server_url).classify(articles, candidate_labels)
+        if candidate_labels is None:
+            candidate_labels = CLASSES
+        if batch_size is None:
+            batch_size = config.get("ai", {}).get("pipeline_batch_size", 8)
+        classifier = get_topic_classifier(candidate_labels=candidate_labels)
+        params = {"candidate_labels": candidate_labels}
+        model_id = cache_model_id(classifier.model_id)
+        keys = [cache.make_key(model_id, params, a) for a in articles]
+        cached = cache.get_many("topic", keys)
+        missing = {key: a for key, a in zip(keys, articles) if key not in cached}
+        computed = {}
+        if missing:
+            # sorting by length keeps padding within a batch small
+            order = sorted(missing, key=lambda key: len(missing[key]))
+            topics = classifier.classify(
+                [missing[key] for key in order], candidate_labels, batch_size=batch_size
+            )
+            computed = dict(zip(order, topics))
+            cache.set_many("topic", computed)
+        return [cached[key] if key in cached else computed[key] for key in keys]
+
+    @staticmethod
+    def set_inference_backend(backend: str) -> None:
+        """
+        Switches models to an inference backend: "torch", "int8" or "onnx". Models
+        already loaded with another backend are dropped.
+        """
+        register_models(backend)
+
+    @staticmethod
+    def get_inference_stats() -> dict:
+        """Returns inference cache hit/miss counters and per-model load statistics."""
+        return {"cache": cache.stats(), "models": registry.report()}
+
     @staticmethod
     def get_actual_named_entities():
         """
@@ -192,7 +398,6 @@ class AI_Writer:
             ne_person_list = ai_writer.get_named_entities_person(ne_list)
             for person in tqdm(ne_person_list):
                 list_of_actual_named_entities.append(person)
-            wait_for_web_scraping()
         with open("list_of_actual_named_entities.txt", "a+") as file:
             for ne in set(list_of_actual_named_entities):
                 file.write(f"{ne}\n")
@@ -222,39 +427,78 @@ class AI_Writer:
 
     @staticmethod
     def rewrite_text(
-        input_: str, num_beams: int = 10, num_return_sequences: int = 10
+        input_: str,
+        num_beams: int | None = None,
+        num_return_sequences: int | None = None,
+        batch_size: int | None = None,
+        profile: str = DEFAULT_PROFILE,
+        server_url: str | None = None,
     ) -> str:
         """
         Rewrites text.
 
         Args:
             input_ (str): Text to rewrite.
+            num_beams (int | None, optional): Number of beams for beam search. If None
+            taken from `profile`. Defaults to None.
+            num_return_sequences (int | None, optional): Number of sequences generated
+            per sentence. If None taken from `profile`. Defaults to None.
+            batch_size (int | None, optional): Number of sentences paraphrased in one
+            batch. If None sentences are paraphrased one by one. Defaults to None.
+            profile (str, optional): Decoding profile, one of "quality", "balanced" and
+            "fast". Defaults to "quality".
+            server_url (str | None, optional): URL of the inference service. If None
+            the model runs in this process. Defaults to None.
 
         Returns:
             str: Rewritten text.
         """
         # TODO: better model?
-        model = PegasusForConditionalGeneration.from_pretrained(
-            "tuner007/pegasus_paraphrase"
-        )
-        tokenizer = PegasusTokenizerFast.from_pretrained("tuner007/pegasus_paraphrase")
         sentences = tokenize.sent_tokenize(input_)
-        rewritten_sentences = []
-        for sentence in sentences:
-            # tokenize the text to be form of a list of token IDs
-            inputs = tokenizer(
-                [sentence], truncation=True, padding="longest", return_tensors="pt"
-            )
-            # generate the paraphrased sentences
-            outputs = model.generate(
-                **inputs,
+        rewritten_sentences = AI_Writer.paraphrase(
+            sentences,
+            batch_size=batch_size,
+            num_beams=num_beams,
+            num_return_sequences=num_return_sequences,
+            profile=profile,
+            server_url=server_url,
+        )
+        return AI_Writer.postprocess_rewritten_sentences(rewritten_sentences)
+
+    @staticmethod
+    def paraphrase(
+        sentences: list[str],
+        batch_size: int | None = None,
+        num_beams: int | None = None,
+        num_return_sequences: int | None = None,
+        profile: str = DEFAULT_PROFILE,
+        server_url: str | None = None,
+    ) -> list[str]:
+        """
+        Paraphrases sentences in this process or, if `server_url` is given, in the
+        inference service, which batches them with sentences of other clients.
+        """
+        if server_url is not None:
+            return get_inference_client(server_url).rewrite(
+                sentences,
+                profile=profile,
                 num_beams=num_beams,
                 num_return_sequences=num_return_sequences,
             )
-            # decode the generated sentences using the tokenizer to get them back to text
-            rewritten_sentences.append(
-                tokenizer.batch_decode(outputs, skip_special_tokens=True)[0]
-            )
+        return paraphrase_sentences(
+            sentences,
+            batch_size=batch_size,
+            num_beams=num_beams,
+            num_return_sequences=num_return_sequences,
+            profile=profile,
+        )
+
+    @staticmethod
+    def postprocess_rewritten_sentences(rewritten_sentences: list[str]) -> str:
+        """
+        Filters and capitalizes rewritten sentences, inserts advertisement and joins
+        them into a text.
+        """
         # filter to replace 'CNN' with 'media'
         filtered_rewritten_sentences = []
         for r_sentence in rewritten_sentences:
@@ -293,9 +537,7 @@ class Filter:
         Returns True if `string` contains `video` substring (case insensitive),
         False otherwise.
         """
-        if re.search(r"video", string, re.IGNORECASE):
-            return True
-        return False
+        return text_filter.contains("video", string)
 
     def is_too_short_text(string: str) -> bool:
         """
@@ -308,23 +550,21 @@ class Filter:
 
     def replace_unwanted_keywords(string: str, keywords: dict | None = None) -> str:
         """
-        Replaces substrings (keys from `keywords`) with values from `keywords`
+        Replaces whole words (keys from `keywords`) with values from `keywords`
         in a string.
 
         Args:
             string (str): String to change.
             keywords (dict | None, optional): Dictionary to take substrings to swap from.
-            If None equals to {"CNN": "media"}. Defaults to None.
+            If None taken from config (`filter.replacements`, {"CNN": "media"}).
+            Defaults to None.
 
         Returns:
             str: String with replacements.
         """
         if keywords is None:
-            keywords = {"CNN": "media"}
-        for key, value in keywords.items():
-            if re.search(key, string, re.IGNORECASE) is not None:
-                string = string.replace(key, value)
-        return string
+            keywords = text_filter.replacements
+        return get_text_filter(replacements=keywords).clean(string)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,140 @@
+"""
+Named entity recognition over long texts. A text is split into overlapping token
+windows, all windows (of one or many texts) are run through the NER pipeline as one
+batch, and entity spans cut at window boundaries are merged back together.
+"""
+from collections import Counter
+
+
+def split_into_windows(
+    tokenizer, text: str, window_size: int = 256, stride: int = 32
+) -> list[tuple[int, int]]:
+    """
+    Splits a text into overlapping windows of at most `window_size` tokens.
+
+    Args:
+        tokenizer: Fast tokenizer returning offsets mapping.
+        text (str): Text to split.
+        window_size (int, optional): Maximal number of tokens in a window.
+        Defaults to 256.
+        stride (int, optional): Number of tokens shared by consecutive windows.
+        Defaults to 32.
+
+    Raises:
+        ValueError: If `stride` is not smaller than `window_size`.
+
+    Returns:
+        list[tuple[int, int]]: Character spans (start, end) of the windows.
+    """
+    if stride >= window_size:
+        raise ValueError("stride should be smaller than window_size")
+    encoding = tokenizer(text, add_special_tokens=False, return_offsets_mapping=True)
+    offsets = encoding["offset_mapping"]
+    if len(offsets) <= window_size:
+        return [(0, len(text))]
+    windows = []
+    for first in range(0, len(offsets), window_size - stride):
+        last = min(first + window_size, len(offsets)) - 1
+        windows.append((offsets[first][0], offsets[last][1]))
+        if last == len(offsets) - 1:
+            break
+    return windows
+
+
+def merge_window_entities(text: str, window_entities: list[tuple[int, list[dict]]]):
+    """
+    Merges entities found in overlapping windows of a text into one list.
+
+    Entities are shifted to positions in the whole text; overlapping spans of the same
+    entity group (the same entity seen by two windows, possibly cut by a window edge)
+    are merged into their union.
+
+    Args:
+        text (str): Whole text.
+        window_entities (list[tuple[int, list[dict]]]): Start of every window in the
+        text and entities the pipeline found in it.
+
+    Returns:
+        list[dict]: Entities sorted by position, in the pipeline output format.
+    """
+    if len(window_entities) == 1 and window_entities[0][0] == 0:
+        return window_entities[0][1]
+    shifted = sorted(
+        (
+            {**entity, "start": entity["start"] + offset, "end": entity["end"] + offset}
+            for offset, entities in window_entities
+            for entity in entities
+        ),
+        key=lambda entity: (entity["start"], -entity["end"]),
+    )
+    merged = []
+    for entity in shifted:
+        previous = merged[-1] if merged else None
+        if (
+            previous is not None
+            and previous["entity_group"] == entity["entity_group"]
+            and entity["start"] < previous["end"]
+        ):
+            if entity["end"] > previous["end"]:
+                previous["end"] = entity["end"]
+                previous["word"] = text[previous["start"] : previous["end"]].strip()
+            previous["score"] = max(previous["score"], entity["score"])
+        else:
+            merged.append(entity)
+    return merged
+
+
+def get_named_entities_chunked(
+    token_classifier,
+    texts: list[str],
+    window_size: int = 256,
+    stride: int = 32,
+    batch_size: int = 8,
+) -> list[list[dict]]:
+    """
+    Returns named entities of many texts, running windows of all of them through the
+    pipeline in one batched call.
+
+    Args:
+        token_classifier: Token classification pipeline with fast tokenizer.
+        texts (list[str]): Texts to find named entities in.
+        window_size (int, optional): Maximal number of tokens in a window.
+        Defaults to 256.
+        stride (int, optional): Number of tokens shared by consecutive windows.
+        Defaults to 32.
+        batch_size (int, optional): Number of windows in a pipeline batch.
+        Defaults to 8.
+
+    Returns:
+        list[list[dict]]: Named entities of every text.
+    """
+    windows = [
+        (i, start, end)
+        for i, text in enumerate(texts)
+        for start, end in split_into_windows(
+            token_classifier.tokenizer, text, window_size, stride
+        )
+    ]
+    if not windows:
+        return []
+    # sorting by length keeps padding within a batch small
+    order = sorted(range(len(windows)), key=lambda j: windows[j][2] - windows[j][1])
+    outputs = token_classifier(
+        [texts[windows[j][0]][windows[j][1] : windows[j][2]] for j in order],
+        batch_size=batch_size,
+    )
+    window_entities = [[] for _ in texts]
+    for j, entities in zip(order, outputs):
+        i, start, _ = windows[j]
+        window_entities[i].append((start, entities))
+    return [
+        merge_window_entities(text, sorted(text_windows, key=lambda w: w[0]))
+        for text, text_windows in zip(texts, window_entities)
+    ]
+
+
+def count_person_entities(list_of_named_entities: list[dict]) -> Counter:
+    """Returns number of mentions of every PER (person) named entity."""
+    return Counter(
+        ne["word"] for ne in list_of_named_entities if ne.get("entity_group") == "PER"
+    )
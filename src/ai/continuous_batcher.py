@@ -0,0 +1,142 @@
+"""
+Continuous batching of inference requests coming from many clients. Requests wait in
+a queue; whenever the model is free the oldest request is sent to it together with the
+queued requests closest to it in length, so that little compute is spent on padding.
+"""
+import asyncio
+import statistics
+import time
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Callable, NamedTuple
+
+
+class _Request(NamedTuple):
+    item: Any
+    length: int
+    future: asyncio.Future
+    enqueued_at: float
+
+
+class ContinuousBatcher:
+    """
+    Collects single items submitted by concurrent coroutines into batches for a
+    blocking batch function, run in an executor so that the event loop keeps accepting
+    requests while the model works.
+    """
+
+    def __init__(
+        self,
+        process_batch: Callable[[list], list],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 10,
+        length: Callable[[Any], int] = len,
+        executor: Executor | None = None,
+    ) -> None:
+        """
+        Args:
+            process_batch (Callable[[list], list]): Blocking function returning one
+            output per item of a batch.
+            max_batch_size (int, optional): Maximal number of items in a batch.
+            Defaults to 16.
+            max_wait_ms (float, optional): Time an idle batcher waits for more items
+            before running a batch that is not full. Defaults to 10.
+            length (Callable[[Any], int], optional): Function returning length of an
+            item. Defaults to `len`.
+            executor (Executor | None, optional): Executor to run `process_batch` in.
+            If None the default executor of the event loop. Defaults to None.
+        """
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.length = length
+        self.executor = executor
+        self.batches = 0
+        self.items = 0
+        self.last_batch_size = 0
+        self._latencies = deque(maxlen=1000)
+        self._pending: list[_Request] = []
+        self._has_pending = asyncio.Event()
+        self._task = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queues an item and returns its output once its batch has been processed."""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(
+            _Request(item, self.length(item), future, time.perf_counter())
+        )
+        self._has_pending.set()
+        return await future
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth, number of processed batches and items, mean and last batch
+        size and latency percentiles (in ms) of the last 1000 items.
+        """
+        latencies = sorted(self._latencies)
+        stats = {
+            "queue_depth": len(self._pending),
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0,
+            "last_batch_size": self.last_batch_size,
+        }
+        if latencies:
+            stats["latency_ms"] = {
+                "p50": statistics.median(latencies) * 1000,
+                "p95": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+                "max": latencies[-1] * 1000,
+            }
+        return stats
+
+    async def close(self) -> None:
+        """Stops the batching loop. Queued items are cancelled."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for request in self._pending:
+            request.future.cancel()
+        self._pending = []
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._has_pending.wait()
+            if len(self._pending) < self.max_batch_size:
+                # let requests arriving at about the same time join the batch
+                await asyncio.sleep(self.max_wait)
+            batch = self._take_batch()
+            if not self._pending:
+                self._has_pending.clear()
+            try:
+                outputs = await loop.run_in_executor(
+                    self.executor, self.process_batch, [r.item for r in batch]
+                )
+            except Exception as e:
+                for request in batch:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            now = time.perf_counter()
+            for request, output in zip(batch, outputs):
+                self._latencies.append(now - request.enqueued_at)
+                if not request.future.done():
+                    request.future.set_result(output)
+            self.batches += 1
+            self.items += len(batch)
+            self.last_batch_size = len(batch)
+
+    def _take_batch(self) -> list[_Request]:
+        # the oldest request is always served, joined by those closest to it in length
+        oldest, *rest = self._pending
+        rest.sort(key=lambda r: abs(r.length - oldest.length))
+        batch = [oldest] + rest[: self.max_batch_size - 1]
+        taken = {id(request) for request in batch}
+        self._pending = [r for r in self._pending if id(r) not in taken]
+        return batch
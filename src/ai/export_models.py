@@ -0,0 +1,73 @@
+"""
+Exports the models used by AI_Writer to ONNX, so that they can be run with ONNX Runtime
+by setting `ai.inference_backend` to "onnx" in config. Requires `optimum[onnxruntime]`.
+
+Usage:
+    python src/ai/export_models.py --output-dir models/onnx
+"""
+import argparse
+from pathlib import Path
+
+import repackage
+
+repackage.up()
+from ai.model_registry import (
+    CLASSIFICATION_MODEL,
+    EMBEDDING_MODEL,
+    NER_MODEL,
+    ONNX_DIR,
+    PARAPHRASE_MODEL,
+)
+from config.config import load_config
+from utilities.utils import CustomLogger
+
+# registry name: (model id, optimum class name)
+EXPORTS = {
+    "paraphrase": (PARAPHRASE_MODEL, "ORTModelForSeq2SeqLM"),
+    "ner": (NER_MODEL, "ORTModelForTokenClassification"),
+    "zero-shot": (CLASSIFICATION_MODEL, "ORTModelForSequenceClassification"),
+    "embedding": (EMBEDDING_MODEL, "ORTModelForFeatureExtraction"),
+}
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+def export_model(name: str, output_dir: Path) -> Path:
+    """
+    Exports a model and its tokenizer to `output_dir/name`.
+
+    Args:
+        name (str): Registry name of a model, one of `EXPORTS`.
+        output_dir (Path): Directory to export models to.
+
+    Returns:
+        Path: Directory with the exported model.
+    """
+    import optimum.onnxruntime
+    from transformers import AutoTokenizer
+
+    model_id, class_name = EXPORTS[name]
+    model_class = getattr(optimum.onnxruntime, class_name)
+    path = output_dir.joinpath(name)
+    model_class.from_pretrained(model_id, export=True).save_pretrained(path)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(path)
+    logger.info(f"Model `{model_id}` exported to {path}")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--output-dir",
+        type=Path,
+        default=Path(config.get("ai", {}).get("onnx_dir", ONNX_DIR)),
+    )
+    parser.add_argument("--models", nargs="+", choices=EXPORTS, default=list(EXPORTS))
+    args = parser.parse_args()
+    for name in args.models:
+        export_model(name, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
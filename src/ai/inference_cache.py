@@ -0,0 +1,191 @@
+"""
+Content-addressed on-disk cache of model outputs. Entries are keyed by a hash of model
+id, inference parameters and input text, stored in SQLite and evicted in LRU order once
+the cache grows over its size limit.
+"""
+import hashlib
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+import repackage
+
+repackage.up()
+from config.config import load_config
+from utilities.sqlite_store import SqliteStore
+from utilities.utils import CustomLogger
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+class InferenceCache(SqliteStore):
+    """
+    Size-bounded LRU cache of JSON-serializable model outputs in a SQLite file.
+
+    Entries are grouped in namespaces (e.g. "paraphrase", "ner", "topic") which are
+    only used for hit/miss counters; keys are already unique across models.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, "
+        "namespace TEXT, value TEXT, size INTEGER, last_access REAL)",
+        "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)",
+    )
+
+    def __init__(
+        self, path: str | Path, max_size_mb: float = 512, enabled: bool = True
+    ) -> None:
+        super().__init__(path)
+        self.path = Path(path)
+        self.max_size_bytes = int(max_size_mb * 1024**2)
+        self.enabled = enabled
+        self.counters: dict[str, dict[str, int]] = {}
+        self._size_bytes = None
+
+    @staticmethod
+    def make_key(model_id: str, params: dict, text: str) -> str:
+        """
+        Returns content address of a model output.
+
+        Args:
+            model_id (str): Model name, e.g. "tuner007/pegasus_paraphrase".
+            params (dict): Inference parameters that change the output.
+            text (str): Input text.
+
+        Returns:
+            str: SHA-256 hex digest.
+        """
+        payload = json.dumps([model_id, params, text], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, namespace: str, key: str) -> Any | None:
+        """Returns cached value or None if `key` is not cached."""
+        return self.get_many(namespace, [key]).get(key)
+
+    def get_many(self, namespace: str, keys: list[str]) -> dict[str, Any]:
+        """
+        Looks up many keys at once.
+
+        Args:
+            namespace (str): Namespace for hit/miss counters.
+            keys (list[str]): Keys to look up.
+
+        Returns:
+            dict[str, Any]: Cached values of the keys that were found.
+        """
+        if not self.enabled or not keys:
+            return {}
+        found = {}
+        with self._lock:
+            connection = self._connect()
+            unique_keys = list(dict.fromkeys(keys))
+            for i in range(0, len(unique_keys), 500):
+                chunk = unique_keys[i : i + 500]
+                rows = connection.execute(
+                    f"SELECT key, value FROM entries WHERE key IN "
+                    f"({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update((key, json.loads(value)) for key, value in rows)
+            if found:
+                connection.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(time.time(), key) for key in found],
+                )
+                connection.commit()
+            counters = self.counters.setdefault(namespace, {"hits": 0, "misses": 0})
+            hits = sum(key in found for key in keys)
+            counters["hits"] += hits
+            counters["misses"] += len(keys) - hits
+        return found
+
+    def set(self, namespace: str, key: str, value: Any) -> None:
+        """Stores a JSON-serializable value under `key`."""
+        self.set_many(namespace, {key: value})
+
+    def set_many(self, namespace: str, items: dict[str, Any]) -> None:
+        """
+        Stores many values at once and evicts least recently used entries if the cache
+        grew over its size limit.
+
+        Args:
+            namespace (str): Namespace the entries belong to.
+            items (dict[str, Any]): Keys and JSON-serializable values.
+        """
+        if not self.enabled or not items:
+            return
+        now = time.time()
+        # numpy scalars (e.g. pipeline scores) are stored as plain floats
+        values = {key: json.dumps(value, default=float) for key, value in items.items()}
+        with self._lock:
+            connection = self._connect()
+            for key in values:
+                row = connection.execute(
+                    "SELECT size FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    self._size_bytes -= row[0]
+            connection.executemany(
+                "INSERT OR REPLACE INTO entries "
+                "(key, namespace, value, size, last_access) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, namespace, value, len(value), now)
+                    for key, value in values.items()
+                ],
+            )
+            self._size_bytes += sum(len(value) for value in values.values())
+            self._evict(connection)
+            connection.commit()
+
+    def stats(self) -> dict[str, dict[str, int]]:
+        """Returns hit/miss counters per namespace and number of entries in cache."""
+        with self._lock:
+            stats = {namespace: dict(c) for namespace, c in self.counters.items()}
+            if self.enabled:
+                connection = self._connect()
+                for namespace, entries in connection.execute(
+                    "SELECT namespace, COUNT(*) FROM entries GROUP BY namespace"
+                ):
+                    stats.setdefault(namespace, {"hits": 0, "misses": 0})
+                    stats[namespace]["entries"] = entries
+            return stats
+
+    def clear(self) -> None:
+        """Removes all entries and resets counters."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM entries")
+            connection.commit()
+            self._size_bytes = 0
+            self.counters = {}
+
+    def _on_connect(self, connection: sqlite3.Connection) -> None:
+        self._size_bytes = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        if self._size_bytes <= self.max_size_bytes:
+            return
+        to_free = self._size_bytes - self.max_size_bytes
+        keys = []
+        for key, size in connection.execute(
+            "SELECT key, size FROM entries ORDER BY last_access"
+        ):
+            if to_free <= 0:
+                break
+            keys.append((key,))
+            to_free -= size
+            self._size_bytes -= size
+        connection.executemany("DELETE FROM entries WHERE key = ?", keys)
+        logger.info(f"{len(keys)} entries evicted from inference cache")
+
+
+cache = InferenceCache(
+    path=config.get("ai", {}).get("cache_path", ".cache/inference.sqlite"),
+    max_size_mb=config.get("ai", {}).get("cache_max_size_mb", 512),
+    enabled=config.get("ai", {}).get("cache_enabled", True),
+)
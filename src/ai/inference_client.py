@@ -0,0 +1,70 @@
+"""
+Client of the local inference service (`inference_server.py`).
+"""
+import requests
+
+_clients = {}
+
+
+class InferenceClient:
+    """Synchronous client keeping one pooled HTTP session to the inference service."""
+
+    def __init__(self, url: str, timeout: float | None = 600) -> None:
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.session = requests.Session()
+
+    def rewrite(
+        self,
+        sentences: list[str],
+        profile: str | None = None,
+        num_beams: int | None = None,
+        num_return_sequences: int | None = None,
+    ) -> list[str]:
+        """Returns paraphrased sentences in the order of `sentences`."""
+        if not sentences:
+            return []
+        payload = {"sentences": sentences}
+        for key, value in [
+            ("profile", profile),
+            ("num_beams", num_beams),
+            ("num_return_sequences", num_return_sequences),
+        ]:
+            if value is not None:
+                payload[key] = value
+        return self._post("rewrite", payload)["sentences"]
+
+    def get_named_entities(self, articles: list[str]) -> list[list[dict]]:
+        """Returns named entities of every article."""
+        if not articles:
+            return []
+        return self._post("ner", {"articles": articles})["entities"]
+
+    def classify(
+        self, articles: list[str], candidate_labels: list[str] | None = None
+    ) -> list[str]:
+        """Returns topic of every article."""
+        if not articles:
+            return []
+        payload = {"articles": articles, "candidate_labels": candidate_labels}
+        return self._post("classify", payload)["topics"]
+
+    def stats(self) -> dict:
+        """Returns batcher, cache and model statistics of the service."""
+        response = self.session.get(f"{self.url}/stats", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def _post(self, endpoint: str, payload: dict) -> dict:
+        response = self.session.post(
+            f"{self.url}/{endpoint}", json=payload, timeout=self.timeout
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+def get_inference_client(url: str) -> InferenceClient:
+    """Returns a shared client of the inference service at `url`."""
+    if url not in _clients:
+        _clients[url] = InferenceClient(url)
+    return _clients[url]
@@ -0,0 +1,177 @@
+"""
+Long-lived local inference service. Keeps the models loaded between runs and serves
+rewrite, NER and classification jobs of many clients over HTTP, continuously batching
+sentences (and articles) of different requests together by length.
+
+Usage:
+    python src/ai/inference_server.py --port 8765
+"""
+import argparse
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+
+import repackage
+from aiohttp import web
+
+repackage.up()
+from ai.ai_writer import AI_Writer
+from ai.continuous_batcher import ContinuousBatcher
+from ai.model_registry import get_pipeline_models, registry
+from ai.paraphraser import DEFAULT_PROFILE, get_generate_kwargs, paraphrase_sentences
+from ai.topic_classifier import CLASSIFIER_BACKENDS, DEFAULT_LABELS, get_topic_classifier
+from config.config import load_config
+from utilities.utils import CustomLogger
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+class InferenceServer:
+    """
+    HTTP front of the models. Every kind of job (and every set of decoding parameters
+    of rewrite jobs) gets its own batcher; all batchers share one model thread, so
+    batches never compete for CPU cores.
+    """
+
+    def __init__(self, max_batch_size: int = 16, max_wait_ms: float = 10) -> None:
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batchers: dict[str, ContinuousBatcher] = {}
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    def create_app(self) -> web.Application:
+        """Returns aiohttp application with the service routes."""
+        app = web.Application()
+        app.add_routes(
+            [
+                web.post("/rewrite", self.rewrite),
+                web.post("/ner", self.ner),
+                web.post("/classify", self.classify),
+                web.get("/stats", self.stats),
+            ]
+        )
+        app.on_cleanup.append(self._close)
+        return app
+
+    async def rewrite(self, request: web.Request) -> web.Response:
+        """
+        Paraphrases sentences. Expects JSON with `sentences` and optional `profile`,
+        `num_beams` and `num_return_sequences`; returns JSON with `sentences`.
+        """
+        data = await request.json()
+        kwargs = {
+            "profile": data.get("profile", DEFAULT_PROFILE),
+            "num_beams": data.get("num_beams"),
+            "num_return_sequences": data.get("num_return_sequences"),
+        }
+        try:
+            generate_kwargs = get_generate_kwargs(**kwargs)
+        except ValueError as e:
+            raise web.HTTPBadRequest(reason=str(e))
+        # only sentences decoded with the same parameters can share a batch
+        name = f"rewrite:{json.dumps(generate_kwargs, sort_keys=True)}"
+        if name not in self.batchers:
+            self.batchers[name] = self._create_batcher(
+                lambda sentences: paraphrase_sentences(
+                    sentences, batch_size=len(sentences), **kwargs
+                ),
+                # words are a cheap stand-in for tokens
+                length=lambda sentence: len(sentence.split()),
+            )
+        sentences = await asyncio.gather(
+            *(self.batchers[name].submit(s) for s in data["sentences"])
+        )
+        return web.json_response({"sentences": sentences})
+
+    async def ner(self, request: web.Request) -> web.Response:
+        """
+        Finds named entities. Expects JSON with `articles`; returns JSON with
+        `entities`, a list of named entities per article.
+        """
+        data = await request.json()
+        if "ner" not in self.batchers:
+            self.batchers["ner"] = self._create_batcher(
+                AI_Writer.get_named_entities_batch
+            )
+        entities = await asyncio.gather(
+            *(self.batchers["ner"].submit(a) for a in data["articles"])
+        )
+        # scores of entities not taken from the cache are numpy floats
+        return web.json_response(
+            {"entities": entities}, dumps=partial(json.dumps, default=float)
+        )
+
+    async def classify(self, request: web.Request) -> web.Response:
+        """
+        Classifies articles to topics. Expects JSON with `articles` and optional
+        `candidate_labels`; returns JSON with `topics`.
+        """
+        data = await request.json()
+        candidate_labels = data.get("candidate_labels")
+        name = f"classify:{json.dumps(candidate_labels)}"
+        if name not in self.batchers:
+            self.batchers[name] = self._create_batcher(
+                lambda articles: AI_Writer.classify_articles_to_topics(
+                    articles, candidate_labels, batch_size=len(articles)
+                )
+            )
+        topics = await asyncio.gather(
+            *(self.batchers[name].submit(a) for a in data["articles"])
+        )
+        return web.json_response({"topics": topics})
+
+    async def stats(self, request: web.Request) -> web.Response:
+        """Returns batcher statistics, inference cache counters and model stats."""
+        return web.json_response(
+            {
+                "batchers": {
+                    name: batcher.stats() for name, batcher in self.batchers.items()
+                },
+                **AI_Writer.get_inference_stats(),
+            }
+        )
+
+    def _create_batcher(self, process_batch, length=len) -> ContinuousBatcher:
+        return ContinuousBatcher(
+            process_batch,
+            max_batch_size=self.max_batch_size,
+            max_wait_ms=self.max_wait_ms,
+            length=length,
+            executor=self.executor,
+        )
+
+    async def _close(self, app: web.Application) -> None:
+        for batcher in self.batchers.values():
+            await batcher.close()
+        self.executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--host", default=config.get("ai", {}).get("server_host", DEFAULT_HOST)
+    )
+    parser.add_argument(
+        "--port", type=int, default=config.get("ai", {}).get("server_port", DEFAULT_PORT)
+    )
+    parser.add_argument("--max-batch-size", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=10)
+    args = parser.parse_args()
+    # keep the models warm from the start instead of loading them on the first job
+    for name in get_pipeline_models():
+        registry.get(name)
+        if name in CLASSIFIER_BACKENDS:
+            get_topic_classifier(name, candidate_labels=DEFAULT_LABELS)
+    server = InferenceServer(args.max_batch_size, args.max_wait_ms)
+    logger.info(f"Inference server listening on http://{args.host}:{args.port}")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,336 @@
+"""
+Process-wide registry of the transformer models used by AI_Writer. Models are loaded
+lazily on first use, shared by every AI_Writer instance in the process and evicted in
+LRU order once the configured memory budget is exceeded.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable
+
+import repackage
+
+repackage.up()
+from config.config import load_config
+from utilities.utils import CustomLogger
+
+PARAPHRASE_MODEL = "tuner007/pegasus_paraphrase"
+NER_MODEL = "Jean-Baptiste/camembert-ner"
+CLASSIFICATION_MODEL = "facebook/bart-large-mnli"
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+# "torch": fp32 PyTorch, "int8": PyTorch with dynamically quantized Linear layers,
+# "onnx": ONNX Runtime with models exported by `export_models.py`
+INFERENCE_BACKENDS = ["torch", "int8", "onnx"]
+ONNX_DIR = "models/onnx"
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+class ModelRegistry:
+    """
+    Thread-safe, lazily populated registry of models.
+
+    Every model is registered under a name together with a loader (a callable with no
+    arguments returning the model object). The loader is called on the first `get`
+    only; subsequent calls return the same object. If `memory_budget_mb` is set, least
+    recently used models are evicted after a load pushes the total size over budget.
+    """
+
+    def __init__(
+        self, memory_budget_mb: float | None = None, backend: str = "torch"
+    ) -> None:
+        self.memory_budget_mb = memory_budget_mb
+        self.backend = backend
+        self._loaders: dict[str, Callable[[], Any]] = {}
+        self._models: OrderedDict[str, Any] = OrderedDict()
+        self._stats: dict[str, dict] = {}
+        self._lock = threading.RLock()
+        self._load_locks: dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any]) -> None:
+        """
+        Registers a loader for a model. Re-registering a name drops the loaded model.
+
+        Args:
+            name (str): Name the model is looked up by.
+            loader (Callable[[], Any]): Function loading and returning the model.
+        """
+        with self._lock:
+            self._loaders[name] = loader
+            self._load_locks.setdefault(name, threading.Lock())
+            self._models.pop(name, None)
+
+    def get(self, name: str) -> Any:
+        """
+        Returns a model, loading it first if it is not resident.
+
+        Args:
+            name (str): Registered model name.
+
+        Raises:
+            KeyError: If no loader is registered under `name`.
+
+        Returns:
+            Any: Loaded model.
+        """
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Model `{name}` is not registered")
+            if name in self._models:
+                self._models.move_to_end(name)
+                self._stats[name]["hits"] += 1
+                return self._models[name]
+            load_lock = self._load_locks[name]
+        # load outside of the registry lock so that other models stay available
+        with load_lock:
+            with self._lock:
+                if name in self._models:
+                    self._models.move_to_end(name)
+                    self._stats[name]["hits"] += 1
+                    return self._models[name]
+            rss_before = current_rss_mb()
+            start = time.perf_counter()
+            model = self._loaders[name]()
+            load_time = time.perf_counter() - start
+            rss_after = current_rss_mb()
+            with self._lock:
+                stats = self._stats.setdefault(
+                    name, {"loads": 0, "hits": 0, "evictions": 0}
+                )
+                stats["loads"] += 1
+                stats["load_time"] = load_time
+                stats["size_mb"] = estimate_size_mb(model)
+                stats["rss_delta_mb"] = (
+                    rss_after - rss_before
+                    if rss_before is not None and rss_after is not None
+                    else None
+                )
+                self._models[name] = model
+                logger.info(
+                    f"Model `{name}` loaded in {load_time:.1f} s "
+                    f"({stats['size_mb']:.0f} MB)"
+                )
+                self._evict_over_budget(keep=name)
+            return model
+
+    def evict(self, name: str) -> None:
+        """Drops a loaded model from the registry (the loader stays registered)."""
+        with self._lock:
+            if self._models.pop(name, None) is not None:
+                self._stats[name]["evictions"] += 1
+                logger.info(f"Model `{name}` evicted")
+
+    def clear(self) -> None:
+        """Drops all loaded models."""
+        with self._lock:
+            for name in list(self._models):
+                self.evict(name)
+
+    def resident_size_mb(self) -> float:
+        """Returns the total size of the loaded models in MB."""
+        with self._lock:
+            return sum(self._stats[name]["size_mb"] for name in self._models)
+
+    def report(self) -> dict[str, dict]:
+        """
+        Returns per-model statistics: number of loads, hits and evictions, last load
+        time in seconds, size of weights in MB, RSS growth during the load in MB and
+        whether the model is currently resident.
+        """
+        with self._lock:
+            return {
+                name: {**stats, "resident": name in self._models}
+                for name, stats in self._stats.items()
+            }
+
+    def _evict_over_budget(self, keep: str) -> None:
+        if self.memory_budget_mb is None:
+            return
+        for name in list(self._models):
+            if self.resident_size_mb() <= self.memory_budget_mb:
+                break
+            if name != keep:
+                self.evict(name)
+        if self.resident_size_mb() > self.memory_budget_mb:
+            logger.warning(
+                f"Model `{keep}` alone exceeds memory budget of "
+                f"{self.memory_budget_mb} MB"
+            )
+
+
+def estimate_size_mb(model: Any) -> float:
+    """
+    Returns the size in MB of parameters and buffers of a torch model, a pipeline
+    (its `model`) or a tuple of those. Objects without weights count as 0.
+    """
+    if isinstance(model, (tuple, list)):
+        return sum(estimate_size_mb(element) for element in model)
+    if hasattr(model, "model") and not hasattr(model, "parameters"):
+        model = model.model
+    if not hasattr(model, "parameters"):
+        return 0.0
+    size = sum(p.numel() * p.element_size() for p in model.parameters())
+    size += sum(b.numel() * b.element_size() for b in model.buffers())
+    return size / 1024**2
+
+
+def current_rss_mb() -> float | None:
+    """Returns resident set size of the current process in MB (Linux only)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+    except (OSError, IndexError, ValueError):
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024**2
+
+
+def load_paraphraser(backend: str = "torch") -> tuple:
+    """Loads Pegasus paraphrasing model and its tokenizer."""
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSeq2SeqLM
+        from transformers import AutoTokenizer
+
+        path = get_onnx_path("paraphrase")
+        model = ORTModelForSeq2SeqLM.from_pretrained(path)
+        return model, AutoTokenizer.from_pretrained(path)
+    from transformers import PegasusForConditionalGeneration, PegasusTokenizerFast
+
+    model = PegasusForConditionalGeneration.from_pretrained(PARAPHRASE_MODEL)
+    tokenizer = PegasusTokenizerFast.from_pretrained(PARAPHRASE_MODEL)
+    return quantize(model, backend), tokenizer
+
+
+def load_ner_pipeline(backend: str = "torch"):
+    """Loads token classification pipeline for named entity recognition."""
+    from transformers import AutoTokenizer, pipeline
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForTokenClassification
+
+        path = get_onnx_path("ner")
+        return pipeline(
+            task="token-classification",
+            model=ORTModelForTokenClassification.from_pretrained(path),
+            tokenizer=AutoTokenizer.from_pretrained(path),
+            aggregation_strategy="simple",
+        )
+    ner_pipeline = pipeline(model=NER_MODEL, aggregation_strategy="simple")
+    ner_pipeline.model = quantize(ner_pipeline.model, backend)
+    return ner_pipeline
+
+
+def load_zero_shot_pipeline(backend: str = "torch"):
+    """Loads zero-shot classification pipeline."""
+    from transformers import AutoTokenizer, pipeline
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+
+        path = get_onnx_path("zero-shot")
+        return pipeline(
+            task="zero-shot-classification",
+            model=ORTModelForSequenceClassification.from_pretrained(path),
+            tokenizer=AutoTokenizer.from_pretrained(path),
+        )
+    zero_shot_pipeline = pipeline(
+        task="zero-shot-classification", model=CLASSIFICATION_MODEL
+    )
+    zero_shot_pipeline.model = quantize(zero_shot_pipeline.model, backend)
+    return zero_shot_pipeline
+
+
+def load_embedding_model(backend: str = "torch") -> tuple:
+    """Loads sentence embedding model and its tokenizer."""
+    from transformers import AutoModel, AutoTokenizer
+
+    if backend == "onnx":
+        from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+        path = get_onnx_path("embedding")
+        model = ORTModelForFeatureExtraction.from_pretrained(path)
+        return model, AutoTokenizer.from_pretrained(path)
+    model = AutoModel.from_pretrained(EMBEDDING_MODEL)
+    tokenizer = AutoTokenizer.from_pretrained(EMBEDDING_MODEL)
+    return quantize(model.eval(), backend), tokenizer
+
+
+def quantize(model, backend: str):
+    """
+    Returns a copy of a torch model with `Linear` layers dynamically quantized to int8
+    if `backend` is "int8", the model itself otherwise.
+    """
+    if backend != "int8":
+        return model
+    import torch
+
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def get_onnx_path(name: str) -> Path:
+    """
+    Returns directory of a model exported with `export_models.py`.
+
+    Raises:
+        FileNotFoundError: If the model has not been exported.
+    """
+    path = Path(config.get("ai", {}).get("onnx_dir", ONNX_DIR)).joinpath(name)
+    if not path.is_dir():
+        raise FileNotFoundError(
+            f"ONNX model `{name}` not found in {path.parent}, "
+            "run `python src/ai/export_models.py` first"
+        )
+    return path
+
+
+def register_models(backend: str | None = None) -> None:
+    """
+    Registers loaders of all models for an inference backend, dropping models loaded
+    with another backend.
+
+    Args:
+        backend (str | None, optional): One of `INFERENCE_BACKENDS`. If None taken from
+        config. Defaults to None.
+
+    Raises:
+        ValueError: If `backend` is not one of `INFERENCE_BACKENDS`.
+    """
+    if backend is None:
+        backend = config.get("ai", {}).get("inference_backend", "torch")
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"backend must be one of {INFERENCE_BACKENDS}")
+    registry.backend = backend
+    registry.register("paraphrase", partial(load_paraphraser, backend))
+    registry.register("ner", partial(load_ner_pipeline, backend))
+    registry.register("zero-shot", partial(load_zero_shot_pipeline, backend))
+    registry.register("embedding", partial(load_embedding_model, backend))
+
+
+def get_pipeline_models() -> list[str]:
+    """
+    Returns names of the models AI_Writer runs with the current config: paraphraser,
+    NER and the configured topic classifier backend.
+    """
+    # topic classifier backends are registered under their own names
+    return ["paraphrase", "ner", config.get("ai", {}).get("topic_backend", "zero-shot")]
+
+
+def cache_model_id(model_id: str) -> str:
+    """
+    Returns model id to use in inference cache keys. Outputs of the non-default
+    backends differ slightly, so they are cached separately.
+    """
+    if registry.backend == "torch":
+        return model_id
+    return f"{model_id}@{registry.backend}"
+
+
+registry = ModelRegistry(
+    memory_budget_mb=config.get("ai", {}).get("memory_budget_mb"),
+)
+register_models()
@@ -0,0 +1,141 @@
+"""
+Sentence paraphrasing with Pegasus. Sentences are either paraphrased one by one or
+bucketed by token length and sent through `generate` in padded batches.
+"""
+import repackage
+
+repackage.up()
+from ai.inference_cache import cache
+from ai.model_registry import PARAPHRASE_MODEL, cache_model_id, registry
+
+# Named sets of `generate` arguments, from the slowest/best to the fastest
+DECODING_PROFILES = {
+    # 10 beams, 10 returned sequences, only the best one is kept
+    "quality": {"num_beams": 10, "num_return_sequences": 10},
+    # fewer beams, only the best sequence computed, output length capped
+    "balanced": {
+        "num_beams": 4,
+        "num_return_sequences": 1,
+        "max_new_tokens": 64,
+        "early_stopping": True,
+    },
+    # greedy decoding, stops as soon as every sentence in a batch hits EOS
+    "fast": {
+        "num_beams": 1,
+        "num_return_sequences": 1,
+        "do_sample": False,
+        "max_new_tokens": 64,
+    },
+}
+DEFAULT_PROFILE = "quality"
+
+
+def paraphrase_sentences(
+    sentences: list[str],
+    batch_size: int | None = None,
+    num_beams: int | None = None,
+    num_return_sequences: int | None = None,
+    profile: str = DEFAULT_PROFILE,
+) -> list[str]:
+    """
+    Paraphrases a list of sentences, keeping only the best sequence for each.
+
+    Args:
+        sentences (list[str]): Sentences to paraphrase.
+        batch_size (int | None, optional): Number of sentences per `generate` call. If
+        None or 1 every sentence is paraphrased separately. Defaults to None.
+        num_beams (int | None, optional): Number of beams for beam search. If None
+        taken from `profile`. Defaults to None.
+        num_return_sequences (int | None, optional): Number of sequences generated per
+        sentence. If None taken from `profile`. Defaults to None.
+        profile (str, optional): Name of decoding profile from `DECODING_PROFILES`.
+        Defaults to "quality".
+
+    Returns:
+        list[str]: Paraphrased sentences in the order of `sentences`.
+    """
+    if not sentences:
+        return []
+    generate_kwargs = get_generate_kwargs(profile, num_beams, num_return_sequences)
+    # boilerplate sentences repeat across articles, so look them up in cache first
+    model_id = cache_model_id(PARAPHRASE_MODEL)
+    keys = [cache.make_key(model_id, generate_kwargs, s) for s in sentences]
+    cached = cache.get_many("paraphrase", keys)
+    missing = {key: s for key, s in zip(keys, sentences) if key not in cached}
+    outputs = _paraphrase_uncached(list(missing.values()), batch_size, generate_kwargs)
+    computed = dict(zip(missing, outputs))
+    cache.set_many("paraphrase", computed)
+    return [cached[key] if key in cached else computed[key] for key in keys]
+
+
+def _paraphrase_uncached(
+    sentences: list[str], batch_size: int | None, generate_kwargs: dict
+) -> list[str]:
+    if not sentences:
+        return []
+    if batch_size is None or batch_size <= 1:
+        return [_generate([sentence], generate_kwargs)[0] for sentence in sentences]
+    rewritten_sentences = [None] * len(sentences)
+    for batch in bucket_by_length(sentences, batch_size):
+        outputs = _generate([sentences[i] for i in batch], generate_kwargs)
+        for i, output in zip(batch, outputs):
+            rewritten_sentences[i] = output
+    return rewritten_sentences
+
+
+def get_generate_kwargs(
+    profile: str = DEFAULT_PROFILE,
+    num_beams: int | None = None,
+    num_return_sequences: int | None = None,
+) -> dict:
+    """
+    Returns `generate` arguments of a decoding profile with `num_beams` and
+    `num_return_sequences` overridden if given.
+
+    Raises:
+        ValueError: If `profile` is not one of `DECODING_PROFILES`.
+    """
+    if profile not in DECODING_PROFILES:
+        raise ValueError(f"profile must be one of {list(DECODING_PROFILES)}")
+    generate_kwargs = dict(DECODING_PROFILES[profile])
+    if num_beams is not None:
+        generate_kwargs["num_beams"] = num_beams
+    if num_return_sequences is not None:
+        generate_kwargs["num_return_sequences"] = num_return_sequences
+    # `generate` cannot return more sequences than it keeps beams
+    generate_kwargs["num_return_sequences"] = min(
+        generate_kwargs["num_return_sequences"], generate_kwargs["num_beams"]
+    )
+    return generate_kwargs
+
+
+def bucket_by_length(sentences: list[str], batch_size: int) -> list[list[int]]:
+    """
+    Splits sentence indices into batches of at most `batch_size` sentences of similar
+    token length, so that little compute is spent on padding.
+
+    Args:
+        sentences (list[str]): Sentences to bucket.
+        batch_size (int): Maximal number of sentences in a batch.
+
+    Returns:
+        list[list[int]]: Batches of indices into `sentences`.
+    """
+    _, tokenizer = registry.get("paraphrase")
+    lengths = [len(ids) for ids in tokenizer(sentences, truncation=True)["input_ids"]]
+    order = sorted(range(len(sentences)), key=lengths.__getitem__)
+    return [order[i : i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def _generate(sentences: list[str], generate_kwargs: dict) -> list[str]:
+    """Runs one padded `generate` call and returns the first sequence per sentence."""
+    model, tokenizer = registry.get("paraphrase")
+    # tokenize the text to be form of a list of token IDs
+    inputs = tokenizer(sentences, truncation=True, padding="longest", return_tensors="pt")
+    # generate the paraphrased sentences
+    outputs = model.generate(**inputs, **generate_kwargs)
+    # decode the generated sentences using the tokenizer to get them back to text
+    decoded = tokenizer.batch_decode(outputs, skip_special_tokens=True)
+    # `generate` returns `num_return_sequences` consecutive sequences per sentence
+    step = generate_kwargs.get("num_return_sequences", 1)
+    return decoded[::step]
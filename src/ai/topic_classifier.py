@@ -0,0 +1,128 @@
+"""
+Topic classifier backends. "zero-shot" runs bart-large-mnli NLI over every
+(article, label) pair; "embedding" embeds an article once with a small sentence
+embedding model and picks the label whose precomputed embedding is the closest.
+"""
+import repackage
+
+repackage.up()
+from ai.model_registry import CLASSIFICATION_MODEL, EMBEDDING_MODEL, registry
+from config.config import load_config
+
+DEFAULT_LABELS = ["politics", "business", "economy"]
+
+config = load_config()
+
+
+class ZeroShotClassifier:
+    """Zero-shot classification with an NLI model; one forward pass per label."""
+
+    model_id = CLASSIFICATION_MODEL
+
+    def prepare(self, candidate_labels: list[str]) -> None:
+        """Loads the NLI model; labels are only known to it per forward pass."""
+        registry.get("zero-shot")
+
+    def classify(
+        self, articles: list[str], candidate_labels: list[str], batch_size: int = 8
+    ) -> list[str]:
+        """Returns the most probable label of every article."""
+        classifier = registry.get("zero-shot")
+        results = classifier(articles, candidate_labels, batch_size=batch_size)
+        topics = []
+        for result in results:
+            # return label where score is max
+            scores_list = result["scores"]
+            n_max = scores_list.index(max(scores_list))
+            topics.append(result["labels"][n_max])
+        return topics
+
+
+class EmbeddingClassifier:
+    """
+    Nearest-label classification in sentence embedding space; one forward pass per
+    article regardless of the number of labels.
+    """
+
+    model_id = EMBEDDING_MODEL
+    hypothesis_template = "This article is about {}."
+    max_length = 256
+
+    def __init__(self) -> None:
+        self._label_embeddings = {}
+
+    def prepare(self, candidate_labels: list[str]) -> None:
+        """Loads the embedding model and computes embeddings of the labels."""
+        self.get_label_embeddings(candidate_labels)
+
+    def classify(
+        self, articles: list[str], candidate_labels: list[str], batch_size: int = 8
+    ) -> list[str]:
+        """Returns the label closest to every article."""
+        label_embeddings = self.get_label_embeddings(candidate_labels)
+        topics = []
+        for i in range(0, len(articles), batch_size):
+            similarities = self.embed(articles[i : i + batch_size]) @ label_embeddings.T
+            topics.extend(candidate_labels[n] for n in similarities.argmax(dim=1))
+        return topics
+
+    def get_label_embeddings(self, candidate_labels: list[str]):
+        """Returns embeddings of labels, computing them on first use only."""
+        labels = tuple(candidate_labels)
+        if labels not in self._label_embeddings:
+            self._label_embeddings[labels] = self.embed(
+                [self.hypothesis_template.format(label) for label in labels]
+            )
+        return self._label_embeddings[labels]
+
+    def embed(self, texts: list[str]):
+        """Returns L2-normalized mean-pooled embeddings of texts."""
+        import torch
+
+        model, tokenizer = registry.get("embedding")
+        inputs = tokenizer(
+            texts,
+            truncation=True,
+            max_length=self.max_length,
+            padding="longest",
+            return_tensors="pt",
+        )
+        with torch.inference_mode():
+            token_embeddings = model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).type_as(token_embeddings)
+        embeddings = (token_embeddings * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1)
+        return torch.nn.functional.normalize(embeddings, dim=1)
+
+
+CLASSIFIER_BACKENDS = {
+    "zero-shot": ZeroShotClassifier,
+    "embedding": EmbeddingClassifier,
+}
+_classifiers = {}
+
+
+def get_topic_classifier(
+    backend: str | None = None, candidate_labels: list[str] | None = None
+):
+    """
+    Returns a shared classifier instance of a given backend.
+
+    Args:
+        backend (str | None, optional): One of `CLASSIFIER_BACKENDS`. If None taken
+        from config. Defaults to None.
+        candidate_labels (list[str] | None, optional): Labels to prepare the
+        classifier for (see `prepare` of the backends), so that their embeddings are
+        not computed on the first article. Defaults to None.
+
+    Raises:
+        ValueError: If `backend` is not one of `CLASSIFIER_BACKENDS`.
+    """
+    if backend is None:
+        backend = config.get("ai", {}).get("topic_backend", "zero-shot")
+    if backend not in CLASSIFIER_BACKENDS:
+        raise ValueError(f"backend must be one of {list(CLASSIFIER_BACKENDS)}")
+    if backend not in _classifiers:
+        _classifiers[backend] = CLASSIFIER_BACKENDS[backend]()
+    if candidate_labels is not None:
+        _classifiers[backend].prepare(candidate_labels)
+    return _classifiers[backend]
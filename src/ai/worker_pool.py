@@ -0,0 +1,197 @@
+"""
+Pool of inference worker processes. The parent process loads the models once and forks
+the workers, which share the weights copy-on-write; every worker runs torch with its
+share of the CPU cores as intra-op threads, so that the pool uses every core without
+oversubscribing them.
+"""
+import gc
+import multiprocessing
+import os
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import repackage
+
+repackage.up()
+from ai.model_registry import get_pipeline_models, registry
+from ai.topic_classifier import CLASSIFIER_BACKENDS, DEFAULT_LABELS, get_topic_classifier
+from utilities.utils import CustomLogger
+
+logger = CustomLogger(Path(__file__).name)
+
+
+class InferencePool:
+    """
+    Fork-based pool of inference workers.
+
+    Models listed in `models` are loaded in the parent before the workers are forked,
+    so a worker never loads weights itself and all workers together need little more
+    memory than one process. Use as a context manager or call `close` when done.
+    """
+
+    def __init__(
+        self,
+        workers: int | None = None,
+        threads_per_worker: int | None = None,
+        models: list[str] | None = None,
+    ) -> None:
+        """
+        Args:
+            workers (int | None, optional): Number of worker processes. If None equal
+            to number of available cores. Defaults to None.
+            threads_per_worker (int | None, optional): Number of torch intra-op
+            threads of a worker. If None available cores are split evenly between
+            workers. Defaults to None.
+            models (list[str] | None, optional): Registry names of models to load
+            before forking. If None paraphraser, NER and configured topic classifier
+            models are loaded. Defaults to None.
+        """
+        if workers is None:
+            workers = available_cpus()
+        if workers < 1:
+            raise ValueError("workers should be a positive integer")
+        if threads_per_worker is None:
+            threads_per_worker = get_threads_per_worker(workers)
+        if models is None:
+            models = get_pipeline_models()
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker
+        for name in models:
+            registry.get(name)
+            if name in CLASSIFIER_BACKENDS:
+                # label embeddings are computed once here and shared with the workers
+                get_topic_classifier(name, candidate_labels=DEFAULT_LABELS)
+        # forked tokenizers would otherwise deadlock on their own thread pool
+        os.environ["TOKENIZERS_PARALLELISM"] = "false"
+        # keep objects created so far out of garbage collection in the workers, so
+        # that collections do not write to (and copy) the shared pages
+        gc.freeze()
+        self._pool = multiprocessing.get_context("fork").Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(threads_per_worker,),
+        )
+        logger.info(
+            f"Inference pool started with {workers} worker(s), "
+            f"{threads_per_worker} thread(s) each"
+        )
+
+    def map(self, func: Callable, items: Iterable) -> list[Any]:
+        """
+        Applies a module-level function to every item in the workers.
+
+        Args:
+            func (Callable): Picklable function of one argument.
+            items (Iterable): Arguments.
+
+        Returns:
+            list[Any]: Results in the order of `items`.
+        """
+        return self._pool.map(func, items, chunksize=1)
+
+    def apply(self, func: Callable, item: Any) -> Any:
+        """
+        Applies a module-level function to one item in a worker and waits for the
+        result; many threads may call it at once to keep all workers busy.
+        """
+        return self._pool.apply(func, (item,))
+
+    def rewrite(self, ai_writers: list) -> None:
+        """
+        Rewrites headlines and articles of AI_Writer instances in the workers and sets
+        their `rewritten_headline` and `rewritten_article`.
+        """
+        results = self.map(
+            rewrite_headline_and_article,
+            [
+                (
+                    ai_writer.headline,
+                    ai_writer.article,
+                    ai_writer.batch_size,
+                    ai_writer.profile,
+                )
+                for ai_writer in ai_writers
+            ],
+        )
+        for ai_writer, (rewritten_headline, rewritten_article) in zip(
+            ai_writers, results
+        ):
+            ai_writer.rewritten_headline = rewritten_headline
+            ai_writer.rewritten_article = rewritten_article
+
+    def detect_topics(self, articles: list[str], mode: str = "local") -> list[dict]:
+        """
+        Runs `AI_Writer.detect_topics` over contiguous chunks of articles, one chunk
+        per worker, and returns results in the order of `articles`.
+        """
+        if not articles:
+            return []
+        chunk_size = -(-len(articles) // self.workers)
+        chunks = [
+            (articles[i : i + chunk_size], mode)
+            for i in range(0, len(articles), chunk_size)
+        ]
+        return [
+            result for results in self.map(detect_topics, chunks) for result in results
+        ]
+
+    def close(self) -> None:
+        """Waits for the workers to finish and stops them."""
+        self._pool.close()
+        self._pool.join()
+        gc.unfreeze()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def available_cpus() -> int:
+    """Returns number of CPU cores the process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def get_threads_per_worker(workers: int, cpus: int | None = None) -> int:
+    """Returns number of intra-op threads per worker splitting `cpus` cores evenly."""
+    if cpus is None:
+        cpus = available_cpus()
+    return max(1, cpus // workers)
+
+
+def _init_worker(threads: int) -> None:
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # inter-op pool was already started in the parent
+        pass
+
+
+def rewrite_headline_and_article(args: tuple) -> tuple[str, str]:
+    """
+    Worker task rewriting a (headline, article, batch_size, profile) tuple. Returns
+    rewritten headline and article.
+    """
+    # the path callers import it by, so that the parent's module is reused
+    from src.ai.ai_writer import AI_Writer
+
+    headline, article, batch_size, profile = args
+    ai_writer = AI_Writer(headline, article, batch_size=batch_size, profile=profile)
+    return ai_writer.rewrite_headline_and_article()
+
+
+def detect_topics(args: tuple) -> list[dict]:
+    """Worker task detecting topics of an (articles, mode) tuple."""
+    from src.ai.ai_writer import AI_Writer
+
+    articles, mode = args
+    return AI_Writer.detect_topics(articles, mode=mode)
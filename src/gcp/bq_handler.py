@@ -143,7 +143,7 @@ class BQ_Handler:
             NameError: If table_name is None
             NameError: If data_frame is None
         """
-        dataset_name = self.dataset if dataset_name is None else dataset_name
+        dataset_name = self.dataset_name if dataset_name is None else dataset_name
         if table_name is None:
             raise NameError("table_name cannot be None")
         if data_frame is None:
@@ -155,7 +155,7 @@ class BQ_Handler:
         job_config = bigquery.LoadJobConfig()
         job_config.write_disposition = "WRITE_APPEND"
 
-        client.load_table_from_data_frame(data_frame, table_ref, job_config=job_config)
+        client.load_table_from_dataframe(data_frame, table_ref, job_config=job_config)
 
         logging.info(f"Data appended to table {table_ref.table_id}.")
 
@@ -253,13 +253,13 @@ class BQ_Handler:
     def create_small_temp_table(self):
         """Creates a small temporary BQ table"""
         dataset_name = self.dataset_name
-        table_name = config["small_temp_table"]
+        table_name = config["gcp"]["small_temp_table"]
         self.create_table(dataset_name=dataset_name, table_name=table_name)
 
     def create_large_temp_table(self):
         """Creates a large temporary BQ table"""
         dataset_name = self.dataset_name
-        table_name = config["large_temp_table"]
+        table_name = config["gcp"]["large_temp_table"]
         self.create_table(dataset_name=dataset_name, table_name=table_name)
 
 
@@ -0,0 +1,225 @@
+import asyncio
+
+import aiohttp
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+from src.news.exception import NewsAPIException
+from src.news.key_pool import ENDPOINT_PRIORITIES, ApiKeyPool, load_api_key_pool
+from src.news.news_auth import get_auth_headers
+from src.news.news_handler import (
+    build_everything_payload,
+    build_sources_payload,
+    build_top_headlines_payload,
+)
+from src.news.response_cache import ResponseCache, response_cache
+
+config = load_config()
+
+
+class AsyncNewsHandler(object):
+    """
+    Asynchronous counterpart of `NewsHandler` running many queries concurrently.
+    Parameters are validated and payloads built by the same functions, and requests
+    go through the same response cache and API key pool as in `NewsHandler`. Use as
+    an async context manager:
+
+        async with AsyncNewsHandler() as news_handler:
+            results = await news_handler.gather_top_headlines(
+                [{"sources": "cnn"}, {"category": "business", "country": "us"}]
+            )
+    """
+
+    def __init__(
+        self,
+        api_key: str | None = None,
+        concurrency: int | None = None,
+        session: aiohttp.ClientSession | None = None,
+        cache: ResponseCache | None = None,
+        key_pool: ApiKeyPool | None = None,
+    ):
+        """
+        Init function of class AsyncNewsHandler.
+
+        Args:
+            api_key (str | None, optional): API key. If None (and `key_pool` is None)
+            keys are rotated in a pool created with `load_api_key_pool`.
+            Defaults to None.
+            concurrency (int | None, optional): Maximal number of requests in flight.
+            If None taken from config (`newsapi.concurrency`). Defaults to None.
+            session (aiohttp.ClientSession | None, optional): Session. If None one is
+            created on entering the context manager. Defaults to None.
+            cache (ResponseCache | None, optional): Response cache. If None the shared
+            on-disk cache configured in `newsapi` section of config. Defaults to None.
+            key_pool (ApiKeyPool | None, optional): Pool of API keys to rotate. Takes
+            precedence over `api_key`. Defaults to None.
+        """
+        if api_key is None and key_pool is None:
+            key_pool = load_api_key_pool()
+        if concurrency is None:
+            concurrency = config["newsapi"].get("concurrency", 5)
+        if cache is None:
+            cache = response_cache
+        self.api_key = api_key
+        self.key_pool = key_pool
+        self.cache = cache
+        self.concurrency = concurrency
+        self.session = session
+        self._owns_session = session is None
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    async def __aenter__(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency),
+                timeout=aiohttp.ClientTimeout(
+                    sock_connect=config["newsapi"].get("connect_timeout", 3.05),
+                    sock_read=config["newsapi"].get("read_timeout", 30),
+                ),
+            )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self._owns_session and self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def get_top_headlines(self, **kwargs) -> dict:
+        """
+        Calls the `/top-headlines` endpoint. Takes the same keyword arguments as
+        `NewsHandler.get_top_headlines` and returns JSON response as a dictionary.
+        """
+        payload = build_top_headlines_payload(**kwargs)
+        return await self._send(config["newsapi"]["top_headlines_url"], payload)
+
+    async def get_everything(self, **kwargs) -> dict:
+        """
+        Calls the `/everything` endpoint. Takes the same keyword arguments as
+        `NewsHandler.get_everything` and returns JSON response as a dictionary.
+        """
+        payload = build_everything_payload(**kwargs)
+        return await self._send(config["newsapi"]["everything_url"], payload)
+
+    async def get_sources(self, **kwargs) -> dict:
+        """
+        Calls the `/sources` endpoint. Takes the same keyword arguments as
+        `NewsHandler.get_sources` and returns JSON response as a dictionary.
+        """
+        payload = build_sources_payload(**kwargs)
+        return await self._send(config["newsapi"]["sources_url"], payload)
+
+    async def gather_top_headlines(self, queries: list[dict]) -> list[tuple]:
+        """
+        Runs many `/top-headlines` queries (e.g. for several sources, categories or
+        countries) concurrently.
+
+        Args:
+            queries (list[dict]): Keyword arguments of `get_top_headlines`.
+
+        Returns:
+            list[tuple]: Merged (url, title, content) tuples without duplicate URLs.
+        """
+        responses = await asyncio.gather(
+            *(self.get_top_headlines(**query) for query in queries)
+        )
+        return merge_results(responses)
+
+    async def gather_everything(self, queries: list[dict]) -> list[tuple]:
+        """
+        Runs many `/everything` queries concurrently.
+
+        Args:
+            queries (list[dict]): Keyword arguments of `get_everything`.
+
+        Returns:
+            list[tuple]: Merged (url, title, content) tuples without duplicate URLs.
+        """
+        responses = await asyncio.gather(
+            *(self.get_everything(**query) for query in queries)
+        )
+        return merge_results(responses)
+
+    async def get_everything_pages(self, pages: int, **kwargs) -> list[tuple]:
+        """
+        Fetches pages 1 to `pages` of an `/everything` query concurrently.
+
+        Args:
+            pages (int): Number of pages to fetch.
+            **kwargs: Keyword arguments of `get_everything` other than `page`.
+
+        Returns:
+            list[tuple]: Merged (url, title, content) tuples without duplicate URLs.
+        """
+        return await self.gather_everything(
+            [{**kwargs, "page": page} for page in range(1, pages + 1)]
+        )
+
+    async def _send(self, url: str, payload: dict) -> dict:
+        """
+        Returns response of an endpoint from cache or sends a GET request.
+
+        Raises:
+            NewsAPIException: If the response status is not 200.
+        """
+        if self.session is None:
+            raise RuntimeError("AsyncNewsHandler should be used as a context manager")
+        loop = asyncio.get_running_loop()
+
+        def send(headers: dict) -> tuple[int, dict | None, dict]:
+            # called on the cache's thread, the request itself runs on the event loop
+            return asyncio.run_coroutine_threadsafe(
+                self._request(url, payload, headers), loop
+            ).result()
+
+        # the cache blocks while an identical request is in flight, so not on the loop
+        status, body = await asyncio.to_thread(self.cache.fetch, url, payload, send)
+        # Check Status of Request
+        if status != 200:
+            raise NewsAPIException(body)
+        return body
+
+    async def _request(
+        self, url: str, payload: dict, headers: dict
+    ) -> tuple[int, dict | None, dict]:
+        """
+        Sends a GET request to an endpoint with a key from the pool. Returns status
+        code, JSON body (None for 304) and response headers.
+
+        Raises:
+            QuotaExceededException: If the key pool refuses the query.
+        """
+        endpoint = url.rsplit("/", 1)[-1]
+        api_key = self.api_key
+        if self.key_pool is not None:
+            # waiting for the key's rate limiter must not block the event loop
+            api_key = await asyncio.to_thread(
+                self.key_pool.acquire, ENDPOINT_PRIORITIES.get(endpoint, "normal")
+            )
+        async with self._semaphore:
+            async with self.session.get(
+                url, params=payload, headers={**get_auth_headers(api_key), **headers}
+            ) as r:
+                if r.status == 304:
+                    return r.status, None, r.headers
+                data = await r.json(content_type=None)
+        if r.status == 429 and self.key_pool is not None:
+            # throttled: the key is out of its quota
+            await asyncio.to_thread(self.key_pool.mark_exhausted, api_key)
+        return r.status, data, r.headers
+
+
+def merge_results(responses: list[dict]) -> list[tuple]:
+    """
+    Merges articles of many responses into (url, title, content) tuples, keeping the
+    first occurrence of every URL.
+    """
+    seen_urls = set()
+    final_results = []
+    for response in responses:
+        for result in response["articles"]:
+            if result["url"] in seen_urls:
+                continue
+            seen_urls.add(result["url"])
+            final_results.append((result["url"], result["title"], result["content"]))
+    return final_results
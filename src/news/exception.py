@@ -18,3 +18,7 @@ class NewsAPIException(Exception):
     def get_message(self):
         if self.exception["message"]:
             return self.exception["message"]
+
+
+class QuotaExceededException(Exception):
+    """Raised when a query would exceed the daily request quota of the API keys."""
@@ -0,0 +1,272 @@
+"""
+Pool of NewsAPI keys with per-key rate limiting and daily quota tracking. Usage
+counters are persisted in SQLite, so the quota is shared by all runs of a day, also
+running at the same time; as the quota runs out, low priority queries are shed first.
+"""
+import datetime
+import hashlib
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+from src.news.exception import QuotaExceededException
+from src.utilities.sqlite_store import SqliteStore
+
+KEY_STRATEGIES = ["round-robin", "least-used"]
+# fraction of the daily quota of all keys that has to be left to send a query
+DEFAULT_RESERVE = {"low": 0.5, "normal": 0.1, "high": 0.0}
+# `/sources` barely changes, headlines are what ingest cannot run without
+ENDPOINT_PRIORITIES = {"top-headlines": "high", "everything": "normal", "sources": "low"}
+
+config = load_config()
+
+
+class TokenBucket:
+    """Token bucket rate limiter: `rate` tokens per second, at most `capacity` saved."""
+
+    def __init__(self, rate: float, capacity: float) -> None:
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Takes a token, waiting for it if the bucket is empty. Returns time waited."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated_at) * self.rate
+            )
+            self.updated_at = now
+            self.tokens -= 1
+            # a negative balance is the time the caller has to wait for its token
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class ApiKeyPool(SqliteStore):
+    """
+    Thread-safe pool of API keys rotated round-robin or by least daily usage.
+
+    Every acquired key counts as one request against its daily limit, retries of the
+    request are charged to it afterwards. Queries are
+    given a priority ("high", "normal" or "low"); a query is refused with
+    `QuotaExceededException` once less than its reserve fraction of the total daily
+    quota is left, so that low priority queries stop first.
+    """
+
+    # requests of a day by key digest
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS usage (day TEXT, key TEXT, requests INTEGER, "
+        "PRIMARY KEY (day, key))",
+    )
+
+    def __init__(
+        self,
+        keys: list[str],
+        daily_limit: int = 100,
+        strategy: str = "round-robin",
+        rate_per_second: float = 1.0,
+        burst: float = 5,
+        usage_path: str | Path | None = None,
+        reserve: dict[str, float] | None = None,
+    ) -> None:
+        """
+        Args:
+            keys (list[str]): API keys.
+            daily_limit (int, optional): Number of requests a key may send a day.
+            Defaults to 100.
+            strategy (str, optional): "round-robin" or "least-used". Defaults to
+            "round-robin".
+            rate_per_second (float, optional): Sustained request rate of a key.
+            Defaults to 1.0.
+            burst (float, optional): Number of requests a key may send at once.
+            Defaults to 5.
+            usage_path (str | Path | None, optional): SQLite file to persist daily
+            usage in, shared by processes using the same keys. If None usage is kept
+            in memory only. Defaults to None.
+            reserve (dict[str, float] | None, optional): Fraction of the total daily
+            quota that has to be left to send a query of a priority. Missing
+            priorities take values from `DEFAULT_RESERVE`. Defaults to None.
+
+        Raises:
+            ValueError: If `keys` is empty or `strategy` is not one of
+            `KEY_STRATEGIES`.
+        """
+        if not keys:
+            raise ValueError("at least one API key is required")
+        if strategy not in KEY_STRATEGIES:
+            raise ValueError(f"strategy must be one of {KEY_STRATEGIES}")
+        super().__init__(usage_path)
+        self.keys = list(dict.fromkeys(keys))
+        self.daily_limit = daily_limit
+        self.strategy = strategy
+        self.usage_path = Path(usage_path) if usage_path is not None else None
+        self.reserve = {**DEFAULT_RESERVE, **(reserve or {})}
+        self._buckets = {key: TokenBucket(rate_per_second, burst) for key in self.keys}
+        self._next = 0
+        self._day = None
+        self._usage = {}
+        self._roll_day()
+
+    @classmethod
+    def from_file(cls, path: str | Path, **kwargs) -> "ApiKeyPool":
+        """Creates a pool of keys listed one per line in a file."""
+        with open(path, "r") as f:
+            keys = [line.strip() for line in f.read().splitlines() if line.strip()]
+        return cls(keys, **kwargs)
+
+    @classmethod
+    def from_env(cls, variable: str = "NEWSAPI_KEYS", **kwargs) -> "ApiKeyPool":
+        """Creates a pool of comma-separated keys from an environment variable."""
+        keys = [key.strip() for key in os.environ.get(variable, "").split(",")]
+        return cls([key for key in keys if key], **kwargs)
+
+    def acquire(self, priority: str = "normal") -> str:
+        """
+        Returns a key to send a request with, waiting for its rate limiter, and counts
+        the request against the key's daily quota.
+
+        Args:
+            priority (str, optional): "high", "normal" or "low". Defaults to "normal".
+
+        Raises:
+            QuotaExceededException: If the daily quota of all keys is used up or the
+            quota left is smaller than the reserve of `priority`.
+
+        Returns:
+            str: API key.
+        """
+        with self._usage_transaction():
+            available = [k for k in self.keys if self._usage[k] < self.daily_limit]
+            if not available:
+                raise QuotaExceededException("daily quota of all API keys is used up")
+            left = sum(self.daily_limit - self._usage[k] for k in available)
+            if left <= self.reserve[priority] * self.daily_limit * len(self.keys):
+                raise QuotaExceededException(
+                    f"{priority} priority query shed, {left} requests left today"
+                )
+            key = self._choose(available)
+            self._usage[key] += 1
+        self._buckets[key].acquire()
+        return key
+
+    def charge(self, key: str, requests: int) -> None:
+        """Counts extra requests sent with a key, e.g. retries of a request."""
+        if requests <= 0:
+            return
+        with self._usage_transaction():
+            self._usage[key] += requests
+
+    def mark_exhausted(self, key: str) -> None:
+        """Marks a key as out of quota for the rest of the day (e.g. after a 429)."""
+        with self._usage_transaction():
+            self._usage[key] = max(self._usage[key], self.daily_limit)
+
+    def usage(self) -> dict[str, int]:
+        """Returns number of requests sent today with every key (by key digest)."""
+        with self._usage_transaction():
+            return {digest(key): self._usage[key] for key in self.keys}
+
+    def remaining(self) -> int:
+        """Returns number of requests all keys together may still send today."""
+        with self._usage_transaction():
+            return sum(max(0, self.daily_limit - self._usage[k]) for k in self.keys)
+
+    def _choose(self, available: list[str]) -> str:
+        if self.strategy == "least-used":
+            return min(available, key=self._usage.__getitem__)
+        for _ in range(len(self.keys)):
+            key = self.keys[self._next % len(self.keys)]
+            self._next += 1
+            if key in available:
+                return key
+
+    def _roll_day(self) -> None:
+        # NewsAPI resets quotas at midnight UTC
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self._usage = {key: 0 for key in self.keys}
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.datetime.now(datetime.timezone.utc).date().isoformat()
+
+    @contextmanager
+    def _usage_transaction(self):
+        """
+        Holds the lock with today's usage loaded into `_usage` and saves counters
+        changed inside. With a usage file, the file stays locked for writing until
+        then, so that counters of runs at the same time add up.
+        """
+        with self._lock:
+            self._roll_day()
+            if self.database is None:
+                yield
+                return
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                saved = dict(
+                    connection.execute(
+                        "SELECT key, requests FROM usage WHERE day = ?", (self._day,)
+                    ).fetchall()
+                )
+                for key in self.keys:
+                    self._usage[key] = saved.get(digest(key), 0)
+                before = dict(self._usage)
+                yield
+                connection.executemany(
+                    "INSERT INTO usage (day, key, requests) VALUES (?, ?, ?) "
+                    "ON CONFLICT (day, key) DO UPDATE SET requests = excluded.requests",
+                    [
+                        (self._day, digest(key), self._usage[key])
+                        for key in self.keys
+                        if self._usage[key] != before[key]
+                    ],
+                )
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+
+
+def digest(key: str) -> str:
+    """Returns short digest of a key, so that keys are never written to disk."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+
+def load_api_key_pool(file_path: str | Path | None = None) -> ApiKeyPool:
+    """
+    Creates the key pool configured in `newsapi` section of config. Keys are taken
+    from the environment variable `newsapi.api_keys_env` ("NEWSAPI_KEYS" by default)
+    if it is set, otherwise from a file with one key per line.
+
+    Args:
+        file_path (str | Path | None, optional): File with keys. If None `api.key`
+        next to `news_handler.py`. Defaults to None.
+    """
+    kwargs = {
+        "daily_limit": config["newsapi"].get("daily_limit", 100),
+        "strategy": config["newsapi"].get("key_strategy", "round-robin"),
+        "rate_per_second": config["newsapi"].get("key_rate_per_second", 1.0),
+        "burst": config["newsapi"].get("key_burst", 5),
+        "usage_path": config["newsapi"].get("usage_path", ".cache/newsapi_usage.sqlite"),
+        "reserve": config["newsapi"].get("quota_reserve"),
+    }
+    variable = config["newsapi"].get("api_keys_env", "NEWSAPI_KEYS")
+    if os.environ.get(variable):
+        return ApiKeyPool.from_env(variable, **kwargs)
+    if file_path is None:
+        file_path = Path(__file__).parent.joinpath("api.key")
+    return ApiKeyPool.from_file(file_path, **kwargs)
@@ -1,17 +1,86 @@
 import datetime
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterator
 
 import repackage
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 repackage.up(2)
 from src.config.config import load_config
 from src.news.exception import NewsAPIException
+from src.news.key_pool import ENDPOINT_PRIORITIES, ApiKeyPool, load_api_key_pool
 from src.news.news_auth import NewsApiAuth
+from src.news.records import HeadlineRecord, loads, to_records
+from src.news.response_cache import ResponseCache, response_cache
 from src.utilities.validators import NewsHandlerValidator, stringify_date_param
 
 config = load_config()
 
+# statuses meaning the API is throttling us or temporarily unavailable
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class JitteredRetry(Retry):
+    """
+    Retry with exponential backoff and "equal jitter": half of the backoff time is
+    fixed and half is random, so that clients throttled at the same moment do not all
+    retry at the same moment. `Retry-After` headers take precedence over the backoff.
+    """
+
+    def get_backoff_time(self) -> float:
+        backoff = super().get_backoff_time()
+        return backoff / 2 + random.uniform(0, backoff / 2)
+
+
+def create_session(
+    pool_size: int | None = None,
+    max_retries: int | None = None,
+    backoff_factor: float | None = None,
+) -> requests.Session:
+    """
+    Creates a keep-alive session with a connection pool and retries on 429/5xx.
+
+    Args:
+        pool_size (int | None, optional): Number of connections kept alive per host.
+        If None taken from config (`newsapi.pool_size`). Defaults to None.
+        max_retries (int | None, optional): Maximal number of retries of a request. If
+        None taken from config (`newsapi.max_retries`). Defaults to None.
+        backoff_factor (float | None, optional): Base of exponential backoff in
+        seconds. If None taken from config (`newsapi.backoff_factor`).
+        Defaults to None.
+
+    Returns:
+        requests.Session: Session with a retrying adapter mounted for https and http.
+    """
+    if pool_size is None:
+        pool_size = config["newsapi"].get("pool_size", 10)
+    if max_retries is None:
+        max_retries = config["newsapi"].get("max_retries", 3)
+    if backoff_factor is None:
+        backoff_factor = config["newsapi"].get("backoff_factor", 0.5)
+    retry = JitteredRetry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        # the last response is returned so that the API error can be raised
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class NewsHandler(object):
     """
@@ -24,21 +93,45 @@ class NewsHandler(object):
         data from News API endpoints. See more: https://newsapi.org/docs
     """
 
-    def __init__(self, api_key: str | None = None, session: requests.Session() = None):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        session: requests.Session() = None,
+        cache: ResponseCache | None = None,
+        key_pool: ApiKeyPool | None = None,
+    ):
         """
         Init function of class NewsHandler.
 
         Args:
-            api_key (str | None, optional): API key. Defaults to None.
-            session (requests.Session | None, optional): Session. Defaults to None.
+            api_key (str | None, optional): API key. If None (and `key_pool` is None)
+            keys are rotated in a pool created with `load_api_key_pool`.
+            Defaults to None.
+            session (requests.Session | None, optional): Session. If None a pooled,
+            retrying session is created with `create_session`. Defaults to None.
+            cache (ResponseCache | None, optional): Response cache. If None the shared
+            on-disk cache configured in `newsapi` section of config. Defaults to None.
+            key_pool (ApiKeyPool | None, optional): Pool of API keys to rotate. Takes
+            precedence over `api_key`. Defaults to None.
         """
-        if api_key is None:
-            api_key = self.read_api_key()
-        self.auth = NewsApiAuth(api_key=api_key)
+        if api_key is None and key_pool is None:
+            key_pool = load_api_key_pool()
+        self.key_pool = key_pool
+        self.auth = NewsApiAuth(api_key=api_key) if api_key is not None else None
         if session is None:
-            self.request_method = requests
-        else:
-            self.request_method = session
+            session = create_session()
+        self.session = session
+        if cache is None:
+            cache = response_cache
+        self.cache = cache
+        # separate timeouts: fail fast on connecting, wait for slow responses
+        self.timeout = (
+            config["newsapi"].get("connect_timeout", 3.05),
+            config["newsapi"].get("read_timeout", 30),
+        )
+        self.request_stats = {}
+        # requests of prefetching threads are recorded at the same time
+        self._stats_lock = threading.Lock()
 
     @staticmethod
     def customize_output(func):
@@ -57,7 +150,7 @@ class NewsHandler(object):
         return wrapper
 
     @customize_output
-    def get_top_headlines(  # noqa: C901
+    def get_top_headlines(
         self,
         q: str | None = None,
         qintitle: str | None = None,
@@ -130,99 +223,14 @@ class NewsHandler(object):
             dict: JSON response as nested Python dictionary.
         """
 
-        payload = {}
-
-        # Keyword/Phrase
-        if q is not None:
-            if NewsHandlerValidator.is_valid_string(q):
-                payload["q"] = q
-            else:
-                raise TypeError("keyword/phrase q param should be of type str")
-
-        # Keyword/Phrase in Title
-        if qintitle is not None:
-            if NewsHandlerValidator.is_valid_string(qintitle):
-                payload["qintitle"] = qintitle
-            else:
-                raise TypeError("keyword/phrase qintitle param should be of type str")
-
-        # Sources
-        if (sources is not None) and ((country is not None) or (category is not None)):
-            raise ValueError("cannot mix country/category param with sources param.")
-
-        # Sources
-        if sources is not None:
-            if NewsHandlerValidator.is_valid_string(sources):
-                payload["sources"] = sources
-            else:
-                raise TypeError("sources param should be of type str")
-
-        # Language
-        if language is not None:
-            if NewsHandlerValidator.is_valid_string(language):
-                if language in config["newsapi"]["languages"]:
-                    payload["language"] = language
-                else:
-                    raise ValueError("invalid language")
-            else:
-                raise TypeError("language param should be of type str")
-
-        # Country
-        if country is not None:
-            if NewsHandlerValidator.is_valid_string(country):
-                if country in config["newsapi"]["countries"]:
-                    payload["country"] = country
-                else:
-                    raise ValueError("invalid country")
-            else:
-                raise TypeError("country param should be of type str")
-
-        # Category
-        if category is not None:
-            if NewsHandlerValidator.is_valid_string(category):
-                if category in config["newsapi"]["categories"]:
-                    payload["category"] = category
-                else:
-                    raise ValueError("invalid category")
-            else:
-                raise TypeError("category param should be of type str")
-
-        # Page Size
-        if page_size is not None:
-            if type(page_size) == int:
-                if 0 <= page_size <= 100:
-                    payload["pageSize"] = page_size
-                else:
-                    raise ValueError("page_size param should be an int between 1 and 100")
-            else:
-                raise TypeError("page_size param should be an int")
-
-        # Page
-        if page is not None:
-            if type(page) == int:
-                if page > 0:
-                    payload["page"] = page
-                else:
-                    raise ValueError("page param should be an int greater than 0")
-            else:
-                raise TypeError("page param should be an int")
-
-        # Send Request
-        r = self.request_method.get(
-            config["newsapi"]["top_headlines_url"],
-            auth=self.auth,
-            timeout=30,
-            params=payload,
+        payload = build_top_headlines_payload(
+            q, qintitle, sources, language, country, category, page_size, page
         )
 
-        # Check Status of Request
-        if r.status_code != requests.codes.ok:
-            raise NewsAPIException(r.json())
-
-        return r.json()
+        return self._send(config["newsapi"]["top_headlines_url"], payload)
 
     @customize_output
-    def get_everything(  # noqa: C901
+    def get_everything(
         self,
         q: str | None = None,
         qintitle: str | None = None,
@@ -309,110 +317,28 @@ class NewsHandler(object):
             dict: JSON response as nested Python dictionary.
         """
 
-        payload = {}
-
-        # Keyword/Phrase
-        if q is not None:
-            if NewsHandlerValidator.is_valid_string(q):
-                payload["q"] = q
-            else:
-                raise TypeError("keyword/phrase q param should be of type str")
-
-        # Keyword/Phrase in Title
-        if qintitle is not None:
-            if NewsHandlerValidator.is_valid_string(qintitle):
-                payload["qintitle"] = qintitle
-            else:
-                raise TypeError("keyword/phrase qintitle param should be of type str")
-
-        # Sources
-        if sources is not None:
-            if NewsHandlerValidator.is_valid_string(sources):
-                payload["sources"] = sources
-            else:
-                raise TypeError("sources param should be of type str")
-
-        # Domains To Search
-        if domains is not None:
-            if NewsHandlerValidator.is_valid_string(domains):
-                payload["domains"] = domains
-            else:
-                raise TypeError("domains param should be of type str")
-
-        if exclude_domains is not None:
-            if isinstance(exclude_domains, str):
-                payload["excludeDomains"] = exclude_domains
-            else:
-                raise TypeError("exclude_domains param should be of type str")
-
-        # Search From This Date ...
-        if from_param is not None:
-            payload["from"] = stringify_date_param(from_param)
-
-        # ... To This Date
-        if to is not None:
-            payload["to"] = stringify_date_param(to)
-
-        # Language
-        if language is not None:
-            if NewsHandlerValidator.is_valid_string(language):
-                if language not in config["newsapi"]["languages"]:
-                    raise ValueError("invalid language")
-                else:
-                    payload["language"] = language
-            else:
-                raise TypeError("language param should be of type str")
-
-        # Sort Method
-        if sort_by is not None:
-            if NewsHandlerValidator.is_valid_string(sort_by):
-                if sort_by in config["newsapi"]["sort_method"]:
-                    payload["sortBy"] = sort_by
-                else:
-                    raise ValueError("invalid sort")
-            else:
-                raise TypeError("sort_by param should be of type str")
-
-        # Page Size
-        if page_size is not None:
-            if type(page_size) == int:
-                if 0 <= page_size <= 100:
-                    payload["pageSize"] = page_size
-                else:
-                    raise ValueError("page_size param should be an int between 1 and 100")
-            else:
-                raise TypeError("page_size param should be an int")
-
-        # Page
-        if page is not None:
-            if type(page) == int:
-                if page > 0:
-                    payload["page"] = page
-                else:
-                    raise ValueError("page param should be an int greater than 0")
-            else:
-                raise TypeError("page param should be an int")
-
-        # Send Request
-        r = self.request_method.get(
-            config["newsapi"]["everything_url"],
-            auth=self.auth,
-            timeout=30,
-            params=payload,
+        payload = build_everything_payload(
+            q,
+            qintitle,
+            sources,
+            domains,
+            exclude_domains,
+            from_param,
+            to,
+            language,
+            sort_by,
+            page,
+            page_size,
         )
 
-        # Check Status of Request
-        if r.status_code != requests.codes.ok:
-            raise NewsAPIException(r.json())
-
-        return r.json()
+        return self._send(config["newsapi"]["everything_url"], payload)
 
     def get_sources(
         self,
         category: str | None = None,
         language: str | None = None,
         country: str | None = None,
-    ):  # noqa: C901
+    ):
         """
         Call the `/sources` endpoint.
 
@@ -440,48 +366,207 @@ class NewsHandler(object):
             dict: JSON response as nested Python dictionary.
         """
 
-        payload = {}
+        payload = build_sources_payload(category, language, country)
 
-        # Language
-        if language is not None:
-            if NewsHandlerValidator.is_valid_string(language):
-                if language in config["newsapi"]["languages"]:
-                    payload["language"] = language
-                else:
-                    raise ValueError("invalid language")
-            else:
-                raise TypeError("language param should be of type str")
-
-        # Country
-        if country is not None:
-            if NewsHandlerValidator.is_valid_string(country):
-                if country in config["newsapi"]["countries"]:
-                    payload["country"] = country
-                else:
-                    raise ValueError("invalid country")
-            else:
-                raise TypeError("country param should be of type str")
-
-        # Category
-        if category is not None:
-            if NewsHandlerValidator.is_valid_string(category):
-                if category in config["newsapi"]["categories"]:
-                    payload["category"] = category
-                else:
-                    raise ValueError("invalid category")
-            else:
-                raise TypeError("category param should be of type str")
+        return self._send(config["newsapi"]["sources_url"], payload)
+
+    def get_top_headlines_records(self, **kwargs) -> list[HeadlineRecord]:
+        """
+        Calls the `/top-headlines` endpoint and returns every article as a record with
+        all its fields. Takes the same keyword arguments as `get_top_headlines`.
+        """
+        payload = build_top_headlines_payload(**kwargs)
+        return to_records(self._send(config["newsapi"]["top_headlines_url"], payload))
 
-        # Send Request
-        r = self.request_method.get(
-            config["newsapi"]["sources_url"], auth=self.auth, timeout=30, params=payload
+    def get_everything_records(self, **kwargs) -> list[HeadlineRecord]:
+        """
+        Calls the `/everything` endpoint and returns every article as a record with
+        all its fields. Takes the same keyword arguments as `get_everything`.
+        """
+        payload = build_everything_payload(**kwargs)
+        return to_records(self._send(config["newsapi"]["everything_url"], payload))
+
+    def iter_top_headlines(
+        self, limit: int | None = None, page_size: int = 100, **kwargs
+    ) -> Iterator[tuple]:
+        """
+        Lazily iterates over all results of a `/top-headlines` query, requesting pages
+        on demand and fetching the next page in the background while the current one
+        is consumed.
+
+        Args:
+            limit (int | None, optional): Maximal number of results. If None iterates
+            until `totalResults` of the query. Defaults to None.
+            page_size (int, optional): Number of results per request. Defaults to 100.
+            **kwargs: Keyword arguments of `get_top_headlines` other than `page` and
+            `page_size`.
+
+        Yields:
+            tuple: (url, title, content) of every result.
+        """
+        yield from self._iter_results(
+            config["newsapi"]["top_headlines_url"],
+            build_top_headlines_payload,
+            limit,
+            page_size,
+            kwargs,
+        )
+
+    def iter_everything(
+        self, limit: int | None = None, page_size: int = 100, **kwargs
+    ) -> Iterator[tuple]:
+        """
+        Lazily iterates over all results of an `/everything` query, requesting pages
+        on demand and fetching the next page in the background while the current one
+        is consumed. Useful for backfills over long date ranges.
+
+        Args:
+            limit (int | None, optional): Maximal number of results. If None iterates
+            until `totalResults` of the query. Defaults to None.
+            page_size (int, optional): Number of results per request. Defaults to 100.
+            **kwargs: Keyword arguments of `get_everything` other than `page` and
+            `page_size`.
+
+        Yields:
+            tuple: (url, title, content) of every result.
+        """
+        yield from self._iter_results(
+            config["newsapi"]["everything_url"],
+            build_everything_payload,
+            limit,
+            page_size,
+            kwargs,
+        )
+
+    def _iter_results(
+        self,
+        url: str,
+        build_payload: Callable[..., dict],
+        limit: int | None,
+        page_size: int,
+        kwargs: dict,
+    ) -> Iterator[tuple]:
+        if limit is not None and limit <= 0:
+            return
+        if limit is not None:
+            # do not request more than needed
+            page_size = min(page_size, limit)
+        yielded = 0
+        fetched = 0
+        page = 1
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(
+                self._send, url, build_payload(**kwargs, page=page, page_size=page_size)
+            )
+            while future is not None:
+                response = future.result()
+                articles = response["articles"]
+                fetched += len(articles)
+                total = response.get("totalResults", 0)
+                if limit is not None:
+                    total = min(total, limit)
+                future = None
+                if articles and fetched < total:
+                    # prefetch the next page while this one is consumed
+                    page += 1
+                    future = executor.submit(
+                        self._send,
+                        url,
+                        build_payload(**kwargs, page=page, page_size=page_size),
+                    )
+                for result in articles:
+                    if yielded == limit:
+                        return
+                    yielded += 1
+                    yield (result["url"], result["title"], result["content"])
+
+    def _send(self, url: str, payload: dict) -> dict:
+        """
+        Returns response of an endpoint from cache or sends a GET request.
+
+        Raises:
+            NewsAPIException: If the response status is not 200 after retries.
+        """
+        status, body = self.cache.fetch(
+            url, payload, lambda headers: self._request(url, payload, headers)
         )
 
         # Check Status of Request
-        if r.status_code != requests.codes.ok:
-            raise NewsAPIException(r.json())
+        if status != requests.codes.ok:
+            raise NewsAPIException(body)
+
+        return body
+
+    def _request(self, url: str, payload: dict, headers: dict) -> tuple[int, dict, dict]:
+        """
+        Sends a GET request to an endpoint and records its latency and retries.
+        Returns status code, JSON body (None for 304) and response headers.
 
-        return r.json()
+        Raises:
+            QuotaExceededException: If the key pool refuses the query.
+        """
+        endpoint = url.rsplit("/", 1)[-1]
+        auth = self.auth
+        if self.key_pool is not None:
+            api_key = self.key_pool.acquire(ENDPOINT_PRIORITIES.get(endpoint, "normal"))
+            auth = NewsApiAuth(api_key=api_key)
+        start = time.perf_counter()
+        try:
+            r = self.session.get(
+                url, auth=auth, timeout=self.timeout, params=payload, headers=headers
+            )
+        except requests.RequestException:
+            # e.g. connection errors or timeouts left after retries
+            self._record_request(endpoint, time.perf_counter() - start, (), failed=True)
+            raise
+        latency = time.perf_counter() - start
+        retries = getattr(r.raw, "retries", None)
+        history = retries.history if retries is not None else ()
+        failed = r.status_code not in (requests.codes.ok, requests.codes.not_modified)
+        self._record_request(endpoint, latency, history, failed=failed)
+        if self.key_pool is not None:
+            # every retry reached NewsAPI and counts against the key's quota
+            self.key_pool.charge(api_key, len(history))
+        if r.status_code == requests.codes.not_modified:
+            return r.status_code, None, r.headers
+        if (
+            r.status_code == requests.codes.too_many_requests
+            and self.key_pool is not None
+        ):
+            # still throttled after retries: the key is out of its quota
+            self.key_pool.mark_exhausted(api_key)
+        return r.status_code, loads(r.content), r.headers
+
+    def _record_request(
+        self, endpoint: str, latency: float, history: tuple, failed: bool
+    ) -> None:
+        with self._stats_lock:
+            stats = self.request_stats.setdefault(
+                endpoint,
+                {"calls": 0, "retries": 0, "throttled": 0, "errors": 0, "latency": 0.0},
+            )
+            stats["calls"] += 1
+            stats["retries"] += len(history)
+            stats["throttled"] += sum(attempt.status == 429 for attempt in history)
+            stats["errors"] += failed
+            stats["latency"] += latency
+            stats["last_latency"] = latency
+            stats["max_latency"] = max(stats.get("max_latency", 0.0), latency)
+
+    def get_request_stats(self) -> dict[str, dict]:
+        """
+        Returns per-endpoint number of calls, retries, retries caused by throttling
+        (429) and failed calls (error responses, connection errors and timeouts),
+        and mean, last and maximal latency in seconds (including retries).
+        """
+        with self._stats_lock:
+            return {
+                endpoint: {
+                    **{k: v for k, v in stats.items() if k != "latency"},
+                    "mean_latency": stats["latency"] / stats["calls"],
+                }
+                for endpoint, stats in self.request_stats.items()
+            }
 
     @staticmethod
     def read_api_key(file_name: str = "api.key") -> str:
@@ -498,3 +583,242 @@ class NewsHandler(object):
         file_path = Path(__file__).parent.joinpath(file_name)
         with open(file_path, "r") as f:
             return str(f.read().splitlines()[0])
+
+
+def build_top_headlines_payload(  # noqa: C901
+    q: str | None = None,
+    qintitle: str | None = None,
+    sources: str | None = None,
+    language: str = "en",
+    country: str | None = None,
+    category: str | None = None,
+    page_size: int | None = None,
+    page: int | None = None,
+) -> dict:
+    """
+    Validates parameters of the `/top-headlines` endpoint and returns request payload.
+    See `NewsHandler.get_top_headlines` for the parameters.
+    """
+    payload = {}
+
+    # Keyword/Phrase
+    if q is not None:
+        if NewsHandlerValidator.is_valid_string(q):
+            payload["q"] = q
+        else:
+            raise TypeError("keyword/phrase q param should be of type str")
+
+    # Keyword/Phrase in Title
+    if qintitle is not None:
+        if NewsHandlerValidator.is_valid_string(qintitle):
+            payload["qintitle"] = qintitle
+        else:
+            raise TypeError("keyword/phrase qintitle param should be of type str")
+
+    # Sources
+    if (sources is not None) and ((country is not None) or (category is not None)):
+        raise ValueError("cannot mix country/category param with sources param.")
+
+    # Sources
+    if sources is not None:
+        if NewsHandlerValidator.is_valid_string(sources):
+            payload["sources"] = sources
+        else:
+            raise TypeError("sources param should be of type str")
+
+    # Language
+    if language is not None:
+        if NewsHandlerValidator.is_valid_string(language):
+            if language in config["newsapi"]["languages"]:
+                payload["language"] = language
+            else:
+                raise ValueError("invalid language")
+        else:
+            raise TypeError("language param should be of type str")
+
+    # Country
+    if country is not None:
+        if NewsHandlerValidator.is_valid_string(country):
+            if country in config["newsapi"]["countries"]:
+                payload["country"] = country
+            else:
+                raise ValueError("invalid country")
+        else:
+            raise TypeError("country param should be of type str")
+
+    # Category
+    if category is not None:
+        if NewsHandlerValidator.is_valid_string(category):
+            if category in config["newsapi"]["categories"]:
+                payload["category"] = category
+            else:
+                raise ValueError("invalid category")
+        else:
+            raise TypeError("category param should be of type str")
+
+    # Page Size
+    if page_size is not None:
+        if type(page_size) == int:
+            if 0 <= page_size <= 100:
+                payload["pageSize"] = page_size
+            else:
+                raise ValueError("page_size param should be an int between 1 and 100")
+        else:
+            raise TypeError("page_size param should be an int")
+
+    # Page
+    if page is not None:
+        if type(page) == int:
+            if page > 0:
+                payload["page"] = page
+            else:
+                raise ValueError("page param should be an int greater than 0")
+        else:
+            raise TypeError("page param should be an int")
+    return payload
+
+
+def build_everything_payload(  # noqa: C901
+    q: str | None = None,
+    qintitle: str | None = None,
+    sources: str | None = None,
+    domains: str | None = "cnn",
+    exclude_domains: str | None = None,
+    from_param: str | datetime.datetime | datetime.date | int | float | None = None,
+    to: str | datetime.datetime | datetime.date | int | float | None = None,
+    language: str | None = None,
+    sort_by=None,
+    page: int | None = None,
+    page_size: int | None = None,
+) -> dict:
+    """
+    Validates parameters of the `/everything` endpoint and returns request payload.
+    See `NewsHandler.get_everything` for the parameters.
+    """
+    payload = {}
+
+    # Keyword/Phrase
+    if q is not None:
+        if NewsHandlerValidator.is_valid_string(q):
+            payload["q"] = q
+        else:
+            raise TypeError("keyword/phrase q param should be of type str")
+
+    # Keyword/Phrase in Title
+    if qintitle is not None:
+        if NewsHandlerValidator.is_valid_string(qintitle):
+            payload["qintitle"] = qintitle
+        else:
+            raise TypeError("keyword/phrase qintitle param should be of type str")
+
+    # Sources
+    if sources is not None:
+        if NewsHandlerValidator.is_valid_string(sources):
+            payload["sources"] = sources
+        else:
+            raise TypeError("sources param should be of type str")
+
+    # Domains To Search
+    if domains is not None:
+        if NewsHandlerValidator.is_valid_string(domains):
+            payload["domains"] = domains
+        else:
+            raise TypeError("domains param should be of type str")
+
+    if exclude_domains is not None:
+        if isinstance(exclude_domains, str):
+            payload["excludeDomains"] = exclude_domains
+        else:
+            raise TypeError("exclude_domains param should be of type str")
+
+    # Search From This Date ...
+    if from_param is not None:
+        payload["from"] = stringify_date_param(from_param)
+
+    # ... To This Date
+    if to is not None:
+        payload["to"] = stringify_date_param(to)
+
+    # Language
+    if language is not None:
+        if NewsHandlerValidator.is_valid_string(language):
+            if language not in config["newsapi"]["languages"]:
+                raise ValueError("invalid language")
+            else:
+                payload["language"] = language
+        else:
+            raise TypeError("language param should be of type str")
+
+    # Sort Method
+    if sort_by is not None:
+        if NewsHandlerValidator.is_valid_string(sort_by):
+            if sort_by in config["newsapi"]["sort_method"]:
+                payload["sortBy"] = sort_by
+            else:
+                raise ValueError("invalid sort")
+        else:
+            raise TypeError("sort_by param should be of type str")
+
+    # Page Size
+    if page_size is not None:
+        if type(page_size) == int:
+            if 0 <= page_size <= 100:
+                payload["pageSize"] = page_size
+            else:
+                raise ValueError("page_size param should be an int between 1 and 100")
+        else:
+            raise TypeError("page_size param should be an int")
+
+    # Page
+    if page is not None:
+        if type(page) == int:
+            if page > 0:
+                payload["page"] = page
+            else:
+                raise ValueError("page param should be an int greater than 0")
+        else:
+            raise TypeError("page param should be an int")
+    return payload
+
+
+def build_sources_payload(  # noqa: C901
+    category: str | None = None,
+    language: str | None = None,
+    country: str | None = None,
+) -> dict:
+    """
+    Validates parameters of the `/sources` endpoint and returns request payload.
+    See `NewsHandler.get_sources` for the parameters.
+    """
+    payload = {}
+
+    # Language
+    if language is not None:
+        if NewsHandlerValidator.is_valid_string(language):
+            if language in config["newsapi"]["languages"]:
+                payload["language"] = language
+            else:
+                raise ValueError("invalid language")
+        else:
+            raise TypeError("language param should be of type str")
+
+    # Country
+    if country is not None:
+        if NewsHandlerValidator.is_valid_string(country):
+            if country in config["newsapi"]["countries"]:
+                payload["country"] = country
+            else:
+                raise ValueError("invalid country")
+        else:
+            raise TypeError("country param should be of type str")
+
+    # Category
+    if category is not None:
+        if NewsHandlerValidator.is_valid_string(category):
+            if category in config["newsapi"]["categories"]:
+                payload["category"] = category
+            else:
+                raise ValueError("invalid category")
+        else:
+            raise TypeError("category param should be of type str")
+    return payload
@@ -0,0 +1,47 @@
+"""
+Typed records of NewsAPI articles and JSON decoding of responses (with orjson if it is
+installed).
+"""
+import json
+from typing import NamedTuple
+
+try:
+    import orjson
+
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+
+class HeadlineRecord(NamedTuple):
+    """
+    Article returned by `/top-headlines` or `/everything`. Being a tuple, a record
+    takes less memory than the dictionary it is parsed from; its first three fields
+    are the (url, title, content) returned by `NewsHandler.get_top_headlines`.
+    """
+
+    url: str
+    title: str | None
+    content: str | None
+    published_at: str | None = None
+    source_id: str | None = None
+    url_to_image: str | None = None
+    author: str | None = None
+
+    @classmethod
+    def from_article(cls, article: dict) -> "HeadlineRecord":
+        """Creates a record from an article of a NewsAPI response."""
+        return cls(
+            url=article["url"],
+            title=article.get("title"),
+            content=article.get("content"),
+            published_at=article.get("publishedAt"),
+            source_id=(article.get("source") or {}).get("id"),
+            url_to_image=article.get("urlToImage"),
+            author=article.get("author"),
+        )
+
+
+def to_records(response: dict) -> list[HeadlineRecord]:
+    """Returns records of all articles of a NewsAPI response."""
+    return [HeadlineRecord.from_article(article) for article in response["articles"]]
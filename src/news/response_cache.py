@@ -0,0 +1,230 @@
+"""
+On-disk cache of NewsAPI responses. Responses are keyed by endpoint URL and normalized
+payload and stay fresh for a TTL set per endpoint; stale responses are revalidated with
+conditional requests if the API sent validators, and concurrent identical requests
+share one HTTP call.
+"""
+import hashlib
+import json
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable
+
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+from src.news.records import loads
+from src.utilities.sqlite_store import SqliteStore
+
+# seconds a response stays fresh; sources barely change within a day
+DEFAULT_TTLS = {"top-headlines": 300, "everything": 900, "sources": 86400}
+
+config = load_config()
+
+
+class ResponseCache(SqliteStore):
+    """
+    SQLite-backed cache of JSON responses with per-endpoint TTL, conditional
+    revalidation (ETag / Last-Modified) and coalescing of in-flight requests.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, "
+        "endpoint TEXT, body TEXT, etag TEXT, last_modified TEXT, fetched_at REAL)",
+    )
+
+    def __init__(
+        self,
+        path: str | Path,
+        ttls: dict[str, float] | None = None,
+        enabled: bool = True,
+    ) -> None:
+        """
+        Args:
+            path (str | Path): Path of the SQLite file.
+            ttls (dict[str, float] | None, optional): Seconds a response of an
+            endpoint ("top-headlines", "everything", "sources") stays fresh. Missing
+            endpoints take values from `DEFAULT_TTLS`. Defaults to None.
+            enabled (bool, optional): If False every request is sent. Defaults to True.
+        """
+        super().__init__(path)
+        self.path = Path(path)
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.enabled = enabled
+        self.counters: dict[str, dict[str, int]] = {}
+        self._in_flight: dict[str, Future] = {}
+
+    @staticmethod
+    def make_key(url: str, payload: dict) -> str:
+        """Returns cache key of a request: hash of URL and payload sorted by keys."""
+        normalized = json.dumps([url, payload], sort_keys=True, default=str)
+        return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+    def fetch(
+        self,
+        url: str,
+        payload: dict,
+        send: Callable[[dict], tuple[int, dict, dict]],
+    ) -> tuple[int, dict]:
+        """
+        Returns a response from cache if fresh, otherwise sends the request, waiting
+        for an identical request already in flight instead of sending another one.
+
+        Args:
+            url (str): Endpoint URL.
+            payload (dict): Request parameters.
+            send (Callable[[dict], tuple[int, dict, dict]]): Function sending the
+            request with extra headers and returning status code, JSON body and
+            response headers.
+
+        Returns:
+            tuple[int, dict]: Status code and JSON body. Only 200 responses are cached.
+        """
+        if not self.enabled:
+            status, body, _ = send({})
+            return status, body
+        endpoint = url.rsplit("/", 1)[-1]
+        key = self.make_key(url, payload)
+        entry = self._get(key)
+        if self._is_fresh(endpoint, entry):
+            self._count(endpoint, "hits")
+            return 200, entry["body"]
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            self._count(endpoint, "coalesced")
+            return future.result()
+        try:
+            # another request may have refreshed the entry in the meantime
+            entry = self._get(key)
+            if self._is_fresh(endpoint, entry):
+                self._count(endpoint, "hits")
+                result = 200, entry["body"]
+            else:
+                result = self._revalidate(endpoint, key, entry, send)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return result
+
+    def ttl(self, endpoint: str) -> float:
+        """Returns TTL in seconds of an endpoint's responses."""
+        return self.ttls.get(endpoint, 0)
+
+    def stats(self) -> dict[str, dict]:
+        """
+        Returns per-endpoint counters: fresh hits, coalesced requests, 304
+        revalidations and misses, hit rate and number of requests not sent to the
+        API (quota saved).
+        """
+        with self._lock:
+            stats = {}
+            for endpoint, counters in self.counters.items():
+                lookups = sum(counters.values())
+                saved = counters["hits"] + counters["coalesced"]
+                stats[endpoint] = {
+                    **counters,
+                    "hit_rate": (saved + counters["revalidated"]) / lookups,
+                    "quota_saved": saved,
+                }
+            return stats
+
+    def clear(self) -> None:
+        """Removes all entries and resets counters."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM responses")
+            connection.commit()
+            self.counters = {}
+
+    def _is_fresh(self, endpoint: str, entry: dict | None) -> bool:
+        return entry is not None and time.time() - entry["fetched_at"] < self.ttl(
+            endpoint
+        )
+
+    def _revalidate(
+        self, endpoint: str, key: str, entry: dict | None, send: Callable
+    ) -> tuple[int, dict]:
+        headers = {}
+        if entry is not None and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+        status, body, response_headers = send(headers)
+        if status == 304 and entry is not None:
+            self._count(endpoint, "revalidated")
+            self._set(key, endpoint, entry["body"], entry["etag"], entry["last_modified"])
+            return 200, entry["body"]
+        self._count(endpoint, "misses")
+        if status == 200:
+            self._set(
+                key,
+                endpoint,
+                body,
+                response_headers.get("ETag"),
+                response_headers.get("Last-Modified"),
+            )
+        return status, body
+
+    def _get(self, key: str) -> dict | None:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute(
+                    "SELECT body, etag, last_modified, fetched_at FROM responses "
+                    "WHERE key = ?",
+                    (key,),
+                )
+                .fetchone()
+            )
+        if row is None:
+            return None
+        body, etag, last_modified, fetched_at = row
+        return {
+            "body": loads(body),
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": fetched_at,
+        }
+
+    def _set(
+        self,
+        key: str,
+        endpoint: str,
+        body: dict,
+        etag: str | None,
+        last_modified: str | None,
+    ) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO responses "
+                "(key, endpoint, body, etag, last_modified, fetched_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, endpoint, json.dumps(body), etag, last_modified, time.time()),
+            )
+            connection.commit()
+
+    def _count(self, endpoint: str, counter: str) -> None:
+        with self._lock:
+            counters = self.counters.setdefault(
+                endpoint, {"hits": 0, "coalesced": 0, "revalidated": 0, "misses": 0}
+            )
+            counters[counter] += 1
+
+
+response_cache = ResponseCache(
+    path=config["newsapi"].get("cache_path", ".cache/newsapi.sqlite"),
+    ttls=config["newsapi"].get("cache_ttl"),
+    enabled=config["newsapi"].get("cache_enabled", True),
+)
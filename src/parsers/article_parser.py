@@ -1,10 +1,27 @@
 import logging
-import re
 
-from newspaper import Article
+import repackage
 
+repackage.up(2)
+from src.parsers.downloader import Downloader
+from src.parsers.extractors import extract_text
+from src.parsers.html_archive import html_archive
+from src.utilities.text_filter import get_text_filter, text_filter
 
-def get_original_article_text(url: str, headline: str, filter_: bool = True) -> str:
+_downloader = None
+
+
+def get_downloader() -> Downloader:
+    """Returns the shared downloader, so that host politeness spans all calls."""
+    global _downloader
+    if _downloader is None:
+        _downloader = Downloader()
+    return _downloader
+
+
+def get_original_article_text(
+    url: str, headline: str, filter_: bool = True, offline: bool = False
+) -> str:
     """
     Gets article text.
 
@@ -12,43 +29,81 @@ def get_original_article_text(url: str, headline: str, filter_: bool = True) ->
         url (str): Article URL.
         headline (str): Original headline.
         filter_ (bool): Whether to apply a filter or not.
+        offline (bool, optional): Whether to parse the article only from the HTML
+        archive. Defaults to False.
 
     Returns:
         str: Headline and original article text (filtered).
     """
-    article = Article(url=url)
-    article.download()
-    article.parse()
-    if article.text == "":
-        logging.error("Article not properly downloaded")
-    else:
-        logging.info("Article downloaded")
-    if filter_:
-        article_text = filter_text(article.text)
-    else:
-        article_text = article.text
-    return headline, article_text
+    return get_original_article_texts([url], [headline], filter_, offline)[0]
+
+
+def get_original_article_texts(
+    urls: list[str], headlines: list[str], filter_: bool = True, offline: bool = False
+) -> list[tuple[str, str]]:
+    """
+    Gets texts of many articles. Pages are taken from the HTML archive, the missing
+    ones are downloaded concurrently and archived.
+
+    Args:
+        urls (list[str]): Article URLs.
+        headlines (list[str]): Original headlines.
+        filter_ (bool): Whether to apply a filter or not.
+        offline (bool, optional): Whether to parse articles only from the HTML
+        archive, without downloading missing ones. Defaults to False.
+
+    Returns:
+        list[tuple[str, str]]: Headline and original article text (filtered) of every
+        article; text is empty if the article could not be downloaded.
+    """
+    pages = [html_archive.get(url) for url in urls]
+    missing = [url for url, page in zip(urls, pages) if page is None]
+    if missing and offline:
+        logging.warning(f"{len(missing)} articles not archived, skipped offline")
+    elif missing:
+        downloaded = get_downloader().download_many(missing)
+        for page in downloaded:
+            html_archive.put(page)
+        downloaded = iter(downloaded)
+        pages = [next(downloaded) if page is None else page for page in pages]
+    results = []
+    for page, headline in zip(pages, headlines):
+        if page is not None and page.ok:
+            article_text = parse_article_html(page.url, page.html)
+        else:
+            article_text = ""
+        if article_text == "":
+            logging.error("Article not properly downloaded")
+        else:
+            logging.info("Article downloaded")
+        if filter_:
+            article_text = filter_text(article_text)
+        results.append((headline, article_text))
+    return results
+
+
+def parse_article_html(url: str, html: str) -> str:
+    """
+    Extracts article text from downloaded HTML of a page, with a site-specific
+    extractor if one is registered for its host (see `extractors.py`).
+    """
+    return extract_text(url, html)
 
 
 def filter_text(article_raw_text: str, filter_: list[str] | None = None) -> str:
     """
-    Replaces unnecessary words with empty strings and double newline characters with
-    whitespaces.
+    Replaces unnecessary words with empty strings and removes newline characters.
+    Keywords (e.g. "CNN") are replaced only in rewritten sentences, so the models get
+    the original text.
 
     Args:
         article_raw_text (str): Article to filter.
-        filter_ (list[str] | None, optional): List of regexp patterns to replace.
-        Defaults to None.
+        filter_ (list[str] | None, optional): List of regexp patterns of words to
+        remove. If None taken from config (`filter.removals`). Defaults to None.
 
     Returns:
         str: Filtered article.
     """
     if filter_ is None:
-        filter_ = [r"ad(vert(isement)?)?s?"]
-
-    for pattern in filter_:
-        article_raw_text = re.sub(
-            pattern=pattern, repl="", string=article_raw_text, flags=re.I
-        )
-
-    return article_raw_text.replace("\n", "")
+        filter_ = text_filter.removals
+    return get_text_filter(removals=filter_).clean(article_raw_text).replace("\n", "")
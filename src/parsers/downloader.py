@@ -0,0 +1,286 @@
+"""
+Concurrent downloader of article pages. Many URLs are fetched in parallel over pooled
+keep-alive connections, while every host gets at most a few requests at a time, spaced
+by its robots.txt crawl-delay. Slow responses are hedged with a second request, which
+waits for a free slot of the host like any other.
+"""
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import NamedTuple
+from urllib import robotparser
+from urllib.parse import urlsplit
+
+import repackage
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import InvalidHeader
+from urllib3.util.retry import Retry
+
+repackage.up(2)
+from src.config.config import load_config
+from src.utilities.utils import CustomLogger
+
+USER_AGENT = "Mozilla/5.0 (compatible; newsapi-website/0.1)"
+# statuses worth another attempt
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+class DownloadResult(NamedTuple):
+    url: str
+    status: int | None
+    html: str | None
+    headers: dict
+    elapsed: float
+    error: str | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.status == 200
+
+
+class HostPolicy:
+    """Per-host concurrency cap and minimal interval between request starts."""
+
+    def __init__(self, max_concurrency: int, min_interval: float) -> None:
+        self.min_interval = min_interval
+        self.robots = None
+        self.crawl_delay = None
+        # held while robots.txt of the host is read
+        self.robots_lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def __enter__(self):
+        self._semaphore.acquire()
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        if start > now:
+            time.sleep(start - now)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._semaphore.release()
+
+    def defer(self, seconds: float) -> None:
+        """Delays the next request start to the host by at least `seconds`."""
+        with self._lock:
+            self._next_start = max(self._next_start, time.monotonic() + seconds)
+
+
+class Downloader:
+    """
+    Thread-pool downloader honouring robots.txt. Use `download_many` to fetch a batch
+    of URLs; results keep the order of the URLs and failures are returned, not raised.
+    """
+
+    def __init__(
+        self,
+        max_workers: int | None = None,
+        per_host: int | None = None,
+        min_interval: float | None = None,
+        connect_timeout: float | None = None,
+        read_timeout: float | None = None,
+        hedge_after: float | None = None,
+        max_retries: int | None = None,
+        max_retry_after: float | None = None,
+        respect_robots: bool = True,
+        user_agent: str = USER_AGENT,
+    ) -> None:
+        """
+        Args:
+            max_workers (int | None, optional): Number of downloads in flight. If None
+            taken from config (`downloader.max_workers`, 8). Defaults to None.
+            per_host (int | None, optional): Number of downloads in flight per host.
+            If None taken from config (`downloader.per_host`, 2). Defaults to None.
+            min_interval (float | None, optional): Minimal seconds between requests
+            to a host, raised to the host's crawl-delay. If None taken from config
+            (`downloader.min_interval`, 1.0). Defaults to None.
+            connect_timeout (float | None, optional): Seconds to wait for connection.
+            If None taken from config (`downloader.connect_timeout`, 3.05).
+            Defaults to None.
+            read_timeout (float | None, optional): Seconds to wait for data. If None
+            taken from config (`downloader.read_timeout`, 20). Defaults to None.
+            hedge_after (float | None, optional): Seconds after which a second
+            request for a slow URL is sent; the first response wins. If None taken
+            from config (`downloader.hedge_after`, 5.0). Defaults to None.
+            max_retries (int | None, optional): Number of retries of failed
+            downloads. If None taken from config (`downloader.max_retries`, 2).
+            Defaults to None.
+            max_retry_after (float | None, optional): Longest `Retry-After` of a 429
+            or 503 response that is waited for before a retry; the download fails
+            on a longer one. If None taken from config (`downloader.max_retry_after`,
+            60). Defaults to None.
+            respect_robots (bool, optional): Whether to read robots.txt of hosts.
+            Defaults to True.
+            user_agent (str, optional): User-Agent header. Defaults to `USER_AGENT`.
+        """
+        settings = config.get("downloader", {})
+        self.max_workers = max_workers or settings.get("max_workers", 8)
+        self.per_host = per_host or settings.get("per_host", 2)
+        if min_interval is None:
+            min_interval = settings.get("min_interval", 1.0)
+        self.min_interval = min_interval
+        self.timeout = (
+            connect_timeout or settings.get("connect_timeout", 3.05),
+            read_timeout or settings.get("read_timeout", 20),
+        )
+        if hedge_after is None:
+            hedge_after = settings.get("hedge_after", 5.0)
+        self.hedge_after = hedge_after
+        if max_retries is None:
+            max_retries = settings.get("max_retries", 2)
+        self.max_retries = max_retries
+        if max_retry_after is None:
+            max_retry_after = settings.get("max_retry_after", 60)
+        self.max_retry_after = max_retry_after
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.session = requests.Session()
+        # hedged requests may double the number of connections in use
+        adapter = HTTPAdapter(
+            pool_connections=self.max_workers, pool_maxsize=2 * self.max_workers
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers["User-Agent"] = user_agent
+        self._hosts: dict[str, HostPolicy] = {}
+        self._hosts_lock = threading.Lock()
+        self._hedge_executor = ThreadPoolExecutor(max_workers=2 * self.max_workers)
+
+    def download(self, url: str) -> DownloadResult:
+        """Downloads one URL, waiting for its host's turn, with retries."""
+        start = time.perf_counter()
+        host = self._get_host_policy(url)
+        if host.robots is not None and not host.robots.can_fetch(self.user_agent, url):
+            return DownloadResult(url, None, None, {}, 0.0, "disallowed by robots.txt")
+        error = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                # exponential backoff between attempts
+                time.sleep(min(2**attempt, 30) * 0.5)
+            try:
+                response = self._get_hedged(url, host)
+            except requests.RequestException as e:
+                error = f"{type(e).__name__}: {e}"
+                continue
+            if response.status_code in RETRY_STATUSES:
+                error = f"HTTP {response.status_code}"
+                delay = retry_after(response)
+                if delay is not None:
+                    if delay > self.max_retry_after:
+                        break
+                    # later requests to the host, this retry included, wait as asked
+                    host.defer(delay)
+                continue
+            return DownloadResult(
+                url,
+                response.status_code,
+                response.text,
+                dict(response.headers),
+                time.perf_counter() - start,
+                None if response.ok else f"HTTP {response.status_code}",
+            )
+        logger.error(f"Download of {url} failed: {error}")
+        return DownloadResult(url, None, None, {}, time.perf_counter() - start, error)
+
+    def download_many(self, urls: list[str]) -> list[DownloadResult]:
+        """Downloads URLs concurrently and returns results in the order of `urls`."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self.download, urls))
+
+    def close(self) -> None:
+        """Closes pooled connections and stops hedging threads."""
+        self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _get(
+        self, url: str, host: HostPolicy, answered: threading.Event | None = None
+    ) -> requests.Response | None:
+        with host:
+            # the other request of a hedged pair answered while this one waited
+            if answered is not None and answered.is_set():
+                return None
+            response = self.session.get(url, timeout=self.timeout)
+            if answered is not None:
+                answered.set()
+            return response
+
+    def _get_hedged(self, url: str, host: HostPolicy) -> requests.Response:
+        # hosts with a crawl-delay are not hedged, a hedge would wait for it anyway
+        if not self.hedge_after or self.hedge_after <= 0 or host.crawl_delay:
+            return self._get(url, host)
+        answered = threading.Event()
+        first = self._hedge_executor.submit(self._get, url, host, answered)
+        done, _ = wait([first], timeout=self.hedge_after)
+        if done:
+            return first.result()
+        logger.debug(f"Hedging slow download of {url}")
+        pending = {first, self._hedge_executor.submit(self._get, url, host, answered)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and future.result() is not None:
+                    return future.result()
+        # both requests failed
+        return first.result()
+
+    def _get_host_policy(self, url: str) -> HostPolicy:
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        with self._hosts_lock:
+            policy = self._hosts.get(host)
+            if policy is None:
+                policy = self._hosts[host] = HostPolicy(self.per_host, self.min_interval)
+        if not self.respect_robots:
+            return policy
+        # only other URLs of the host wait for its robots.txt
+        with policy.robots_lock:
+            if policy.robots is None:
+                robots = self._read_robots(host)
+                crawl_delay = robots.crawl_delay(self.user_agent)
+                if crawl_delay is not None:
+                    policy.crawl_delay = float(crawl_delay)
+                    policy.min_interval = max(policy.min_interval, float(crawl_delay))
+                policy.robots = robots
+        return policy
+
+    def _read_robots(self, host: str) -> robotparser.RobotFileParser:
+        robots = robotparser.RobotFileParser(f"{host}/robots.txt")
+        try:
+            response = self.session.get(f"{host}/robots.txt", timeout=self.timeout)
+        except requests.RequestException:
+            response = None
+        if response is not None and response.ok:
+            robots.parse(response.text.splitlines())
+        elif response is not None and response.status_code in (401, 403):
+            # as in `RobotFileParser.read`, a protected robots.txt disallows everything
+            robots.disallow_all = True
+        else:
+            # no readable robots.txt means no restrictions
+            robots.parse([])
+        return robots
+
+
+def retry_after(response: requests.Response) -> float | None:
+    """Returns seconds to wait given by the `Retry-After` header of a response, if any."""
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return Retry().parse_retry_after(value)
+    except InvalidHeader:
+        return None
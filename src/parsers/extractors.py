@@ -0,0 +1,95 @@
+"""
+Registry of site-specific article text extractors. An extractor takes the HTML of a
+page and returns its text, or None if its selectors missed; pages without an extractor
+or missed by one are parsed by the generic (and much slower) newspaper parser.
+"""
+from pathlib import Path
+from typing import Callable
+from urllib.parse import urlsplit
+
+import lxml.html
+import repackage
+from lxml.etree import ParserError
+
+repackage.up(2)
+from src.utilities.utils import CustomLogger
+
+# body paragraphs of CNN articles, current and legacy page layouts
+CNN_PARAGRAPHS_XPATH = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' article__content ')]"
+    "//p[contains(concat(' ', normalize-space(@class), ' '), ' paragraph ')]"
+    " | //*[contains(concat(' ', normalize-space(@class), ' '), ' zn-body__paragraph ')]"
+)
+
+EXTRACTORS: dict[str, Callable[[str], str | None]] = {}
+
+logger = CustomLogger(Path(__file__).name)
+
+
+def register_extractor(*hosts: str) -> Callable:
+    """
+    Registers decorated function as the extractor of pages of `hosts` and their
+    subdomains, e.g. "cnn.com" also matches "edition.cnn.com".
+    """
+
+    def decorator(extractor: Callable[[str], str | None]) -> Callable:
+        for host in hosts:
+            EXTRACTORS[host] = extractor
+        return extractor
+
+    return decorator
+
+
+def get_extractor(url: str) -> Callable[[str], str | None] | None:
+    """Returns the extractor registered for host of `url` or None."""
+    host = (urlsplit(url).hostname or "").lower()
+    while host:
+        if host in EXTRACTORS:
+            return EXTRACTORS[host]
+        host = host.partition(".")[2]
+    return None
+
+
+def extract_text(url: str, html: str) -> str:
+    """
+    Extracts article text from HTML of a page with the extractor of its host, falling
+    back to newspaper.
+
+    Args:
+        url (str): Page URL.
+        html (str): Page HTML.
+
+    Returns:
+        str: Article text, paragraphs separated by blank lines.
+    """
+    extractor = get_extractor(url)
+    if extractor is not None:
+        text = extractor(html)
+        if text:
+            return text
+        logger.debug(f"{extractor.__name__} missed {url}, falling back to newspaper")
+    return extract_with_newspaper(url, html)
+
+
+def extract_with_newspaper(url: str, html: str) -> str:
+    """Extracts article text with the generic newspaper parser."""
+    from newspaper import Article
+
+    article = Article(url=url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+
+@register_extractor("cnn.com")
+def extract_cnn(html: str) -> str | None:
+    """Extracts text of a CNN article from paragraphs of the article body."""
+    try:
+        tree = lxml.html.fromstring(html)
+    except ParserError:
+        return None
+    paragraphs = [
+        " ".join(element.text_content().split())
+        for element in tree.xpath(CNN_PARAGRAPHS_XPATH)
+    ]
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph) or None
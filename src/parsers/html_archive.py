@@ -0,0 +1,240 @@
+"""
+Archive of downloaded article pages. Raw HTML is compressed (with zstd if `zstandard`
+is installed, zlib otherwise) and stored content-addressed, i.e. under the SHA-256 of
+the page, while a SQLite index maps normalized URLs to pages and response metadata.
+Least recently used pages are removed once the archive grows over its size limit.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+import zlib
+from pathlib import Path
+
+import repackage
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+repackage.up(2)
+from src.config.config import load_config
+from src.parsers.downloader import DownloadResult
+from src.utilities.sqlite_store import SqliteStore
+from src.utilities.utils import CustomLogger, normalize_url
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+class HtmlArchive(SqliteStore):
+    """
+    Size-bounded archive of raw HTML and response metadata, keyed by normalized URL.
+    Identical pages (e.g. one article under several URLs) are stored once.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS pages (key TEXT PRIMARY KEY, url TEXT, "
+        "digest TEXT, status INTEGER, headers TEXT, fetched_at REAL, last_access REAL)",
+        "CREATE INDEX IF NOT EXISTS pages_last_access ON pages (last_access)",
+        "CREATE TABLE IF NOT EXISTS blobs (digest TEXT PRIMARY KEY, "
+        "codec TEXT, size INTEGER, raw_size INTEGER)",
+    )
+
+    def __init__(
+        self,
+        path: str | Path,
+        max_size_mb: float = 1024,
+        level: int = 10,
+        enabled: bool = True,
+    ) -> None:
+        """
+        Args:
+            path (str | Path): Directory of the archive.
+            max_size_mb (float, optional): Maximal size of compressed pages.
+            Defaults to 1024.
+            level (int, optional): Compression level. Defaults to 10.
+            enabled (bool, optional): If False nothing is read or archived.
+            Defaults to True.
+        """
+        super().__init__(Path(path).joinpath("index.sqlite"))
+        self.path = Path(path)
+        self.max_size_bytes = int(max_size_mb * 1024**2)
+        self.level = level
+        self.enabled = enabled
+        self.codec = "zstd" if zstandard is not None else "zlib"
+        self.counters = {"hits": 0, "misses": 0}
+        self._size_bytes = None
+
+    def get(self, url: str) -> DownloadResult | None:
+        """Returns archived response of `url` or None if it was never archived."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT pages.url, status, headers, pages.digest, codec FROM pages "
+                "JOIN blobs ON pages.digest = blobs.digest WHERE key = ?",
+                (normalize_url(url),),
+            ).fetchone()
+            html = None
+            if row is not None:
+                html = self._read_blob(row[3], row[4])
+            if html is None:
+                self.counters["misses"] += 1
+                return None
+            connection.execute(
+                "UPDATE pages SET last_access = ? WHERE key = ?",
+                (time.time(), normalize_url(url)),
+            )
+            connection.commit()
+            self.counters["hits"] += 1
+        archived_url, status, headers, _, _ = row
+        return DownloadResult(archived_url, status, html, json.loads(headers), 0.0)
+
+    def put(self, result: DownloadResult) -> None:
+        """Archives a successful download and evicts old pages if over size limit."""
+        if not self.enabled or not result.ok:
+            return
+        raw = result.html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            connection = self._connect()
+            if (
+                connection.execute(
+                    "SELECT 1 FROM blobs WHERE digest = ?", (digest,)
+                ).fetchone()
+                is None
+            ):
+                data = self._compress(raw)
+                blob_path = self._blob_path(digest)
+                blob_path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = blob_path.with_suffix(".tmp")
+                tmp_path.write_bytes(data)
+                os.replace(tmp_path, blob_path)
+                connection.execute(
+                    "INSERT INTO blobs (digest, codec, size, raw_size) "
+                    "VALUES (?, ?, ?, ?)",
+                    (digest, self.codec, len(data), len(raw)),
+                )
+                self._size_bytes += len(data)
+            now = time.time()
+            connection.execute(
+                "INSERT OR REPLACE INTO pages "
+                "(key, url, digest, status, headers, fetched_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    normalize_url(result.url),
+                    result.url,
+                    digest,
+                    result.status,
+                    json.dumps(result.headers),
+                    now,
+                    now,
+                ),
+            )
+            self._evict(connection)
+            connection.commit()
+
+    def urls(self) -> list[str]:
+        """Returns URLs of all archived pages, most recently fetched first."""
+        with self._lock:
+            return [
+                row[0]
+                for row in self._connect().execute(
+                    "SELECT url FROM pages ORDER BY fetched_at DESC"
+                )
+            ]
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters, number of archived pages and stored (deduplicated)
+        pages, their raw and compressed size in bytes.
+        """
+        with self._lock:
+            connection = self._connect()
+            pages = connection.execute("SELECT COUNT(*) FROM pages").fetchone()[0]
+            blobs, raw_size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM blobs"
+            ).fetchone()
+            return {
+                **self.counters,
+                "pages": pages,
+                "blobs": blobs,
+                "raw_size": raw_size,
+                "size": self._size_bytes,
+            }
+
+    def clear(self) -> None:
+        """Removes all archived pages and resets counters."""
+        with self._lock:
+            connection = self._connect()
+            digests = [row[0] for row in connection.execute("SELECT digest FROM blobs")]
+            connection.execute("DELETE FROM pages")
+            connection.execute("DELETE FROM blobs")
+            connection.commit()
+            for digest in digests:
+                self._blob_path(digest).unlink(missing_ok=True)
+            self._size_bytes = 0
+            self.counters = {"hits": 0, "misses": 0}
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.path.joinpath("objects", digest[:2], digest[2:])
+
+    def _compress(self, raw: bytes) -> bytes:
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=self.level).compress(raw)
+        return zlib.compress(raw, min(self.level, 9))
+
+    def _read_blob(self, digest: str, codec: str) -> str | None:
+        try:
+            data = self._blob_path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+        if codec == "zstd":
+            if zstandard is None:
+                logger.warning("Archived page compressed with zstd, install zstandard")
+                return None
+            raw = zstandard.ZstdDecompressor().decompress(data)
+        else:
+            raw = zlib.decompress(data)
+        return raw.decode("utf-8")
+
+    def _on_connect(self, connection: sqlite3.Connection) -> None:
+        self._size_bytes = connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM blobs"
+        ).fetchone()[0]
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        if self._size_bytes <= self.max_size_bytes:
+            return
+        evicted = 0
+        for key, digest in connection.execute(
+            "SELECT key, digest FROM pages ORDER BY last_access"
+        ).fetchall():
+            if self._size_bytes <= self.max_size_bytes:
+                break
+            connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+            evicted += 1
+            # a page stored under other URLs is kept until all of them are evicted
+            if connection.execute(
+                "SELECT 1 FROM pages WHERE digest = ?", (digest,)
+            ).fetchone():
+                continue
+            size = connection.execute(
+                "SELECT size FROM blobs WHERE digest = ?", (digest,)
+            ).fetchone()[0]
+            connection.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            self._blob_path(digest).unlink(missing_ok=True)
+            self._size_bytes -= size
+        logger.info(f"{evicted} pages evicted from HTML archive")
+
+
+html_archive = HtmlArchive(
+    path=config.get("archive", {}).get("path", ".cache/html"),
+    max_size_mb=config.get("archive", {}).get("max_size_mb", 1024),
+    level=config.get("archive", {}).get("level", 10),
+    enabled=config.get("archive", {}).get("enabled", True),
+)
@@ -0,0 +1,281 @@
+"""
+Near-duplicate detection of scraped articles. Every article text gets a MinHash
+signature of its word shingles; signatures of recent articles are kept in an LSH index
+on disk, split into bands so that only articles sharing a band with a new one are
+compared with it. CNN publishes the same story under several URLs (live updates,
+re-edits, regional variants), which are found here before they are rewritten.
+Articles still being processed are reserved in memory under the same bands, so copies
+of a story within one run are found as well.
+"""
+import hashlib
+import re
+import threading
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+import numpy as np
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+from src.utilities.sqlite_store import SqliteStore
+from src.utilities.utils import normalize_url
+
+# Mersenne prime modulus of the permutations; 32-bit shingle hashes times coefficients
+# below it fit in uint64
+_PRIME = (1 << 31) - 1
+_WORD = re.compile(r"\w+")
+
+config = load_config()
+
+
+class Duplicate(NamedTuple):
+    url: str
+    similarity: float
+
+
+class MinHasher:
+    """MinHash signatures of texts over word shingles."""
+
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        """
+        Args:
+            num_perm (int, optional): Number of hash permutations (signature length).
+            Defaults to 128.
+            shingle_size (int, optional): Number of words in a shingle. Defaults to 5.
+            seed (int, optional): Seed of permutation coefficients. Signatures made
+            with different seeds are not comparable. Defaults to 1.
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        generator = np.random.default_rng(seed)
+        self._a = generator.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = generator.integers(0, _PRIME, num_perm, dtype=np.uint64)
+
+    def shingles(self, text: str) -> set[str]:
+        """Returns sets of `shingle_size` consecutive lowercase words of a text."""
+        words = _WORD.findall(text.lower())
+        if len(words) <= self.shingle_size:
+            return {" ".join(words)} if words else set()
+        return {
+            " ".join(words[i : i + self.shingle_size])
+            for i in range(len(words) - self.shingle_size + 1)
+        }
+
+    def signature(self, text: str) -> np.ndarray:
+        """Returns the MinHash signature of a text, `num_perm` unsigned integers."""
+        hashes = np.fromiter(
+            (
+                int.from_bytes(
+                    hashlib.blake2b(shingle.encode(), digest_size=4).digest(), "little"
+                )
+                for shingle in self.shingles(text)
+            ),
+            dtype=np.uint64,
+        )
+        if hashes.size == 0:
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        permuted = (np.outer(self._a, hashes) + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1)
+
+    @staticmethod
+    def similarity(first: np.ndarray, second: np.ndarray) -> float:
+        """Returns estimated Jaccard similarity of texts of two signatures."""
+        return float(np.mean(first == second))
+
+
+class NearDuplicateIndex(SqliteStore):
+    """
+    LSH index of signatures of recent articles, stored in SQLite and keyed by
+    normalized URL. A signature is split into `bands` bands; articles sharing the
+    hash of any band are candidates, compared by their full signatures.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS articles (key TEXT PRIMARY KEY, signature BLOB, "
+        "added_at REAL)",
+        "CREATE TABLE IF NOT EXISTS bands (band INTEGER, hash TEXT, key TEXT)",
+        "CREATE INDEX IF NOT EXISTS bands_hash ON bands (band, hash)",
+        "CREATE INDEX IF NOT EXISTS bands_key ON bands (key)",
+    )
+
+    def __init__(
+        self,
+        path: str | Path,
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 32,
+        max_age_days: float = 7,
+    ) -> None:
+        """
+        Args:
+            path (str | Path): Path of the SQLite file.
+            threshold (float, optional): Minimal similarity of a near duplicate.
+            Defaults to 0.8.
+            num_perm (int, optional): Signature length. Defaults to 128.
+            bands (int, optional): Number of LSH bands, has to divide `num_perm`.
+            More bands find less similar candidates. Defaults to 32.
+            max_age_days (float, optional): Days an article is kept in the index.
+            Defaults to 7.
+        """
+        if num_perm % bands:
+            raise ValueError("bands should divide num_perm")
+        super().__init__(path)
+        self.path = Path(path)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_age_days = max_age_days
+        self.hasher = MinHasher(num_perm=num_perm)
+        self.counters = {"checked": 0, "duplicates": 0, "candidates": 0}
+        self._check_lock = threading.Lock()
+        # signatures of articles being processed, not yet added, by normalized URL
+        self._reserved: dict[str, np.ndarray] = {}
+        self._reserved_bands: dict[tuple[int, str], set[str]] = {}
+
+    def check(self, url: str, text: str) -> Duplicate | None:
+        """
+        Returns the most similar indexed or reserved article if the article is its
+        near duplicate. Otherwise reserves the article's signature in memory, so that
+        its near duplicates are found while it is processed, and returns None; the
+        reservation lasts until the article is added (e.g. once saved) or released
+        (e.g. if it failed). Articles checked at the same time are checked one after
+        another, so the first of two duplicates is kept.
+        """
+        signature = self.hasher.signature(text)
+        with self._check_lock:
+            duplicate = self.find_signature(url, signature)
+            if duplicate is None:
+                self._reserve(normalize_url(url), signature)
+        return duplicate
+
+    def release(self, url: str) -> None:
+        """Drops the reservation of an article which will not be added."""
+        key = normalize_url(url)
+        with self._lock:
+            signature = self._reserved.pop(key, None)
+            if signature is None:
+                return
+            for band in self._band_keys(signature):
+                keys = self._reserved_bands[band]
+                keys.discard(key)
+                if not keys:
+                    del self._reserved_bands[band]
+
+    def find(self, url: str, text: str) -> Duplicate | None:
+        """Returns the most similar other indexed or reserved article above threshold."""
+        return self.find_signature(url, self.hasher.signature(text))
+
+    def find_signature(self, url: str, signature: np.ndarray) -> Duplicate | None:
+        key = normalize_url(url)
+        band_params = self._band_params(signature)
+        with self._lock:
+            connection = self._connect()
+            # every band condition is looked up in the (band, hash) index
+            bands = " OR ".join("(b.band = ? AND b.hash = ?)" for _ in range(self.bands))
+            candidates = {
+                other: np.frombuffer(blob, dtype=np.uint64)
+                for other, blob in connection.execute(
+                    "SELECT DISTINCT a.key, a.signature FROM bands b "
+                    f"JOIN articles a ON a.key = b.key WHERE ({bands}) "
+                    "AND a.key != ? AND a.added_at >= ?",
+                    (*band_params, key, self._oldest()),
+                )
+            }
+            for band in zip(band_params[::2], band_params[1::2]):
+                # reserved articles are in memory, looked up by the same band hashes
+                for other in self._reserved_bands.get(band, ()):
+                    if other != key:
+                        candidates[other] = self._reserved[other]
+            self.counters["checked"] += 1
+            self.counters["candidates"] += len(candidates)
+        best = None
+        for other, other_signature in candidates.items():
+            similarity = MinHasher.similarity(signature, other_signature)
+            if similarity >= self.threshold and (
+                best is None or similarity > best.similarity
+            ):
+                best = Duplicate(other, similarity)
+        if best is not None:
+            with self._lock:
+                self.counters["duplicates"] += 1
+        return best
+
+    def add(self, url: str, text: str) -> None:
+        """Indexes an article, replacing its earlier signature and its reservation."""
+        self.add_signature(url, self.hasher.signature(text))
+
+    def add_signature(self, url: str, signature: np.ndarray) -> None:
+        key = normalize_url(url)
+        band_params = self._band_params(signature)
+        with self._lock:
+            connection = self._connect()
+            connection.execute("DELETE FROM bands WHERE key = ?", (key,))
+            connection.execute(
+                "INSERT OR REPLACE INTO articles (key, signature, added_at) "
+                "VALUES (?, ?, ?)",
+                (key, signature.astype(np.uint64).tobytes(), time.time()),
+            )
+            connection.executemany(
+                "INSERT INTO bands (band, hash, key) VALUES (?, ?, ?)",
+                [
+                    (band_params[2 * band], band_params[2 * band + 1], key)
+                    for band in range(self.bands)
+                ],
+            )
+            connection.commit()
+        self.release(url)
+
+    def prune(self) -> int:
+        """Removes articles older than `max_age_days`, returns their number."""
+        with self._lock:
+            connection = self._connect()
+            oldest = self._oldest()
+            connection.execute(
+                "DELETE FROM bands WHERE key IN "
+                "(SELECT key FROM articles WHERE added_at < ?)",
+                (oldest,),
+            )
+            removed = connection.execute(
+                "DELETE FROM articles WHERE added_at < ?", (oldest,)
+            ).rowcount
+            connection.commit()
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Returns numbers of checked articles, compared candidates and duplicates, and
+        the number of reserved articles.
+        """
+        with self._lock:
+            return {**self.counters, "reserved": len(self._reserved)}
+
+    def _reserve(self, key: str, signature: np.ndarray) -> None:
+        with self._lock:
+            self._reserved[key] = signature
+            for band in self._band_keys(signature):
+                self._reserved_bands.setdefault(band, set()).add(key)
+
+    def _band_keys(self, signature: np.ndarray) -> list[tuple[int, str]]:
+        params = self._band_params(signature)
+        return list(zip(params[::2], params[1::2]))
+
+    def _band_params(self, signature: np.ndarray) -> list:
+        params = []
+        for band in range(self.bands):
+            rows = signature[band * self.rows : (band + 1) * self.rows]
+            params += [band, hashlib.blake2b(rows.tobytes(), digest_size=8).hexdigest()]
+        return params
+
+    def _oldest(self) -> float:
+        return time.time() - self.max_age_days * 86400
+
+
+near_duplicates = NearDuplicateIndex(
+    config.get("dedup", {}).get("path", ".cache/near_duplicates.sqlite"),
+    threshold=config.get("dedup", {}).get("threshold", 0.8),
+    num_perm=config.get("dedup", {}).get("num_perm", 128),
+    bands=config.get("dedup", {}).get("bands", 32),
+    max_age_days=config.get("dedup", {}).get("max_age_days", 7),
+)
@@ -0,0 +1,344 @@
+"""
+Ingest pipeline of `run_daily` and `main.py`: scrape → rewrite → detect topic → save,
+with items being (record, AI_Writer) tuples. Articles are downloaded while others are
+rewritten; with more than one worker, rewriting and topic detection run in forked
+worker processes sharing preloaded models. Given a job store, outputs of every stage
+are checkpointed and articles resume at their first unfinished stage. Near duplicates
+of recently saved articles, or of articles in process, are dropped before they reach
+the models.
+"""
+from functools import partial
+from typing import Callable
+
+import repackage
+
+repackage.up(2)
+from src.ai.ai_writer import AI_Writer, Filter
+from src.ai.worker_pool import InferencePool
+from src.config.config import load_config
+from src.news.records import HeadlineRecord
+from src.parsers import article_parser
+from src.parsers.near_duplicates import Duplicate, NearDuplicateIndex
+from src.pipeline.jobs import FINISHED_STATES, JobStore
+from src.pipeline.pipeline import Pipeline, Stage
+
+config = load_config()
+
+
+def build_ingest_pipeline(
+    save: Callable,
+    mode: str = "local",
+    batch_size: int | None = None,
+    profile: str | None = None,
+    offline: bool = False,
+    skip_videos: bool = False,
+    skip_short: bool = False,
+    pool: InferencePool | None = None,
+    jobs: JobStore | None = None,
+    duplicates: NearDuplicateIndex | None = None,
+    on_duplicate: Callable[[HeadlineRecord, Duplicate], None] | None = None,
+    save_batch_size: int | None = None,
+) -> Pipeline:
+    """
+    Builds the ingest pipeline. Stage concurrency is set in the `pipeline` section of
+    config: `scrape_workers` (8), `rewrite_workers` (number of pool workers, 1
+    without a pool), `topic_batch_size` (8) and `save_workers` (1).
+
+    Args:
+        save (Callable): Function saving a (record, AI_Writer) tuple, run on a
+        thread. With `save_batch_size` it takes and returns lists of tuples.
+        mode (str, optional): AI_Writer mode. Defaults to "local".
+        batch_size (int | None, optional): Paraphraser batch size. Defaults to None.
+        profile (str | None, optional): Paraphraser decoding profile. Defaults to None.
+        offline (bool, optional): Whether to parse articles only from the HTML
+        archive. Defaults to False.
+        skip_videos (bool, optional): Whether to drop articles whose NewsAPI content
+        mentions a video. Defaults to False.
+        skip_short (bool, optional): Whether to drop articles shorter than 3
+        sentences. Defaults to False.
+        pool (InferencePool | None, optional): Pool to rewrite and detect topics in.
+        It has to be started before the pipeline is run. If None models run on
+        threads of this process. Defaults to None.
+        jobs (JobStore | None, optional): Job store to checkpoint stage outputs in
+        and resume articles from. Defaults to None.
+        duplicates (NearDuplicateIndex | None, optional): Index of recent articles
+        whose near duplicates are dropped after scraping. Articles are reserved in
+        memory while they are processed and indexed once they are saved. Defaults
+        to None.
+        on_duplicate (Callable[[HeadlineRecord, Duplicate], None] | None, optional):
+        Function called with every dropped near duplicate and its indexed original,
+        e.g. to update the original article. Defaults to None.
+        save_batch_size (int | None, optional): If set, `save` is called with lists
+        of up to `save_batch_size` items, e.g. to write them in one transaction.
+        Defaults to None.
+
+    Returns:
+        Pipeline: Pipeline to run over `HeadlineRecord`s.
+    """
+    settings = config.get("pipeline", {})
+    rewrite_workers = settings.get("rewrite_workers", pool.workers if pool else 1)
+    hooks = {}
+    if jobs is not None or duplicates is not None:
+        hooks = {
+            stage: {
+                "on_result": partial(on_stage_result, jobs, duplicates, stage),
+                "on_error": partial(on_stage_error, jobs, duplicates, stage),
+            }
+            for stage in STAGE_STATES
+        }
+    return Pipeline(
+        [
+            Stage(
+                "scrape",
+                partial(
+                    scrape,
+                    mode=mode,
+                    batch_size=batch_size,
+                    profile=profile,
+                    offline=offline,
+                    skip_videos=skip_videos,
+                    skip_short=skip_short,
+                    jobs=jobs,
+                    duplicates=duplicates,
+                    on_duplicate=on_duplicate,
+                ),
+                workers=settings.get("scrape_workers", 8),
+                **hooks.get("scrape", {}),
+            ),
+            Stage(
+                "rewrite",
+                rewrite,
+                workers=rewrite_workers,
+                pool=pool,
+                **hooks.get("rewrite", {}),
+            ),
+            Stage(
+                "topic",
+                detect_topics,
+                batch_size=settings.get("topic_batch_size", 8),
+                # wait for a fuller batch, inference of a batch takes seconds anyway
+                max_wait=1.0,
+                pool=pool,
+                **hooks.get("topic", {}),
+            ),
+            Stage(
+                "save",
+                save,
+                workers=settings.get("save_workers", 1),
+                batch_size=save_batch_size,
+                # articles come seconds apart, so a batch is worth waiting for
+                max_wait=1.0,
+                **hooks.get("save", {}),
+            ),
+        ]
+    )
+
+
+def scrape(
+    record: HeadlineRecord,
+    mode: str = "local",
+    batch_size: int | None = None,
+    profile: str | None = None,
+    offline: bool = False,
+    skip_videos: bool = False,
+    skip_short: bool = False,
+    jobs: JobStore | None = None,
+    duplicates: NearDuplicateIndex | None = None,
+    on_duplicate: Callable[[HeadlineRecord, Duplicate], None] | None = None,
+) -> tuple[HeadlineRecord, AI_Writer] | None:
+    """
+    Downloads (or reads from archive) and filters an article of a record. If the
+    record has a job past scraping, the article is restored from the job instead.
+    Near duplicates of articles in `duplicates` are dropped; the article itself is
+    reserved there until it is saved or dropped (see `track_duplicate`).
+
+    Raises:
+        ValueError: If the article could not be downloaded.
+    """
+    if jobs is not None:
+        job = jobs.start(record)
+        if job["state"] in FINISHED_STATES:
+            return None
+        if job["state"] != "pending":
+            return record, restore_ai_writer(job, mode, batch_size, profile)
+    # filter out Videos: if 'content' from endpoint /top_headlines contains a video,
+    # omit this article
+    if skip_videos and record.content and Filter.contains_video(record.content):
+        return None
+    headline, article = article_parser.get_original_article_text(
+        record.url, record.title, offline=offline
+    )
+    if not article:
+        raise ValueError(f"Article {record.url} could not be downloaded")
+    if skip_short and Filter.is_too_short_text(article):
+        return None
+    if duplicates is not None:
+        # e.g. live updates or a regional variant of a story saved or in process
+        duplicate = duplicates.check(record.url, article)
+        if duplicate is not None:
+            if on_duplicate is not None:
+                on_duplicate(record, duplicate)
+            return None
+    ai_writer = AI_Writer(
+        headline=headline,
+        article=article,
+        mode=mode,
+        batch_size=batch_size,
+        profile=profile,
+    )
+    return record, ai_writer
+
+
+def rewrite(item: tuple[HeadlineRecord, AI_Writer]) -> tuple[HeadlineRecord, AI_Writer]:
+    """Rewrites headline and article of an item, unless restored rewritten."""
+    if item[1].rewritten_article is None:
+        item[1].rewrite_headline_and_article()
+    return item
+
+
+def detect_topics(items: list[tuple]) -> list[tuple]:
+    """Detects topics (and image URIs) of a batch of items not yet classified."""
+    # either a topic or an image URI is found for every classified article
+    ai_writers = [
+        ai_writer
+        for _, ai_writer in items
+        if ai_writer.topic is None and ai_writer.uri is None
+    ]
+    if not ai_writers:
+        return items
+    results = AI_Writer.detect_topics(
+        [ai_writer.article for ai_writer in ai_writers], mode=ai_writers[0].mode
+    )
+    for ai_writer, result in zip(ai_writers, results):
+        ai_writer.topic, ai_writer.uri = result["topic"], result["uri"]
+        ai_writer.per_entities = result["per_entities"]
+    return items
+
+
+def restore_ai_writer(
+    job: dict, mode: str, batch_size: int | None, profile: str | None
+) -> AI_Writer:
+    """Returns AI_Writer with outputs of the finished stages of a job."""
+    ai_writer = AI_Writer(
+        headline=job["headline"],
+        article=job["article"],
+        mode=mode,
+        batch_size=batch_size,
+        profile=profile,
+    )
+    for output in (
+        "rewritten_headline",
+        "rewritten_article",
+        "per_entities",
+        "topic",
+        "uri",
+        "author",
+    ):
+        if job[output] is not None:
+            setattr(ai_writer, output, job[output])
+    return ai_writer
+
+
+def model_seconds_saved(stats: dict[str, dict], skipped: int) -> float | None:
+    """
+    Estimates seconds of model inference saved by skipping articles, from time spent
+    per article in the rewrite and topic stages of a run (see `Pipeline.stats`).
+    Returns None if no article was rewritten in the run.
+    """
+    if not stats["rewrite"]["items"]:
+        return None
+    per_article = stats["rewrite"]["busy_s"] / stats["rewrite"]["items"]
+    if stats["topic"]["items"]:
+        per_article += stats["topic"]["busy_s"] / stats["topic"]["items"]
+    return round(skipped * per_article, 1)
+
+
+# state a job has to be in before a stage and the state it moves to after it
+STAGE_STATES = {
+    "scrape": ("pending", "scraped"),
+    "rewrite": ("scraped", "rewritten"),
+    "topic": ("rewritten", "classified"),
+    "save": ("classified", "saved"),
+}
+
+
+def checkpoint(jobs: JobStore, stage: str, item, result: tuple | None) -> None:
+    """Stores outputs of a stage in the job of an item that went through it."""
+    record = item if stage == "scrape" else item[0]
+    before, after = STAGE_STATES[stage]
+    job = jobs.get(record.url)
+    # a restored item goes through the stages it had already finished
+    if job is None or job["state"] != before:
+        return
+    if result is None:
+        # filtered out (e.g. a video), not worth retrying
+        if stage == "scrape":
+            jobs.advance(record.url, "skipped")
+        return
+    ai_writer = result[1]
+    outputs = {
+        "scrape": {
+            "headline": ai_writer.headline,
+            "article": ai_writer.article,
+            "author": ai_writer.author,
+        },
+        "rewrite": {
+            "rewritten_headline": ai_writer.rewritten_headline,
+            "rewritten_article": ai_writer.rewritten_article,
+        },
+        "topic": {
+            "topic": ai_writer.topic,
+            "uri": ai_writer.uri,
+            "per_entities": ai_writer.per_entities,
+        },
+        "save": {},
+    }[stage]
+    jobs.advance(record.url, after, **outputs)
+
+
+def mark_failed(jobs: JobStore, stage: str, item, error: Exception) -> None:
+    """Marks the job of an item failed in a stage."""
+    record = item if stage == "scrape" else item[0]
+    jobs.fail(record.url, f"{stage}: {type(error).__name__}: {error}")
+
+
+def track_duplicate(
+    duplicates: NearDuplicateIndex, stage: str, item, result: tuple | None
+) -> None:
+    """
+    Indexes the article of a saved item and releases the reservation of an item
+    dropped in a stage, so that only saved articles are matched in later runs.
+    """
+    record = item if stage == "scrape" else item[0]
+    if result is None:
+        duplicates.release(record.url)
+    elif stage == "save":
+        duplicates.add(record.url, item[1].article)
+
+
+def on_stage_result(
+    jobs: JobStore | None,
+    duplicates: NearDuplicateIndex | None,
+    stage: str,
+    item,
+    result: tuple | None,
+) -> None:
+    """Checkpoints an item that went through a stage and tracks its duplicates."""
+    if jobs is not None:
+        checkpoint(jobs, stage, item, result)
+    if duplicates is not None:
+        track_duplicate(duplicates, stage, item, result)
+
+
+def on_stage_error(
+    jobs: JobStore | None,
+    duplicates: NearDuplicateIndex | None,
+    stage: str,
+    item,
+    error: Exception,
+) -> None:
+    """Marks the job of an item failed in a stage and releases its reservation."""
+    if jobs is not None:
+        mark_failed(jobs, stage, item, error)
+    if duplicates is not None:
+        duplicates.release((item if stage == "scrape" else item[0]).url)
@@ -0,0 +1,197 @@
+"""
+Job table of ingest runs. Every article is a job moving through the states of
+`TRANSITIONS`, with the outputs of every finished stage (scraped text, rewritten
+headline and body, named entities, topic, image) stored in SQLite, so that a rerun
+resumes an article at its first unfinished stage and failed articles can be retried.
+"""
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+from src.news.records import HeadlineRecord
+from src.utilities.sqlite_store import SqliteStore
+from src.utilities.utils import normalize_url
+
+# states a job may move to from every state; "failed" jobs go back to the state they
+# failed in when retried
+TRANSITIONS = {
+    "pending": ("scraped", "skipped", "failed"),
+    "scraped": ("rewritten", "failed"),
+    "rewritten": ("classified", "failed"),
+    "classified": ("saved", "failed"),
+    "saved": (),
+    "skipped": (),
+    "failed": ("pending", "scraped", "rewritten", "classified"),
+}
+# stage outputs stored with a job
+OUTPUTS = (
+    "headline",
+    "article",
+    "rewritten_headline",
+    "rewritten_article",
+    "per_entities",
+    "topic",
+    "uri",
+    "author",
+)
+FINISHED_STATES = ("saved", "skipped", "failed")
+
+config = load_config()
+
+
+class JobStore(SqliteStore):
+    """SQLite table of jobs keyed by normalized article URL."""
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS jobs (key TEXT PRIMARY KEY, record TEXT, "
+        "state TEXT, failed_state TEXT, error TEXT, attempts INTEGER, "
+        f"{', '.join(f'{output} TEXT' for output in OUTPUTS)}, "
+        "created_at REAL, updated_at REAL)",
+        "CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state)",
+    )
+    ROW_FACTORY = sqlite3.Row
+
+    def __init__(self, path: str | Path) -> None:
+        """
+        Args:
+            path (str | Path): Path of the SQLite file.
+        """
+        super().__init__(path)
+        self.path = Path(path)
+
+    def start(self, record: HeadlineRecord) -> dict:
+        """Returns the job of a record, creating a pending one if there is none."""
+        with self._lock:
+            connection = self._connect()
+            now = time.time()
+            connection.execute(
+                "INSERT OR IGNORE INTO jobs (key, record, state, attempts, created_at, "
+                "updated_at) VALUES (?, ?, 'pending', 0, ?, ?)",
+                (normalize_url(record.url), json.dumps(record._asdict()), now, now),
+            )
+            connection.commit()
+        return self.get(record.url)
+
+    def get(self, url: str) -> dict | None:
+        """Returns the job of an article URL or None if there is none."""
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT * FROM jobs WHERE key = ?", (normalize_url(url),))
+                .fetchone()
+            )
+        return None if row is None else self._to_job(row)
+
+    def advance(self, url: str, state: str, **outputs) -> None:
+        """
+        Moves a job to a state and stores outputs of the finished stage.
+
+        Args:
+            url (str): Article URL.
+            state (str): New state, allowed by `TRANSITIONS`.
+            **outputs: Stage outputs, keys from `OUTPUTS`.
+
+        Raises:
+            ValueError: If there is no job of `url`, the transition is not allowed
+            or an output is unknown.
+        """
+        unknown = set(outputs) - set(OUTPUTS)
+        if unknown:
+            raise ValueError(f"Unknown job outputs: {sorted(unknown)}")
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute(
+                "SELECT state FROM jobs WHERE key = ?", (normalize_url(url),)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"No job of {url}")
+            if state not in TRANSITIONS[row[0]]:
+                raise ValueError(f"Job of {url} cannot move from {row[0]} to {state}")
+            values = {
+                key: json.dumps(value, default=float) if key == "per_entities" else value
+                for key, value in outputs.items()
+            }
+            assignments = "".join(f", {key} = ?" for key in values)
+            connection.execute(
+                f"UPDATE jobs SET state = ?, updated_at = ?{assignments} WHERE key = ?",
+                (state, time.time(), *values.values(), normalize_url(url)),
+            )
+            connection.commit()
+
+    def fail(self, url: str, error: str) -> None:
+        """Marks a job failed, remembering the state it failed in and the error."""
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "UPDATE jobs SET failed_state = state, state = 'failed', error = ?, "
+                "attempts = attempts + 1, updated_at = ? "
+                "WHERE key = ? AND state NOT IN ('saved', 'skipped', 'failed')",
+                (error, time.time(), normalize_url(url)),
+            )
+            connection.commit()
+
+    def retry(self, url: str) -> None:
+        """Moves a failed job back to the state it failed in."""
+        job = self.get(url)
+        if job is None or job["state"] != "failed":
+            raise ValueError(f"Job of {url} has not failed")
+        self.advance(url, job["failed_state"])
+
+    def resume(self, records: list[HeadlineRecord]) -> list[HeadlineRecord]:
+        """
+        Returns `records` followed by records of unfinished jobs of earlier runs that
+        are not among them.
+        """
+        keys = {normalize_url(record.url) for record in records}
+        return records + [
+            job["record"] for job in self.unfinished() if job["key"] not in keys
+        ]
+
+    def retry_failed(self) -> list[HeadlineRecord]:
+        """Moves all failed jobs back to the states they failed in, returns records."""
+        jobs = self.failed()
+        for job in jobs:
+            self.retry(job["record"].url)
+        return [job["record"] for job in jobs]
+
+    def unfinished(self) -> list[dict]:
+        """Returns jobs that are neither saved, skipped nor failed, oldest first."""
+        return self._select(
+            "state NOT IN (?, ?, ?) ORDER BY created_at", FINISHED_STATES
+        )
+
+    def failed(self) -> list[dict]:
+        """Returns failed jobs, oldest first."""
+        return self._select("state = 'failed' ORDER BY created_at", ())
+
+    def counts(self) -> dict[str, int]:
+        """Returns number of jobs in every state."""
+        with self._lock:
+            return dict(
+                self._connect().execute("SELECT state, COUNT(*) FROM jobs GROUP BY state")
+            )
+
+    def _select(self, condition: str, params: tuple) -> list[dict]:
+        with self._lock:
+            rows = (
+                self._connect()
+                .execute(f"SELECT * FROM jobs WHERE {condition}", params)
+                .fetchall()
+            )
+        return [self._to_job(row) for row in rows]
+
+    @staticmethod
+    def _to_job(row: sqlite3.Row) -> dict:
+        job = dict(row)
+        job["record"] = HeadlineRecord(**json.loads(job["record"]))
+        if job["per_entities"] is not None:
+            job["per_entities"] = json.loads(job["per_entities"])
+        return job
+
+
+job_store = JobStore(config.get("pipeline", {}).get("jobs_path", ".cache/jobs.sqlite"))
@@ -0,0 +1,238 @@
+"""
+Ledger of article URLs that were already published, checked before an article is
+downloaded or rewritten. An in-memory Bloom filter rebuilt from the stored URLs at
+startup answers most checks without touching the database: a URL it has never seen is
+new for sure, and only the URLs it reports as seen are confirmed by an exact lookup.
+Published URLs can be mirrored to the BigQuery table created by
+`BQ_Handler.create_small_temp_table`.
+"""
+import hashlib
+import math
+import time
+from pathlib import Path
+from typing import Callable, Iterable
+
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+from src.news.records import HeadlineRecord
+from src.utilities.sqlite_store import SqliteStore
+from src.utilities.utils import CustomLogger, normalize_url
+
+config = load_config()
+logger = CustomLogger(Path(__file__).name)
+
+
+class BloomFilter:
+    """Bloom filter of strings with bit array sized for a capacity and error rate."""
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 0.001) -> None:
+        """
+        Args:
+            capacity (int, optional): Number of keys the error rate holds for.
+            Defaults to 100_000.
+            error_rate (float, optional): Probability of a false positive at full
+            capacity. Defaults to 0.001.
+        """
+        if capacity < 1:
+            raise ValueError("capacity should be a positive integer")
+        if not 0 < error_rate < 1:
+            raise ValueError("error_rate should be between 0 and 1")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _positions(self, key: str) -> list[int]:
+        # double hashing: k positions from two 64-bit halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+
+class SeenUrlLedger(SqliteStore):
+    """
+    Published article URLs (normalized) behind a Bloom filter. URLs are stored in a
+    SQLite table of the ledger unless `urls` and `lookup` point to another store,
+    e.g. the `source_url` column of Django's `Article`.
+    """
+
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS urls (url TEXT PRIMARY KEY, headline TEXT, "
+        "added_at REAL)",
+    )
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        urls: Callable[[], Iterable[str]] | None = None,
+        lookup: Callable[[str], bool] | None = None,
+        capacity: int = 100_000,
+        error_rate: float = 0.001,
+        mirror_table: str | None = None,
+    ) -> None:
+        """
+        Args:
+            path (str | Path | None, optional): Path of the SQLite file storing URLs
+            added to the ledger. Required if `urls` and `lookup` are None. Defaults
+            to None.
+            urls (Callable[[], Iterable[str]] | None, optional): Function returning
+            all stored URLs, used to build the Bloom filter. Defaults to None.
+            lookup (Callable[[str], bool] | None, optional): Function telling whether
+            a normalized URL is stored. Defaults to None.
+            capacity (int, optional): Minimal Bloom filter capacity, raised to twice
+            the number of stored URLs. Defaults to 100_000.
+            error_rate (float, optional): Bloom filter false positive rate. Defaults
+            to 0.001.
+            mirror_table (str | None, optional): BigQuery table URLs added to the
+            ledger are appended to on `flush`. Defaults to None.
+        """
+        if (urls is None) != (lookup is None):
+            raise ValueError("urls and lookup should be given together")
+        if urls is None and path is None:
+            raise ValueError("path is required without urls and lookup")
+        super().__init__(path)
+        self.path = None if path is None else Path(path)
+        self.stores_urls = urls is None
+        self._urls = urls or self._stored_urls
+        self._lookup = lookup or self._is_stored
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.mirror_table = mirror_table
+        self.counters = {"checked": 0, "seen": 0, "lookups": 0, "false_positives": 0}
+        self._bloom = None
+        self._pending = []
+
+    def rebuild(self) -> None:
+        """Builds the Bloom filter from all stored URLs."""
+        urls = [normalize_url(url) for url in self._urls()]
+        bloom = BloomFilter(max(self.capacity, 2 * len(urls)), self.error_rate)
+        for url in urls:
+            bloom.add(url)
+        with self._lock:
+            self._bloom = bloom
+        logger.info(f"Seen URL ledger rebuilt with {len(urls)} URLs")
+
+    def seen(self, url: str) -> bool:
+        """Returns True if an article of the URL was already published."""
+        key = normalize_url(url)
+        if self._bloom is None:
+            self.rebuild()
+        with self._lock:
+            self.counters["checked"] += 1
+            if key not in self._bloom:
+                return False
+            self.counters["lookups"] += 1
+        seen = self._lookup(key)
+        with self._lock:
+            self.counters["seen" if seen else "false_positives"] += 1
+        return seen
+
+    def filter_new(self, records: Iterable[HeadlineRecord]) -> list[HeadlineRecord]:
+        """Returns records whose URLs were not published, without duplicates."""
+        keys, new = set(), []
+        for record in records:
+            key = normalize_url(record.url)
+            if key in keys or self.seen(key):
+                continue
+            keys.add(key)
+            new.append(record)
+        return new
+
+    def add(self, url: str, headline: str | None = None) -> None:
+        """
+        Adds a published URL to the Bloom filter, to the ledger's table if it stores
+        URLs itself and to the URLs waiting to be mirrored.
+        """
+        key = normalize_url(url)
+        if self.stores_urls:
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR IGNORE INTO urls (url, headline, added_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, headline, time.time()),
+                )
+                connection.commit()
+        if self._bloom is None:
+            self.rebuild()
+        with self._lock:
+            self._bloom.add(key)
+            if self.mirror_table is not None:
+                self._pending.append({"url": key, "headline": headline})
+
+    def flush(self) -> int:
+        """Appends URLs added since the last flush to the BigQuery mirror table."""
+        with self._lock:
+            rows, self._pending = self._pending, []
+        if not rows:
+            return 0
+        # google-cloud-bigquery is needed only with a mirror
+        import pandas as pd
+
+        from src.gcp.bq_handler import BQ_Handler
+
+        bq_handler = BQ_Handler()
+        bq_handler.add_rows_to_table(
+            dataset_name=bq_handler.dataset_name,
+            table_name=self.mirror_table,
+            data_frame=pd.DataFrame(rows),
+        )
+        return len(rows)
+
+    def stats(self) -> dict:
+        """
+        Returns numbers of checked and already published URLs, exact lookups and
+        Bloom filter false positives, and the number of URLs in the filter.
+        """
+        with self._lock:
+            return {
+                **self.counters,
+                "urls": 0 if self._bloom is None else len(self._bloom),
+            }
+
+    def _stored_urls(self) -> list[str]:
+        with self._lock:
+            return [row[0] for row in self._connect().execute("SELECT url FROM urls")]
+
+    def _is_stored(self, key: str) -> bool:
+        with self._lock:
+            row = (
+                self._connect()
+                .execute("SELECT 1 FROM urls WHERE url = ?", (key,))
+                .fetchone()
+            )
+        return row is not None
+
+
+def mirror_table() -> str | None:
+    """Returns the BigQuery table to mirror published URLs to, if enabled in config."""
+    if not config.get("ledger", {}).get("mirror_to_bigquery", False):
+        return None
+    return config.get("gcp", {}).get("small_temp_table")
+
+
+seen_urls = SeenUrlLedger(
+    path=config.get("ledger", {}).get("path", ".cache/seen_urls.sqlite"),
+    capacity=config.get("ledger", {}).get("capacity", 100_000),
+    error_rate=config.get("ledger", {}).get("error_rate", 0.001),
+    mirror_table=mirror_table(),
+)
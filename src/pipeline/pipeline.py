@@ -0,0 +1,287 @@
+"""
+Staged pipeline running every stage concurrently on its own threads. Stages are joined
+by bounded queues, so a slow stage holds back the ones before it instead of letting
+items pile up in memory. I/O-bound stages run their function on threads; CPU-bound
+ones send it to an `InferencePool` of forked worker processes.
+"""
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+import repackage
+
+repackage.up(2)
+from src.utilities.utils import CustomLogger
+
+logger = CustomLogger(Path(__file__).name)
+
+# marks the end of items in a queue
+_STOP = object()
+
+
+class Stage:
+    """
+    Step of a pipeline. Its function takes an item and returns the item for the next
+    stage or None to drop it; with `batch_size` it takes and returns lists of items.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        func: Callable,
+        workers: int = 1,
+        batch_size: int | None = None,
+        max_wait: float = 0.05,
+        queue_size: int | None = None,
+        pool: Any | None = None,
+        skip_errors: bool = True,
+        on_result: Callable[[Any, Any], None] | None = None,
+        on_error: Callable[[Any, Exception], None] | None = None,
+    ) -> None:
+        """
+        Args:
+            name (str): Stage name used in stats and logs.
+            func (Callable): Function applied to every item (or batch of items).
+            workers (int, optional): Number of items (or batches) processed at a
+            time. Defaults to 1.
+            batch_size (int | None, optional): If set, `func` is called with lists of
+            up to `batch_size` items and has to return a list of the same length.
+            Defaults to None.
+            max_wait (float, optional): Seconds to wait for a batch to fill up.
+            Defaults to 0.05.
+            queue_size (int | None, optional): Capacity of the stage's input queue.
+            If None twice the number of items in process. Defaults to None.
+            pool (InferencePool | None, optional): Pool of worker processes to run
+            `func` in, which then has to be a picklable module-level function. If
+            None `func` runs on the stage's threads. Defaults to None.
+            skip_errors (bool, optional): If True an item that raised an exception
+            is logged and dropped, otherwise the pipeline is stopped and the
+            exception re-raised. Defaults to True.
+            on_result (Callable[[Any, Any], None] | None, optional): Function called
+            on the stage's thread with every item and its result (None if dropped),
+            e.g. to checkpoint it. Defaults to None.
+            on_error (Callable[[Any, Exception], None] | None, optional): Function
+            called with every item that raised an exception and the exception.
+            Defaults to None.
+        """
+        if workers < 1:
+            raise ValueError("workers should be a positive integer")
+        self.name = name
+        self.func = func
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.queue_size = queue_size or 2 * workers * (batch_size or 1)
+        self.pool = pool
+        self.skip_errors = skip_errors
+        self.on_result = on_result
+        self.on_error = on_error
+        self.counters = {"items": 0, "dropped": 0, "errors": 0}
+        self.busy = 0.0
+        self._lock = threading.Lock()
+        self._running = 0
+        self._started = None
+        self._finished = None
+
+    def stats(self) -> dict:
+        """
+        Returns numbers of processed, dropped and failed items, seconds spent in the
+        stage's function (summed over workers), seconds from the first item started
+        to the last one finished and items per second of that time.
+        """
+        with self._lock:
+            wall = 0.0
+            if self._started is not None and self._finished is not None:
+                wall = self._finished - self._started
+            return {
+                **self.counters,
+                "busy_s": round(self.busy, 3),
+                "wall_s": round(wall, 3),
+                "items_per_s": round(self.counters["items"] / wall, 2) if wall else 0.0,
+            }
+
+    def _call(self, batch: list) -> list:
+        args = batch if self.batch_size is not None else batch[0]
+        if self.pool is not None:
+            result = self.pool.apply(self.func, args)
+        else:
+            result = self.func(args)
+        if self.batch_size is None:
+            return [result]
+        if len(result) != len(batch):
+            raise ValueError(f"Stage {self.name} returned {len(result)} items")
+        return result
+
+
+class Pipeline:
+    """
+    Chain of stages fed from an iterable. Every stage runs on its own threads, so
+    e.g. downloads of the next articles overlap with inference on the current ones:
+
+        pipeline = Pipeline([Stage("scrape", scrape, workers=8), Stage("save", save)])
+        results = pipeline.run(records)
+        print(pipeline.stats())
+    """
+
+    def __init__(self, stages: list[Stage]) -> None:
+        if not stages:
+            raise ValueError("pipeline needs at least one stage")
+        self.stages = stages
+        self._abort = threading.Event()
+        self._error = None
+        self._queues = []
+
+    def run(self, items: Iterable) -> list:
+        """
+        Runs all items through the stages and waits until the last one is done. On
+        an error of a stage with `skip_errors=False` (or of the source iterable) the
+        stages stop taking new items and the error is re-raised.
+
+        Args:
+            items (Iterable): Items for the first stage, consumed lazily.
+
+        Returns:
+            list: Items returned by the last stage, in order of completion.
+        """
+        self._abort.clear()
+        self._error = None
+        self._queues = [queue.Queue(stage.queue_size) for stage in self.stages]
+        self._queues.append(queue.Queue())
+        threads = [threading.Thread(target=self._feed, args=(items,), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            stage._running = stage.workers
+            threads += [
+                threading.Thread(
+                    target=self._work, args=(index,), name=stage.name, daemon=True
+                )
+                for _ in range(stage.workers)
+            ]
+        for thread in threads:
+            thread.start()
+        results = []
+        try:
+            while True:
+                item = self._get(self._queues[-1])
+                if item is _STOP:
+                    break
+                results.append(item)
+        except BaseException:
+            # e.g. KeyboardInterrupt: let the stages finish their current items
+            self._abort.set()
+            raise
+        finally:
+            for thread in threads:
+                thread.join()
+        if self._error is not None:
+            raise self._error
+        return results
+
+    def stats(self) -> dict[str, dict]:
+        """Returns stats of every stage (see `Stage.stats`) by stage name."""
+        return {stage.name: stage.stats() for stage in self.stages}
+
+    def _feed(self, items: Iterable) -> None:
+        try:
+            for item in items:
+                if not self._put(self._queues[0], item):
+                    return
+        except Exception as e:
+            self._fail(e)
+            return
+        self._put(self._queues[0], _STOP)
+
+    def _work(self, index: int) -> None:
+        stage = self.stages[index]
+        input_queue, output_queue = self._queues[index], self._queues[index + 1]
+        stop = False
+        while not stop and not self._abort.is_set():
+            batch, stop = self._take(stage, input_queue)
+            if batch and not self._process(stage, batch, output_queue):
+                break
+        with stage._lock:
+            stage._running -= 1
+            last = stage._running == 0
+        # the last worker of a stage tells the next stage there are no more items
+        if last:
+            self._put(output_queue, _STOP)
+
+    def _take(self, stage: Stage, input_queue: queue.Queue) -> tuple[list, bool]:
+        item = self._get(input_queue)
+        if item is _STOP:
+            # put the marker back for other workers of the stage
+            self._put(input_queue, _STOP)
+            return [], True
+        batch = [item]
+        if stage.batch_size is not None:
+            deadline = time.monotonic() + stage.max_wait
+            while len(batch) < stage.batch_size:
+                try:
+                    item = input_queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._put(input_queue, _STOP)
+                    return batch, True
+                batch.append(item)
+        return batch, False
+
+    def _process(self, stage: Stage, batch: list, output_queue: queue.Queue) -> bool:
+        start = time.perf_counter()
+        with stage._lock:
+            if stage._started is None:
+                stage._started = start
+        error = None
+        try:
+            results = stage._call(batch)
+        except Exception as e:
+            logger.error(f"Stage {stage.name} failed: {type(e).__name__}: {e}")
+            error, results = e, []
+            if not stage.skip_errors:
+                self._fail(e)
+        end = time.perf_counter()
+        with stage._lock:
+            stage.busy += end - start
+            stage._finished = end
+            stage.counters["items"] += len(batch)
+            stage.counters["errors"] += len(batch) - len(results)
+            stage.counters["dropped"] += sum(result is None for result in results)
+        try:
+            if error is not None and stage.on_error is not None:
+                for item in batch:
+                    stage.on_error(item, error)
+            if stage.on_result is not None:
+                for item, result in zip(batch, results):
+                    stage.on_result(item, result)
+        except Exception as e:
+            # e.g. a checkpoint could not be written, so stop instead of losing work
+            self._fail(e)
+            return False
+        for result in results:
+            if result is not None and not self._put(output_queue, result):
+                return False
+        return not self._abort.is_set()
+
+    def _fail(self, error: Exception) -> None:
+        if self._error is None:
+            self._error = error
+        self._abort.set()
+
+    def _put(self, q: queue.Queue, item: Any) -> bool:
+        # waits for free space (backpressure) unless the pipeline is aborted
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q: queue.Queue) -> Any:
+        while not self._abort.is_set():
+            try:
+                return q.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _STOP
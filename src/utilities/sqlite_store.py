@@ -0,0 +1,48 @@
+"""
+Base of the on-disk stores kept in SQLite files (caches, archives, job and URL
+ledgers). A store declares its tables and indexes in `SCHEMA`; the connection is
+opened lazily, shared by the threads of a process behind `_lock` and reopened after a
+fork.
+"""
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+
+class SqliteStore:
+    """
+    SQLite file with the tables of `SCHEMA`, created on first connection. Subclasses
+    hold `_lock` while they use the connection returned by `_connect`.
+    """
+
+    # "CREATE ... IF NOT EXISTS" statements of tables and indexes, run on every connect
+    SCHEMA: tuple[str, ...] = ()
+    ROW_FACTORY = None
+
+    def __init__(self, database: str | Path | None) -> None:
+        """
+        Args:
+            database (str | Path | None): Path of the SQLite file, its directory is
+            created on first connection. None for a store that never connects.
+        """
+        self.database = None if database is None else Path(database)
+        self._lock = threading.Lock()
+        self._connection = None
+        self._pid = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # a connection must not be shared with forked processes
+        if self._connection is None or self._pid != os.getpid():
+            self.database.parent.mkdir(parents=True, exist_ok=True)
+            connection = sqlite3.connect(self.database, check_same_thread=False)
+            connection.row_factory = self.ROW_FACTORY
+            for statement in self.SCHEMA:
+                connection.execute(statement)
+            self._connection = connection
+            self._pid = os.getpid()
+            self._on_connect(connection)
+        return self._connection
+
+    def _on_connect(self, connection: sqlite3.Connection) -> None:
+        """Reads state kept in memory (e.g. sizes) from a new connection."""
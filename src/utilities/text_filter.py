@@ -0,0 +1,163 @@
+"""
+Compiled text filter applying removals, keyword replacements and detections of an
+article in one scan. All patterns are combined into a single regex of named
+alternatives, matched on word boundaries, so every text is read once regardless of the
+number of patterns.
+"""
+import re
+from functools import lru_cache
+
+import repackage
+
+repackage.up(2)
+from src.config.config import load_config
+
+DEFAULT_REMOVALS = [r"ad(vert(isement)?)?s?"]
+DEFAULT_REPLACEMENTS = {"CNN": "media"}
+DEFAULT_DETECTIONS = {"video": r"videos?"}
+
+config = load_config()
+
+
+def on_word_boundaries(pattern: str) -> str:
+    r"""Returns `pattern` matching whole words only, e.g. "ads" but not "roads"."""
+    return rf"\b(?:{pattern})\b"
+
+
+def first_chars(pattern: str, ignore_case: bool = False) -> str | None:
+    """
+    Returns characters a match of `pattern` starts with if the pattern starts with a
+    required literal word character, None if they are not known.
+    """
+    if "|" in pattern or not re.match(r"\w(?![?*{])", pattern):
+        return None
+    if ignore_case:
+        return pattern[0].lower() + pattern[0].upper()
+    return pattern[0]
+
+
+class TextFilterEngine:
+    """
+    Single-pass filter of texts. Removals are case insensitive regexes, replacements
+    case sensitive keywords and detections case insensitive regexes reported by name.
+    Where patterns overlap, the first one in this order wins.
+    """
+
+    def __init__(
+        self,
+        removals: list[str] | None = None,
+        replacements: dict[str, str] | None = None,
+        detections: dict[str, str] | None = None,
+    ) -> None:
+        """
+        Args:
+            removals (list[str] | None, optional): Regexes of words to remove.
+            Defaults to None.
+            replacements (dict[str, str] | None, optional): Keywords to replace and
+            their replacements, e.g. {"CNN": "media"}. Defaults to None.
+            detections (dict[str, str] | None, optional): Names and regexes of words
+            to detect, e.g. {"video": r"videos?"}. Defaults to None.
+        """
+        self.removals = list(removals or [])
+        self.replacements = dict(replacements or {})
+        self.detections = dict(detections or {})
+        alternatives = []
+        # replacement text or None for a detection, by name of the regex group
+        self._substitutes: dict[str, str | None] = {}
+        self._detected_names: dict[str, str] = {}
+        for pattern in self.removals:
+            group = f"g{len(alternatives)}"
+            alternatives.append(f"(?P<{group}>(?i:{on_word_boundaries(pattern)}))")
+            self._substitutes[group] = ""
+        # longer keywords first, so that "CNN International" wins over "CNN"
+        for keyword in sorted(self.replacements, key=len, reverse=True):
+            group = f"g{len(alternatives)}"
+            alternatives.append(f"(?P<{group}>{self._keyword_pattern(keyword)})")
+            self._substitutes[group] = self.replacements[keyword]
+        for name, pattern in self.detections.items():
+            group = f"g{len(alternatives)}"
+            alternatives.append(f"(?P<{group}>(?i:{on_word_boundaries(pattern)}))")
+            self._substitutes[group] = None
+            self._detected_names[group] = name
+        self._regex = None
+        if alternatives:
+            # a lookahead on first characters lets the scan skip most positions
+            # without trying every alternative there
+            starts = [first_chars(pattern, True) for pattern in self.removals]
+            starts += [re.escape(keyword[0]) for keyword in self.replacements]
+            starts += [first_chars(pattern, True) for pattern in self.detections.values()]
+            prefilter = ""
+            if None not in starts:
+                prefilter = f"(?=[{''.join(starts)}])"
+            self._regex = re.compile(f"{prefilter}(?:{'|'.join(alternatives)})")
+        self._detection_regexes = {
+            name: re.compile(on_word_boundaries(pattern), re.IGNORECASE)
+            for name, pattern in self.detections.items()
+        }
+
+    def apply(self, text: str) -> tuple[str, set[str]]:
+        """
+        Filters a text in one scan.
+
+        Args:
+            text (str): Text to filter.
+
+        Returns:
+            tuple[str, set[str]]: Text with removals and replacements applied and
+            names of detections found in it.
+        """
+        if self._regex is None:
+            return text, set()
+        detected = set()
+
+        def substitute(match: re.Match) -> str:
+            replacement = self._substitutes[match.lastgroup]
+            if replacement is None:
+                detected.add(self._detected_names[match.lastgroup])
+                return match.group()
+            return replacement
+
+        return self._regex.sub(substitute, text), detected
+
+    def clean(self, text: str) -> str:
+        """Returns text with removals and replacements applied."""
+        return self.apply(text)[0]
+
+    def contains(self, name: str, text: str) -> bool:
+        """Returns True if detection `name` is found in `text`, False otherwise."""
+        return self._detection_regexes[name].search(text) is not None
+
+    @staticmethod
+    def _keyword_pattern(keyword: str) -> str:
+        pattern = re.escape(keyword)
+        # keywords like "C.N.N." cannot end on a word boundary
+        if re.match(r"\w", keyword):
+            pattern = rf"\b{pattern}"
+        if re.search(r"\w$", keyword):
+            pattern = rf"{pattern}\b"
+        return pattern
+
+
+def get_text_filter(
+    removals: list[str] | None = None,
+    replacements: dict[str, str] | None = None,
+    detections: dict[str, str] | None = None,
+) -> TextFilterEngine:
+    """Returns a compiled filter, reusing the one compiled for the same patterns."""
+    return _compile(
+        tuple(removals or ()),
+        tuple((replacements or {}).items()),
+        tuple((detections or {}).items()),
+    )
+
+
+@lru_cache(maxsize=32)
+def _compile(removals: tuple, replacements: tuple, detections: tuple) -> TextFilterEngine:
+    return TextFilterEngine(list(removals), dict(replacements), dict(detections))
+
+
+text_filter = TextFilterEngine(
+    removals=config.get("filter", {}).get("removals", DEFAULT_REMOVALS),
+    replacements=config.get("filter", {}).get("replacements", DEFAULT_REPLACEMENTS),
+    detections={**DEFAULT_DETECTIONS, **config.get("filter", {}).get("detections", {})},
+)
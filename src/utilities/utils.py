@@ -1,15 +1,19 @@
 from __future__ import unicode_literals
 
+import difflib
 import logging
-import random
 import sys
 import time
 from functools import wraps
 from logging.handlers import RotatingFileHandler
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
 import coloredlogs
 from google.cloud import storage
 
+# query parameters that only track where a click came from (besides utm_*)
+TRACKING_PARAMS = {"fbclid", "gclid", "cid", "ref"}
+
 
 class CustomLogger:
     def __init__(self, name, mode="local"):
@@ -111,6 +115,40 @@ def timer(func):
     return wrapper
 
 
-def wait_for_web_scraping():
-    """Wait so that program is not blocked be a scraped server"""
-    time.sleep(random.randint(5, 10))
+def text_similarity(source: str, target: str) -> float:
+    """
+    Returns a cheap similarity score between two texts: ratio of matching words
+    between the lowercased word sequences, from 0.0 (disjoint) to 1.0 (identical).
+    """
+    return difflib.SequenceMatcher(
+        None, source.lower().split(), target.lower().split(), autojunk=False
+    ).ratio()
+
+
+def normalize_url(url: str) -> str:
+    """
+    Returns a canonical form of an URL, so that links to the same page are equal:
+    lowercased scheme and host without default port, no fragment, no tracking
+    parameters, sorted query and no trailing slash.
+
+    Args:
+        url (str): URL to normalize.
+
+    Returns:
+        str: Normalized URL.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port is not None and (scheme, parts.port) not in (
+        ("http", 80),
+        ("https", 443),
+    ):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
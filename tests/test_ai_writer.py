@@ -73,6 +73,26 @@ def test_detect_topic_true():
     ]
 
 
+def test_detect_topics_matches_detect_topic(string_empty, string_full):
+    articles = ["What is the most beautiful color?", string_full]
+    classes = ["business", "politics", "lifestyle"]
+    results = AI_Writer.detect_topics(articles, candidate_labels=classes)
+    for article, result in zip(articles, results):
+        ai_writer = AI_Writer(string_empty, article)
+        assert result["topic"] == ai_writer.detect_topic(candidate_labels=classes)
+
+
+def test_detect_topics_batch():
+    articles = [
+        "What is the most beautiful color?",
+        "Ebighar Rajjashwili is the most famous Armenian politician.",
+    ]
+    results = AI_Writer.detect_topics(articles, candidate_labels=["economy", "lifestyle"])
+    assert results[0]["per_entities"] is None
+    assert results[0]["uri"] is None
+    assert results[1]["topic"] == "economy"
+
+
 def test_get_named_entities(string_full):
     ai_writer = AI_Writer(string_full, string_full)
     assert ai_writer.get_named_entities()[1]["word"] == "Russia"
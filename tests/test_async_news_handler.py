@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+import repackage
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+repackage.up()
+from src.news import async_news_handler
+from src.news.async_news_handler import AsyncNewsHandler, merge_results
+from src.news.exception import NewsAPIException
+from src.news.key_pool import ApiKeyPool
+from src.news.response_cache import ResponseCache
+
+
+class StubNewsAPI:
+    """Returns two articles per query, the first one shared by all queries."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = 0
+
+    async def handle(self, request):
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if request.headers.get("Authorization") != "key":
+            return web.json_response({"status": "error"}, status=401)
+        if request.query.get("q") == "throttled":
+            return web.json_response({"status": "error"}, status=429)
+        query = "-".join(f"{k}={v}" for k, v in sorted(request.query.items()))
+        return web.json_response(
+            {
+                "status": "ok",
+                "articles": [
+                    {"url": "https://shared", "title": "shared", "content": "c"},
+                    {"url": f"https://{query}", "title": query, "content": "c"},
+                ],
+            }
+        )
+
+
+def run_with_stub(
+    coroutine_function, monkeypatch, tmp_path, api_key="key", concurrency=2, **kwargs
+):
+    stub = StubNewsAPI()
+    kwargs.setdefault("cache", ResponseCache(tmp_path.joinpath("newsapi.sqlite")))
+
+    async def main():
+        app = web.Application()
+        app.router.add_get("/{endpoint}", stub.handle)
+        async with TestServer(app) as server:
+            for endpoint in ["top_headlines_url", "everything_url", "sources_url"]:
+                monkeypatch.setitem(
+                    async_news_handler.config["newsapi"],
+                    endpoint,
+                    str(server.make_url(f"/{endpoint}")),
+                )
+            async with AsyncNewsHandler(api_key, concurrency, **kwargs) as news_handler:
+                return await coroutine_function(news_handler)
+
+    return asyncio.run(main()), stub
+
+
+def test_gather_top_headlines_merges_and_dedupes(monkeypatch, tmp_path):
+    queries = [{"sources": "cnn"}, {"country": "us"}, {"category": "business"}]
+    results, stub = run_with_stub(
+        lambda news_handler: news_handler.gather_top_headlines(queries),
+        monkeypatch,
+        tmp_path,
+    )
+    urls = [url for url, _, _ in results]
+    assert len(urls) == len(set(urls)) == 4
+    assert urls[0] == "https://shared"
+    assert stub.max_in_flight <= 2
+
+
+def test_get_everything_pages(monkeypatch, tmp_path):
+    results, _ = run_with_stub(
+        lambda news_handler: news_handler.get_everything_pages(3, q="economy"),
+        monkeypatch,
+        tmp_path,
+    )
+    assert {title for _, title, _ in results} >= {
+        f"domains=cnn-page={page}-q=economy" for page in range(1, 4)
+    }
+
+
+def test_validation_shared_with_news_handler(monkeypatch, tmp_path):
+    with pytest.raises(ValueError, match="cannot mix country/category param"):
+        run_with_stub(
+            lambda news_handler: news_handler.get_top_headlines(
+                sources="cnn", country="us"
+            ),
+            monkeypatch,
+            tmp_path,
+        )
+
+
+def test_error_response(monkeypatch, tmp_path):
+    with pytest.raises(NewsAPIException):
+        run_with_stub(
+            lambda news_handler: news_handler.get_sources(),
+            monkeypatch,
+            tmp_path,
+            api_key="wrong",
+        )
+
+
+def test_cached_responses(monkeypatch, tmp_path):
+    async def get_sources_twice(news_handler):
+        await news_handler.get_sources()
+        return await news_handler.get_sources()
+
+    # endpoints of the stub are named after their config entries
+    cache = ResponseCache(tmp_path.joinpath("newsapi.sqlite"), ttls={"sources_url": 60})
+    result, stub = run_with_stub(get_sources_twice, monkeypatch, tmp_path, cache=cache)
+    assert result["status"] == "ok"
+    assert stub.requests == 1
+
+
+def test_keys_taken_from_pool(monkeypatch, tmp_path):
+    key_pool = ApiKeyPool(["key"], daily_limit=10)
+    run_with_stub(
+        lambda news_handler: news_handler.get_everything(q="economy"),
+        monkeypatch,
+        tmp_path,
+        api_key=None,
+        key_pool=key_pool,
+    )
+    assert key_pool.remaining() == 9
+    with pytest.raises(NewsAPIException):
+        run_with_stub(
+            lambda news_handler: news_handler.get_everything(q="throttled"),
+            monkeypatch,
+            tmp_path,
+            api_key=None,
+            key_pool=key_pool,
+        )
+    # the key is out of its quota after a 429
+    assert key_pool.remaining() == 0
+
+
+def test_merge_results():
+    article = {"url": "u", "title": "t", "content": "c"}
+    assert merge_results([{"articles": [article]}, {"articles": [article]}]) == [
+        ("u", "t", "c")
+    ]
@@ -0,0 +1,105 @@
+import re
+
+import pytest
+import repackage
+
+repackage.up()
+from src.ai.chunked_ner import (
+    count_person_entities,
+    get_named_entities_chunked,
+    merge_window_entities,
+    split_into_windows,
+)
+
+
+class FakeTokenizer:
+    def __call__(self, text, add_special_tokens=False, return_offsets_mapping=True):
+        return {
+            "offset_mapping": [(m.start(), m.end()) for m in re.finditer(r"\S+", text)]
+        }
+
+
+class FakeTokenClassifier:
+    """Tags every capitalized word as PER."""
+
+    tokenizer = FakeTokenizer()
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=8):
+        self.calls.append(texts)
+        return [
+            [
+                {
+                    "entity_group": "PER",
+                    "score": 0.9,
+                    "word": m.group(),
+                    "start": m.start(),
+                    "end": m.end(),
+                }
+                for m in re.finditer(r"[A-Z]\w+", text)
+            ]
+            for text in texts
+        ]
+
+
+def test_split_into_windows_short_text():
+    assert split_into_windows(FakeTokenizer(), "a b c", window_size=4, stride=1) == [
+        (0, 5)
+    ]
+
+
+def test_split_into_windows_overlap():
+    text = "a b c d e f g"
+    windows = split_into_windows(FakeTokenizer(), text, window_size=4, stride=2)
+    assert [text[start:end] for start, end in windows] == ["a b c d", "c d e f", "e f g"]
+
+
+def test_split_into_windows_invalid_stride():
+    with pytest.raises(ValueError, match="stride should be smaller than window_size"):
+        split_into_windows(FakeTokenizer(), "a b", window_size=2, stride=2)
+
+
+def test_merge_window_entities_deduplicates_overlap():
+    text = "a Smith b"
+    entity = {"entity_group": "PER", "score": 0.9, "word": "Smith", "start": 0, "end": 5}
+    merged = merge_window_entities(text, [(0, []), (2, [entity]), (2, [dict(entity)])])
+    assert merged == [{**entity, "start": 2, "end": 7}]
+
+
+def test_merge_window_entities_joins_cut_entity():
+    text = "John Smith said"
+    first = {"entity_group": "PER", "score": 0.8, "word": "John", "start": 0, "end": 4}
+    second = {
+        "entity_group": "PER",
+        "score": 0.9,
+        "word": "John Smith",
+        "start": 0,
+        "end": 10,
+    }
+    merged = merge_window_entities(text, [(0, [first]), (0, [second])])
+    assert [(ne["word"], ne["score"]) for ne in merged] == [("John Smith", 0.9)]
+
+
+def test_get_named_entities_chunked_one_batch():
+    token_classifier = FakeTokenClassifier()
+    texts = ["x Anna y z w Bob v", "Carl"]
+    results = get_named_entities_chunked(
+        token_classifier, texts, window_size=3, stride=1
+    )
+    assert len(token_classifier.calls) == 1
+    assert [[ne["word"] for ne in result] for result in results] == [
+        ["Anna", "Bob"],
+        ["Carl"],
+    ]
+    assert results[0][1]["start"] == texts[0].index("Bob")
+
+
+def test_count_person_entities():
+    entities = [
+        {"entity_group": "PER", "word": "Anna"},
+        {"entity_group": "LOC", "word": "Paris"},
+        {"entity_group": "PER", "word": "Anna"},
+    ]
+    assert count_person_entities(entities) == {"Anna": 2}
@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+import repackage
+
+repackage.up()
+from src.ai.continuous_batcher import ContinuousBatcher
+
+
+def run_concurrently(batcher, items):
+    async def main():
+        try:
+            return await asyncio.gather(*(batcher.submit(item) for item in items))
+        finally:
+            await batcher.close()
+
+    return asyncio.run(main())
+
+
+def test_submit_batches_concurrent_items():
+    batches = []
+
+    def process_batch(items):
+        batches.append(items)
+        return [item.upper() for item in items]
+
+    batcher = ContinuousBatcher(process_batch, max_batch_size=8)
+    assert run_concurrently(batcher, ["a", "bb", "c"]) == ["A", "BB", "C"]
+    assert len(batches) == 1
+    assert batcher.stats()["items"] == 3
+    assert batcher.stats()["queue_depth"] == 0
+    assert "latency_ms" in batcher.stats()
+
+
+def test_submit_groups_by_length():
+    batches = []
+
+    def process_batch(items):
+        batches.append(sorted(items))
+        return items
+
+    batcher = ContinuousBatcher(process_batch, max_batch_size=2)
+    run_concurrently(batcher, ["a", "bbbb", "cc", "ddddd"])
+    # the oldest item is joined by the one closest to it in length
+    assert batches == [["a", "cc"], ["bbbb", "ddddd"]]
+    assert batcher.stats()["mean_batch_size"] == 2
+
+
+def test_submit_propagates_errors():
+    def process_batch(items):
+        raise RuntimeError("model failed")
+
+    batcher = ContinuousBatcher(process_batch)
+    with pytest.raises(RuntimeError, match="model failed"):
+        run_concurrently(batcher, ["a", "b"])
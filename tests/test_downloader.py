@@ -0,0 +1,204 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import repackage
+
+repackage.up()
+from src.parsers.downloader import Downloader, HostPolicy
+
+ROBOTS = "User-agent: *\nDisallow: /private\nCrawl-delay: 1\n"
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.paths.append(self.path)
+            server.active += 1
+            server.max_active = max(server.max_active, server.active)
+            attempt = server.paths.count(self.path)
+        try:
+            if self.path == "/robots.txt":
+                if self.headers["Host"].startswith("localhost"):
+                    time.sleep(server.robots_delay)
+                self._reply(server.robots_status, server.robots)
+            elif self.path == "/flaky" and attempt == 1:
+                self._reply(503, "busy")
+            elif self.path == "/slow" and attempt == 1:
+                time.sleep(2)
+                self._reply(200, "late")
+            elif self.path.startswith("/limited") and attempt == 1:
+                self._reply(429, "slow down", {"Retry-After": self.path.split("/")[-1]})
+            else:
+                time.sleep(0.05)
+                self._reply(200, f"<html>{self.path}</html>")
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def _reply(self, status, text, headers=None):
+        body = text.encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(name="server")
+def fixture_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.paths = []
+    server.active = 0
+    server.max_active = 0
+    server.robots = ""
+    server.robots_status = 200
+    server.robots_delay = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    server.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_downloader(**kwargs):
+    settings = {
+        "max_workers": 8,
+        "per_host": 2,
+        "min_interval": 0,
+        "hedge_after": 0,
+        "max_retries": 1,
+    }
+    return Downloader(**{**settings, **kwargs})
+
+
+def test_download_many_keeps_order(server):
+    urls = [f"{server.url}/{i}" for i in range(6)]
+    with make_downloader() as downloader:
+        results = downloader.download_many(urls)
+    assert [result.url for result in results] == urls
+    assert [result.html for result in results] == [f"<html>/{i}</html>" for i in range(6)]
+    assert all(result.ok for result in results)
+
+
+def test_per_host_concurrency(server):
+    urls = [f"{server.url}/{i}" for i in range(8)]
+    with make_downloader(per_host=2, respect_robots=False) as downloader:
+        downloader.download_many(urls)
+    assert server.max_active <= 2
+
+
+def test_robots_disallow_and_crawl_delay(server):
+    server.robots = ROBOTS
+    with make_downloader() as downloader:
+        disallowed = downloader.download(f"{server.url}/private/1")
+        start = time.perf_counter()
+        results = downloader.download_many([f"{server.url}/a", f"{server.url}/b"])
+        elapsed = time.perf_counter() - start
+    assert not disallowed.ok
+    assert disallowed.error == "disallowed by robots.txt"
+    assert "/private/1" not in server.paths
+    assert all(result.ok for result in results)
+    # starts of the two requests are spaced by the crawl-delay
+    assert elapsed >= 1
+
+
+def test_forbidden_robots_disallows_all(server):
+    server.robots_status = 403
+    with make_downloader() as downloader:
+        result = downloader.download(f"{server.url}/1")
+    assert result.error == "disallowed by robots.txt"
+    assert server.paths == ["/robots.txt"]
+
+
+def test_slow_robots_blocks_only_its_host(server):
+    server.robots_delay = 2
+    slow_host = server.url.replace("127.0.0.1", "localhost")
+    with make_downloader() as downloader:
+        thread = threading.Thread(target=downloader.download, args=(f"{slow_host}/1",))
+        thread.start()
+        time.sleep(0.2)
+        start = time.perf_counter()
+        result = downloader.download(f"{server.url}/2")
+        elapsed = time.perf_counter() - start
+        thread.join()
+    assert result.ok
+    assert elapsed < 1
+
+
+def test_retry_of_server_error(server, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    with make_downloader(respect_robots=False) as downloader:
+        result = downloader.download(f"{server.url}/flaky")
+    assert result.ok
+    assert server.paths.count("/flaky") == 2
+
+
+def test_failed_download_is_returned():
+    with make_downloader(max_retries=0, respect_robots=False) as downloader:
+        result = downloader.download("http://127.0.0.1:9/unreachable")
+    assert not result.ok
+    assert result.status is None
+    assert result.error is not None
+
+
+def test_hedged_download(server):
+    with make_downloader(hedge_after=0.2, respect_robots=False) as downloader:
+        start = time.perf_counter()
+        result = downloader.download(f"{server.url}/slow")
+        elapsed = time.perf_counter() - start
+    assert result.ok
+    assert result.html == "<html>/slow</html>"
+    assert elapsed < 1.5
+    assert server.paths.count("/slow") == 2
+
+
+def test_hedge_waits_for_host_slot(server):
+    with make_downloader(per_host=1, hedge_after=0.2, respect_robots=False) as downloader:
+        result = downloader.download(f"{server.url}/slow")
+        time.sleep(0.2)
+    # the hedge had no free slot until the first request answered, so it was not sent
+    assert result.html == "late"
+    assert server.max_active == 1
+    assert server.paths.count("/slow") == 1
+
+
+def test_retry_after(server, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+    with make_downloader(respect_robots=False) as downloader:
+        result = downloader.download(f"{server.url}/limited/5")
+    assert result.ok
+    assert server.paths.count("/limited/5") == 2
+    # the retry waited for its host as long as the server asked
+    assert max(sleeps) > 4
+
+
+def test_too_long_retry_after(server, monkeypatch):
+    monkeypatch.setattr(time, "sleep", lambda seconds: None)
+    with make_downloader(max_retry_after=60, respect_robots=False) as downloader:
+        result = downloader.download(f"{server.url}/limited/3600")
+    assert not result.ok
+    assert result.error == "HTTP 429"
+    assert server.paths.count("/limited/3600") == 1
+
+
+def test_host_policy_interval():
+    policy = HostPolicy(max_concurrency=1, min_interval=0.1)
+    start = time.perf_counter()
+    for _ in range(3):
+        with policy:
+            pass
+    assert time.perf_counter() - start >= 0.2
@@ -0,0 +1,73 @@
+import pytest
+import repackage
+
+repackage.up()
+from src.parsers import extractors
+from src.parsers.extractors import extract_cnn, extract_text, get_extractor
+
+CNN_URL = "https://edition.cnn.com/2023/09/19/politics/article/index.html"
+CNN_HTML = """
+<html><body>
+<div class="headline"><h1>Headline</h1></div>
+<div class="article__content">
+  <p class="paragraph inline-placeholder">
+    First   paragraph <a href="/x">with a link</a>.
+  </p>
+  <div class="ad"><p>Advertisement</p></div>
+  <p class="paragraph inline-placeholder">Second paragraph.</p>
+  <p class="paragraph inline-placeholder"> </p>
+</div>
+<div class="related"><p class="paragraph">Related story.</p></div>
+</body></html>
+"""
+LEGACY_CNN_HTML = """
+<html><body>
+<section id="body-text">
+  <div class="zn-body__paragraph">First paragraph.</div>
+  <div class="zn-body__paragraph speakable">Second paragraph.</div>
+</section>
+</body></html>
+"""
+
+
+@pytest.fixture(name="newspaper")
+def fixture_newspaper(monkeypatch):
+    calls = []
+
+    def extract_with_newspaper(url, html):
+        calls.append(url)
+        return "newspaper text"
+
+    monkeypatch.setattr(extractors, "extract_with_newspaper", extract_with_newspaper)
+    yield calls
+
+
+def test_get_extractor():
+    assert get_extractor(CNN_URL) is extract_cnn
+    assert get_extractor("https://cnn.com/a") is extract_cnn
+    assert get_extractor("https://notcnn.com/a") is None
+    assert get_extractor("https://www.ft.com/content/a") is None
+
+
+def test_extract_cnn():
+    assert extract_cnn(CNN_HTML) == "First paragraph with a link.\n\nSecond paragraph."
+
+
+def test_extract_cnn_legacy_layout():
+    assert extract_cnn(LEGACY_CNN_HTML) == "First paragraph.\n\nSecond paragraph."
+
+
+def test_extract_cnn_missed():
+    assert extract_cnn("<html><body><p>Video only</p></body></html>") is None
+    assert extract_cnn("") is None
+
+
+def test_extract_text_uses_extractor(newspaper):
+    assert extract_text(CNN_URL, CNN_HTML).startswith("First paragraph")
+    assert newspaper == []
+
+
+def test_extract_text_falls_back_to_newspaper(newspaper):
+    assert extract_text(CNN_URL, "<html><body></body></html>") == "newspaper text"
+    assert extract_text("https://www.ft.com/content/a", CNN_HTML) == "newspaper text"
+    assert len(newspaper) == 2
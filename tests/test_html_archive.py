@@ -0,0 +1,102 @@
+import secrets
+
+import pytest
+import repackage
+
+repackage.up()
+from src.parsers import html_archive as html_archive_module
+from src.parsers.downloader import DownloadResult
+from src.parsers.html_archive import HtmlArchive
+from src.utilities.utils import normalize_url
+
+URL = "https://edition.cnn.com/2023/09/19/politics/article/index.html"
+
+
+def make_result(url=URL, html="<html>article</html>", status=200):
+    return DownloadResult(url, status, html, {"ETag": '"abc"'}, 0.5)
+
+
+@pytest.fixture(name="archive")
+def fixture_archive(tmp_path):
+    yield HtmlArchive(tmp_path.joinpath("html"))
+
+
+def test_normalize_url():
+    assert normalize_url(
+        "HTTPS://Edition.CNN.com:443/politics/?utm_source=x&b=2&a=1#top"
+    ) == ("https://edition.cnn.com/politics?a=1&b=2")
+    assert normalize_url("http://cnn.com") == "http://cnn.com/"
+    assert normalize_url("http://cnn.com:8080/a") == "http://cnn.com:8080/a"
+
+
+def test_put_get(archive):
+    archive.put(make_result())
+    page = archive.get(URL)
+    assert page.ok
+    assert page.html == "<html>article</html>"
+    assert page.headers == {"ETag": '"abc"'}
+    assert archive.stats()["hits"] == 1
+
+
+def test_get_by_normalized_url(archive):
+    archive.put(make_result())
+    assert archive.get(URL + "?utm_source=twitter#comments") is not None
+
+
+def test_get_missing(archive):
+    assert archive.get(URL) is None
+    assert archive.stats()["misses"] == 1
+
+
+def test_failed_download_not_archived(archive):
+    archive.put(make_result(status=404))
+    archive.put(DownloadResult(URL, None, None, {}, 0.0, "ConnectionError"))
+    assert archive.get(URL) is None
+
+
+def test_identical_pages_stored_once(archive):
+    archive.put(make_result())
+    archive.put(make_result(url=URL.replace("edition", "www")))
+    stats = archive.stats()
+    assert stats["pages"] == 2
+    assert stats["blobs"] == 1
+
+
+def test_compression(archive):
+    archive.put(make_result(html="<p>paragraph</p>" * 1000))
+    stats = archive.stats()
+    assert stats["size"] < stats["raw_size"] / 10
+
+
+def test_zlib_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(html_archive_module, "zstandard", None)
+    archive = HtmlArchive(tmp_path.joinpath("html"))
+    archive.put(make_result())
+    assert archive.codec == "zlib"
+    assert archive.get(URL).html == "<html>article</html>"
+
+
+def test_eviction(tmp_path):
+    archive = HtmlArchive(tmp_path.joinpath("html"), max_size_mb=0.001)
+    for i in range(20):
+        # random pages barely compress
+        archive.put(make_result(url=f"{URL}?page={i}", html=secrets.token_hex(200)))
+    stats = archive.stats()
+    assert stats["size"] <= 1024**2 * 0.001
+    assert archive.get(f"{URL}?page=19") is not None
+    assert archive.get(f"{URL}?page=0") is None
+
+
+def test_persistence(tmp_path):
+    HtmlArchive(tmp_path.joinpath("html")).put(make_result())
+    assert HtmlArchive(tmp_path.joinpath("html")).get(URL).html == (
+        "<html>article</html>"
+    )
+
+
+def test_clear(archive):
+    archive.put(make_result())
+    archive.clear()
+    assert archive.get(URL) is None
+    assert archive.stats()["size"] == 0
+    assert not list(archive.path.joinpath("objects").rglob("*/*"))
@@ -0,0 +1,57 @@
+import pytest
+import repackage
+
+repackage.up()
+from src.ai.inference_cache import InferenceCache
+
+
+@pytest.fixture(name="cache")
+def fixture_cache(tmp_path):
+    yield InferenceCache(tmp_path.joinpath("cache.sqlite"))
+
+
+def test_make_key_depends_on_all_parts():
+    key = InferenceCache.make_key("model", {"num_beams": 1}, "text")
+    assert key == InferenceCache.make_key("model", {"num_beams": 1}, "text")
+    assert key != InferenceCache.make_key("other", {"num_beams": 1}, "text")
+    assert key != InferenceCache.make_key("model", {"num_beams": 2}, "text")
+    assert key != InferenceCache.make_key("model", {"num_beams": 1}, "other")
+
+
+def test_get_set(cache):
+    cache.set("ner", "key", [{"word": "Russia", "score": 0.9}])
+    assert cache.get("ner", "key") == [{"word": "Russia", "score": 0.9}]
+
+
+def test_get_missing(cache):
+    assert cache.get("topic", "key") is None
+
+
+def test_counters(cache):
+    cache.set_many("paraphrase", {"a": "A", "b": "B"})
+    cache.get_many("paraphrase", ["a", "b", "c"])
+    assert cache.stats()["paraphrase"] == {"hits": 2, "misses": 1, "entries": 2}
+
+
+def test_persistence(tmp_path):
+    InferenceCache(tmp_path.joinpath("cache.sqlite")).set("topic", "key", "politics")
+    assert InferenceCache(tmp_path.joinpath("cache.sqlite")).get("topic", "key") == (
+        "politics"
+    )
+
+
+def test_evict_least_recently_used(tmp_path):
+    cache = InferenceCache(tmp_path.joinpath("cache.sqlite"), max_size_mb=25 / 1024**2)
+    cache.set("paraphrase", "a", "0123456789")
+    cache.set("paraphrase", "b", "0123456789")
+    cache.get("paraphrase", "a")
+    cache.set("paraphrase", "c", "0123456789")
+    assert cache.get("paraphrase", "a") == "0123456789"
+    assert cache.get("paraphrase", "b") is None
+    assert cache.get("paraphrase", "c") == "0123456789"
+
+
+def test_disabled(tmp_path):
+    cache = InferenceCache(tmp_path.joinpath("cache.sqlite"), enabled=False)
+    cache.set("topic", "key", "politics")
+    assert cache.get("topic", "key") is None
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+import repackage
+import requests
+from aiohttp import web
+
+repackage.up()
+from src.ai import inference_server
+from src.ai.inference_client import InferenceClient, get_inference_client
+from src.ai.inference_server import AI_Writer, InferenceServer
+
+
+def fake_paraphrase(sentences, batch_size=None, **kwargs):
+    return [sentence.upper() for sentence in sentences]
+
+
+def fake_named_entities(articles):
+    # entities computed by the NER pipeline carry numpy scores
+    return [
+        [{"entity_group": "PER", "word": word, "score": np.float32(0.99)}]
+        for word in articles
+    ]
+
+
+def fake_classify(articles, candidate_labels=None, batch_size=None):
+    return [(candidate_labels or ["politics"])[0] for _ in articles]
+
+
+@pytest.fixture(name="client")
+def fixture_client(monkeypatch):
+    monkeypatch.setattr(inference_server, "paraphrase_sentences", fake_paraphrase)
+    monkeypatch.setattr(
+        AI_Writer, "get_named_entities_batch", staticmethod(fake_named_entities)
+    )
+    monkeypatch.setattr(
+        AI_Writer, "classify_articles_to_topics", staticmethod(fake_classify)
+    )
+    monkeypatch.setattr(AI_Writer, "get_inference_stats", staticmethod(dict))
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(InferenceServer(max_wait_ms=5).create_app())
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield InferenceClient(f"http://127.0.0.1:{port}", timeout=10)
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.close()
+
+
+def test_rewrite(client):
+    assert client.rewrite(["first one.", "second."]) == ["FIRST ONE.", "SECOND."]
+    stats = client.stats()["batchers"]
+    assert sum(batcher["items"] for batcher in stats.values()) == 2
+
+
+def test_rewrite_invalid_profile(client):
+    with pytest.raises(requests.HTTPError, match="400"):
+        client.rewrite(["first one."], profile="slowest")
+
+
+def test_named_entities_with_numpy_scores(client):
+    entities = client.get_named_entities(["Biden", "Trump"])
+    assert [article[0]["word"] for article in entities] == ["Biden", "Trump"]
+    assert entities[0][0]["score"] == pytest.approx(0.99)
+
+
+def test_classify(client):
+    assert client.classify(["a", "b"], candidate_labels=["economy"]) == [
+        "economy",
+        "economy",
+    ]
+    assert client.classify(["a"]) == ["politics"]
+
+
+def test_empty_requests_are_not_sent():
+    client = InferenceClient("http://127.0.0.1:9")
+    assert client.rewrite([]) == []
+    assert client.get_named_entities([]) == []
+    assert client.classify([]) == []
+
+
+def test_get_inference_client_shared():
+    client = get_inference_client("http://127.0.0.1:8765/")
+    assert get_inference_client("http://127.0.0.1:8765/") is client
+    assert client.url == "http://127.0.0.1:8765"
@@ -0,0 +1,82 @@
+import pytest
+import repackage
+
+repackage.up()
+from src.news.records import HeadlineRecord
+from src.pipeline.jobs import JobStore
+
+RECORD = HeadlineRecord(
+    "https://edition.cnn.com/2023/09/19/politics/article/index.html", "Title", "Text"
+)
+
+
+@pytest.fixture(name="jobs")
+def fixture_jobs(tmp_path):
+    yield JobStore(tmp_path.joinpath("jobs.sqlite"))
+
+
+def test_start(jobs):
+    job = jobs.start(RECORD)
+    assert job["state"] == "pending"
+    assert job["record"] == RECORD
+    # starting a record again returns its job
+    jobs.advance(RECORD.url, "scraped", headline="Title", article="Article")
+    assert jobs.start(RECORD)["state"] == "scraped"
+
+
+def test_advance_stores_outputs(jobs):
+    jobs.start(RECORD)
+    jobs.advance(RECORD.url, "scraped", headline="Title", article="Article")
+    jobs.advance(RECORD.url, "rewritten", rewritten_article="Rewritten")
+    jobs.advance(
+        RECORD.url, "classified", topic=None, uri="gs://x", per_entities=["Joe Biden"]
+    )
+    job = jobs.get(RECORD.url + "?utm_source=twitter")
+    assert job["state"] == "classified"
+    assert job["article"] == "Article"
+    assert job["rewritten_article"] == "Rewritten"
+    assert job["per_entities"] == ["Joe Biden"]
+
+
+def test_invalid_transition(jobs):
+    jobs.start(RECORD)
+    with pytest.raises(ValueError, match="cannot move from pending to rewritten"):
+        jobs.advance(RECORD.url, "rewritten")
+    with pytest.raises(ValueError, match="Unknown job outputs"):
+        jobs.advance(RECORD.url, "scraped", body="Article")
+    with pytest.raises(ValueError, match="No job"):
+        jobs.advance("https://cnn.com/other", "scraped")
+
+
+def test_fail_and_retry(jobs):
+    jobs.start(RECORD)
+    jobs.advance(RECORD.url, "scraped", article="Article")
+    jobs.fail(RECORD.url, "rewrite: RuntimeError: out of memory")
+    job = jobs.get(RECORD.url)
+    assert job["state"] == "failed"
+    assert job["failed_state"] == "scraped"
+    assert job["attempts"] == 1
+    assert jobs.retry_failed() == [RECORD]
+    job = jobs.get(RECORD.url)
+    assert job["state"] == "scraped"
+    assert job["article"] == "Article"
+    assert jobs.failed() == []
+
+
+def test_saved_job_does_not_fail(jobs):
+    jobs.start(RECORD)
+    for state in ("scraped", "rewritten", "classified", "saved"):
+        jobs.advance(RECORD.url, state)
+    jobs.fail(RECORD.url, "error")
+    assert jobs.get(RECORD.url)["state"] == "saved"
+
+
+def test_resume(jobs):
+    other = HeadlineRecord("https://edition.cnn.com/other", "Other", None)
+    done = HeadlineRecord("https://edition.cnn.com/done", "Done", None)
+    jobs.start(RECORD)
+    jobs.start(done)
+    jobs.advance(done.url, "skipped")
+    assert jobs.resume([other]) == [other, RECORD]
+    assert jobs.resume([RECORD]) == [RECORD]
+    assert jobs.counts() == {"pending": 1, "skipped": 1}
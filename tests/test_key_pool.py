@@ -0,0 +1,110 @@
+import sqlite3
+import time
+
+import pytest
+import repackage
+
+repackage.up()
+from src.news.exception import QuotaExceededException
+from src.news.key_pool import ApiKeyPool, TokenBucket, digest
+
+
+@pytest.fixture(name="pool")
+def fixture_pool(tmp_path):
+    yield ApiKeyPool(
+        ["a", "b"],
+        daily_limit=10,
+        rate_per_second=1000,
+        usage_path=tmp_path.joinpath("usage.sqlite"),
+    )
+
+
+def test_round_robin(pool):
+    assert [pool.acquire("high") for _ in range(4)] == ["a", "b", "a", "b"]
+
+
+def test_least_used():
+    pool = ApiKeyPool(["a", "b"], strategy="least-used", rate_per_second=1000)
+    pool._usage["a"] = 3
+    assert pool.acquire() == "b"
+    pool._usage["b"] = 5
+    assert pool.acquire() == "a"
+
+
+def test_priority_shedding(pool):
+    # 20 requests a day in total, low priority needs half of them left
+    for _ in range(10):
+        pool.acquire("low")
+    with pytest.raises(QuotaExceededException, match="low priority query shed"):
+        pool.acquire("low")
+    for _ in range(8):
+        pool.acquire("normal")
+    with pytest.raises(QuotaExceededException, match="normal priority query shed"):
+        pool.acquire("normal")
+    pool.acquire("high")
+    pool.acquire("high")
+    with pytest.raises(QuotaExceededException, match="used up"):
+        pool.acquire("high")
+
+
+def test_mark_exhausted(pool):
+    pool.mark_exhausted("a")
+    assert {pool.acquire("high") for _ in range(3)} == {"b"}
+
+
+def test_usage_persisted(pool, tmp_path):
+    pool.acquire()
+    pool.acquire()
+    pool.acquire()
+    other_run = ApiKeyPool(["a", "b"], usage_path=tmp_path.joinpath("usage.sqlite"))
+    assert other_run.usage() == {digest("a"): 2, digest("b"): 1}
+    assert other_run.remaining() == 197
+    # keys are never written to disk
+    saved = sqlite3.connect(tmp_path.joinpath("usage.sqlite")).execute(
+        "SELECT key FROM usage"
+    )
+    assert {row[0] for row in saved} == {digest("a"), digest("b")}
+
+
+def test_usage_shared_by_runs_at_the_same_time(pool, tmp_path):
+    other_run = ApiKeyPool(["a"], usage_path=tmp_path.joinpath("usage.sqlite"))
+    pool.acquire()
+    other_run.acquire()
+    pool.acquire()
+    # neither run overwrites the counters of the other
+    assert pool.usage() == {digest("a"): 2, digest("b"): 1}
+    assert other_run.usage() == {digest("a"): 2}
+
+
+def test_charge(pool):
+    pool.charge(pool.acquire(), 2)
+    assert pool.remaining() == 17
+
+
+def test_usage_reset_next_day(pool, monkeypatch):
+    pool.acquire()
+    monkeypatch.setattr(pool, "_today", lambda: "2100-01-01")
+    assert set(pool.usage().values()) == {0}
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("NEWSAPI_KEYS", "a, b,,a")
+    assert ApiKeyPool.from_env().keys == ["a", "b"]
+
+
+def test_from_file(tmp_path):
+    tmp_path.joinpath("api.key").write_text("a\nb\n\n")
+    assert ApiKeyPool.from_file(tmp_path.joinpath("api.key")).keys == ["a", "b"]
+
+
+def test_no_keys():
+    with pytest.raises(ValueError, match="at least one API key is required"):
+        ApiKeyPool([])
+
+
+def test_token_bucket():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    waits = [bucket.acquire() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    assert time.monotonic() - start >= 0.09
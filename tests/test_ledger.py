@@ -0,0 +1,86 @@
+import pytest
+import repackage
+
+repackage.up()
+from src.news.records import HeadlineRecord
+from src.pipeline.ledger import BloomFilter, SeenUrlLedger
+
+URL = "https://edition.cnn.com/2023/09/19/politics/article/index.html"
+
+
+@pytest.fixture(name="ledger")
+def fixture_ledger(tmp_path):
+    yield SeenUrlLedger(tmp_path.joinpath("seen_urls.sqlite"))
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    keys = [f"https://cnn.com/{i}" for i in range(1000)]
+    for key in keys:
+        bloom.add(key)
+    assert all(key in bloom for key in keys)
+    assert len(bloom) == 1000
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"https://cnn.com/{i}")
+    false_positives = sum(f"https://bbc.com/{i}" in bloom for i in range(10000))
+    assert false_positives < 200
+
+
+def test_invalid_bloom_filter():
+    with pytest.raises(ValueError, match="capacity"):
+        BloomFilter(capacity=0)
+    with pytest.raises(ValueError, match="error_rate"):
+        BloomFilter(error_rate=1)
+
+
+def test_add_and_seen(ledger):
+    assert not ledger.seen(URL)
+    ledger.add(URL, headline="Title")
+    assert ledger.seen(URL + "?utm_source=twitter")
+    stats = ledger.stats()
+    assert stats["checked"] == 2
+    assert stats["lookups"] == 1
+    assert stats["seen"] == 1
+
+
+def test_rebuilt_from_stored_urls(tmp_path):
+    SeenUrlLedger(tmp_path.joinpath("seen_urls.sqlite")).add(URL)
+    ledger = SeenUrlLedger(tmp_path.joinpath("seen_urls.sqlite"))
+    assert ledger.seen(URL)
+    assert ledger.stats()["urls"] == 1
+
+
+def test_filter_new(ledger):
+    ledger.add(URL)
+    other = HeadlineRecord("https://edition.cnn.com/other", "Other", None)
+    records = [HeadlineRecord(URL, "Title", None), other, other]
+    assert ledger.filter_new(records) == [other]
+
+
+def test_exact_lookup_behind_bloom_filter():
+    lookups = []
+
+    def lookup(url):
+        lookups.append(url)
+        return False
+
+    # every URL passes a full filter, so the exact lookup decides
+    ledger = SeenUrlLedger(urls=list, lookup=lookup, capacity=1, error_rate=0.5)
+    ledger.rebuild()
+    ledger._bloom.bits[:] = b"\xff" * len(ledger._bloom.bits)
+    assert not ledger.seen(URL)
+    assert lookups == [URL]
+    assert ledger.stats()["false_positives"] == 1
+
+
+def test_external_store():
+    stored = {URL}
+    ledger = SeenUrlLedger(urls=lambda: stored, lookup=stored.__contains__)
+    assert ledger.seen(URL)
+    assert not ledger.seen("https://edition.cnn.com/other")
+    with pytest.raises(ValueError, match="given together"):
+        SeenUrlLedger(urls=lambda: stored)
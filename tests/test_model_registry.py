@@ -0,0 +1,66 @@
+import threading
+
+import pytest
+import repackage
+
+repackage.up()
+from src.ai.model_registry import ModelRegistry
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+
+@pytest.fixture(name="registry")
+def fixture_registry():
+    registry = ModelRegistry()
+    registry.register("a", lambda: FakeModel("a"))
+    registry.register("b", lambda: FakeModel("b"))
+    yield registry
+
+
+def test_get_loads_once(registry):
+    assert registry.get("a") is registry.get("a")
+    assert registry.report()["a"]["loads"] == 1
+    assert registry.report()["a"]["hits"] == 1
+
+
+def test_get_not_registered(registry):
+    with pytest.raises(KeyError, match="Model `c` is not registered"):
+        registry.get("c")
+
+
+def test_get_thread_safe():
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return FakeModel("slow")
+
+    registry = ModelRegistry()
+    registry.register("slow", loader)
+    threads = [threading.Thread(target=registry.get, args=("slow",)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+
+
+def test_evict_least_recently_used(registry, monkeypatch):
+    monkeypatch.setattr("src.ai.model_registry.estimate_size_mb", lambda model: 60.0)
+    registry.memory_budget_mb = 100
+    registry.get("a")
+    registry.get("b")
+    report = registry.report()
+    assert report["a"]["resident"] is False
+    assert report["a"]["evictions"] == 1
+    assert report["b"]["resident"] is True
+
+
+def test_evict_reloads(registry):
+    model = registry.get("a")
+    registry.evict("a")
+    assert registry.get("a") is not model
+    assert registry.report()["a"]["loads"] == 2
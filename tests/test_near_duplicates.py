@@ -0,0 +1,109 @@
+import random
+import time
+
+import pytest
+import repackage
+
+repackage.up()
+from src.parsers.near_duplicates import MinHasher, NearDuplicateIndex
+
+WORDS = [f"word{i}" for i in range(5000)]
+
+
+def random_text(seed, length=400):
+    generator = random.Random(seed)
+    return " ".join(generator.choice(WORDS) for _ in range(length))
+
+
+STORY = random_text(0)
+# a live update of the story: one sentence changed and one added
+UPDATE = STORY.replace(STORY.split()[200], "changed", 1) + " New details emerged today."
+
+
+@pytest.fixture(name="index")
+def fixture_index(tmp_path):
+    yield NearDuplicateIndex(tmp_path.joinpath("near_duplicates.sqlite"))
+
+
+def test_similarity():
+    hasher = MinHasher()
+    story = hasher.signature(STORY)
+    assert MinHasher.similarity(story, hasher.signature(STORY)) == 1.0
+    assert MinHasher.similarity(story, hasher.signature(UPDATE)) > 0.9
+    assert MinHasher.similarity(story, hasher.signature(random_text(1))) < 0.1
+
+
+def test_shingles():
+    hasher = MinHasher(shingle_size=2)
+    assert hasher.shingles("Joe Biden, joe biden") == {"joe biden", "biden joe"}
+    assert hasher.shingles("Biden") == {"biden"}
+    assert hasher.shingles("") == set()
+
+
+def test_check(index):
+    assert index.check("https://edition.cnn.com/story", STORY) is None
+    for seed in range(1, 50):
+        assert index.check(f"https://edition.cnn.com/{seed}", random_text(seed)) is None
+    duplicate = index.check("https://edition.cnn.com/story-live", UPDATE)
+    assert duplicate.url == "https://edition.cnn.com/story"
+    assert duplicate.similarity > 0.9
+    stats = index.stats()
+    assert stats["checked"] == 51
+    assert stats["duplicates"] == 1
+    # only articles sharing a band are compared
+    assert stats["candidates"] < 5
+    # checked articles are reserved in memory, not indexed
+    assert stats["reserved"] == 50
+    assert NearDuplicateIndex(index.database).find("https://cnn.com/x", UPDATE) is None
+
+
+def test_released_reservation(index):
+    index.check("https://edition.cnn.com/story", STORY)
+    index.release("https://edition.cnn.com/story")
+    assert index.find("https://edition.cnn.com/story-live", UPDATE) is None
+    assert index.stats()["reserved"] == 0
+
+
+def test_added_reservation(tmp_path):
+    index = NearDuplicateIndex(tmp_path.joinpath("index.sqlite"))
+    index.check("https://edition.cnn.com/story", STORY)
+    index.add("https://edition.cnn.com/story", STORY)
+    assert index.stats()["reserved"] == 0
+    duplicate = NearDuplicateIndex(index.database).find(
+        "https://edition.cnn.com/story-live", UPDATE
+    )
+    assert duplicate.url == "https://edition.cnn.com/story"
+
+
+def test_same_url_is_not_duplicate(index):
+    index.add("https://edition.cnn.com/story", STORY)
+    assert index.find("https://edition.cnn.com/story?utm_source=x", STORY) is None
+
+
+def test_threshold(tmp_path):
+    index = NearDuplicateIndex(tmp_path.joinpath("index.sqlite"), threshold=0.99)
+    index.add("https://edition.cnn.com/story", STORY)
+    assert index.find("https://edition.cnn.com/story-live", UPDATE) is None
+
+
+def test_persisted(tmp_path):
+    NearDuplicateIndex(tmp_path.joinpath("index.sqlite")).add(
+        "https://edition.cnn.com/story", STORY
+    )
+    index = NearDuplicateIndex(tmp_path.joinpath("index.sqlite"))
+    assert index.find("https://edition.cnn.com/story-live", UPDATE) is not None
+
+
+def test_prune(tmp_path):
+    index = NearDuplicateIndex(tmp_path.joinpath("index.sqlite"), max_age_days=1)
+    index.add("https://edition.cnn.com/story", STORY)
+    assert index.prune() == 0
+    index.max_age_days = -1 / 86400
+    time.sleep(0.01)
+    assert index.find("https://edition.cnn.com/story-live", UPDATE) is None
+    assert index.prune() == 1
+
+
+def test_invalid_bands(tmp_path):
+    with pytest.raises(ValueError, match="bands should divide num_perm"):
+        NearDuplicateIndex(tmp_path.joinpath("index.sqlite"), num_perm=128, bands=30)
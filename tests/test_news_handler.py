@@ -0,0 +1,168 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+import repackage
+import requests
+from urllib3.util.retry import Retry
+
+repackage.up()
+from src.news.exception import NewsAPIException
+from src.news.key_pool import ApiKeyPool
+from src.news.news_handler import JitteredRetry, NewsHandler, create_session
+from src.news.response_cache import ResponseCache
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    # statuses returned by consecutive requests, the last one is repeated
+    statuses = [200]
+    requests = 0
+
+    def do_GET(self):
+        cls = type(self)
+        status = cls.statuses[min(cls.requests, len(cls.statuses) - 1)]
+        cls.requests += 1
+        body = json.dumps({"status": "ok" if status == 200 else "error"}).encode()
+        self.send_response(status)
+        if status == 429:
+            self.send_header("Retry-After", "0")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(name="server_url")
+def fixture_server_url():
+    StubHandler.requests = 0
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/v2/everything"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture(name="news_handler")
+def fixture_news_handler(tmp_path):
+    session = create_session(pool_size=2, max_retries=2, backoff_factor=0)
+    cache = ResponseCache(tmp_path.joinpath("newsapi.sqlite"))
+    yield NewsHandler(api_key="key", session=session, cache=cache)
+
+
+def test_send_retries_throttled_requests(server_url, news_handler):
+    StubHandler.statuses = [429, 503, 200]
+    assert news_handler._send(server_url, {}) == {"status": "ok"}
+    stats = news_handler.get_request_stats()["everything"]
+    assert stats["calls"] == 1
+    assert stats["retries"] == 2
+    assert stats["throttled"] == 1
+    assert stats["errors"] == 0
+
+
+def test_retries_charged_to_key(server_url, tmp_path):
+    StubHandler.statuses = [503, 503, 200]
+    key_pool = ApiKeyPool(["key"], daily_limit=10, rate_per_second=1000)
+    news_handler = NewsHandler(
+        session=create_session(pool_size=2, max_retries=2, backoff_factor=0),
+        cache=ResponseCache(tmp_path.joinpath("newsapi.sqlite")),
+        key_pool=key_pool,
+    )
+    news_handler._send(server_url, {})
+    # three requests reached the API
+    assert key_pool.remaining() == 7
+
+
+def test_send_raises_after_retries(server_url, news_handler):
+    StubHandler.statuses = [500]
+    with pytest.raises(NewsAPIException):
+        news_handler._send(server_url, {})
+    assert StubHandler.requests == 3
+    assert news_handler.get_request_stats()["everything"]["errors"] == 1
+
+
+def test_connection_error_is_recorded(news_handler):
+    # nothing listens on the port of a closed server
+    server = HTTPServer(("127.0.0.1", 0), StubHandler)
+    url = f"http://127.0.0.1:{server.server_port}/v2/everything"
+    server.server_close()
+    with pytest.raises(requests.ConnectionError):
+        news_handler._request(url, {}, {})
+    stats = news_handler.get_request_stats()["everything"]
+    assert stats["calls"] == 1
+    assert stats["errors"] == 1
+
+
+def test_request_stats_of_concurrent_requests(server_url, news_handler):
+    StubHandler.statuses = [200]
+    threads = [
+        threading.Thread(
+            target=lambda: [news_handler._request(server_url, {}, {}) for _ in range(10)]
+        )
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert news_handler.get_request_stats()["everything"]["calls"] == 40
+
+
+def test_jittered_retry_backoff():
+    retry = JitteredRetry(total=5, backoff_factor=1)
+    for _ in range(3):
+        retry = retry.increment(method="GET", url="/")
+    backoff = Retry.get_backoff_time(retry)
+    assert backoff > 0
+    for _ in range(20):
+        assert backoff / 2 <= retry.get_backoff_time() <= backoff
+
+
+@pytest.fixture(name="paged_news_handler")
+def fixture_paged_news_handler(news_handler, monkeypatch):
+    """NewsHandler answering with pages of a query with 5 results in total."""
+    requested_pages = []
+
+    def send(url, payload):
+        requested_pages.append(payload["page"])
+        start = (payload["page"] - 1) * payload["pageSize"]
+        stop = min(start + payload["pageSize"], 5)
+        articles = [
+            {"url": f"https://{i}", "title": str(i), "content": "c"}
+            for i in range(start, stop)
+        ]
+        return {"status": "ok", "totalResults": 5, "articles": articles}
+
+    monkeypatch.setattr(news_handler, "_send", send)
+    news_handler.requested_pages = requested_pages
+    yield news_handler
+
+
+def test_iter_everything_stops_at_total_results(paged_news_handler):
+    results = list(paged_news_handler.iter_everything(page_size=2, q="economy"))
+    assert [title for _, title, _ in results] == ["0", "1", "2", "3", "4"]
+    assert paged_news_handler.requested_pages == [1, 2, 3]
+
+
+def test_iter_top_headlines_limit(paged_news_handler):
+    results = list(paged_news_handler.iter_top_headlines(limit=3, page_size=2))
+    assert len(results) == 3
+    assert paged_news_handler.requested_pages == [1, 2]
+
+
+def test_iter_everything_is_lazy(paged_news_handler):
+    iterator = paged_news_handler.iter_everything(page_size=2)
+    assert paged_news_handler.requested_pages == []
+    next(iterator)
+    iterator.close()
+    # only the first page and the prefetched second one were requested
+    assert paged_news_handler.requested_pages == [1, 2]
+
+
+def test_iter_everything_validates_params(paged_news_handler):
+    with pytest.raises(ValueError, match="invalid sort"):
+        next(paged_news_handler.iter_everything(sort_by="date"))
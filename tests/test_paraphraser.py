@@ -0,0 +1,52 @@
+import pytest
+import repackage
+
+repackage.up()
+from src.ai import paraphraser
+from src.ai.model_registry import ModelRegistry
+
+
+class FakeTokenizer:
+    def __call__(self, sentences, truncation=True):
+        return {"input_ids": [sentence.split() for sentence in sentences]}
+
+
+@pytest.fixture(name="fake_registry")
+def fixture_fake_registry(monkeypatch):
+    registry = ModelRegistry()
+    registry.register("paraphrase", lambda: (None, FakeTokenizer()))
+    monkeypatch.setattr(paraphraser, "registry", registry)
+    yield registry
+
+
+def test_bucket_by_length(fake_registry):
+    sentences = ["a b c d", "a", "a b c", "a b"]
+    assert paraphraser.bucket_by_length(sentences, 2) == [[1, 3], [2, 0]]
+
+
+def test_bucket_by_length_covers_all(fake_registry):
+    sentences = ["a b c d", "a", "a b c", "a b", "a b c d e"]
+    batches = paraphraser.bucket_by_length(sentences, 2)
+    assert max(len(batch) for batch in batches) == 2
+    assert sorted(i for batch in batches for i in batch) == list(range(5))
+
+
+def test_paraphrase_sentences_empty(fake_registry):
+    assert paraphraser.paraphrase_sentences([], batch_size=4) == []
+
+
+def test_get_generate_kwargs_quality():
+    assert paraphraser.get_generate_kwargs("quality") == {
+        "num_beams": 10,
+        "num_return_sequences": 10,
+    }
+
+
+def test_get_generate_kwargs_override():
+    generate_kwargs = paraphraser.get_generate_kwargs("quality", num_beams=1)
+    assert generate_kwargs == {"num_beams": 1, "num_return_sequences": 1}
+
+
+def test_get_generate_kwargs_invalid_profile():
+    with pytest.raises(ValueError, match="profile must be one of"):
+        paraphraser.get_generate_kwargs("slow")
@@ -0,0 +1,168 @@
+import os
+import threading
+import time
+
+import pytest
+import repackage
+
+repackage.up()
+from src.ai.worker_pool import InferencePool
+from src.pipeline.pipeline import Pipeline, Stage
+
+
+def square(x):
+    return x * x
+
+
+def get_pid(x):
+    return os.getpid()
+
+
+def test_run():
+    pipeline = Pipeline([Stage("add", lambda x: x + 1, workers=3), Stage("sq", square)])
+    assert sorted(pipeline.run(range(10))) == sorted((x + 1) ** 2 for x in range(10))
+    stats = pipeline.stats()
+    assert stats["add"]["items"] == 10
+    assert stats["sq"]["items"] == 10
+    assert stats["sq"]["items_per_s"] > 0
+
+
+def test_drop_items():
+    pipeline = Pipeline([Stage("even", lambda x: x if x % 2 == 0 else None)])
+    assert sorted(pipeline.run(range(6))) == [0, 2, 4]
+    assert pipeline.stats()["even"]["dropped"] == 3
+
+
+def test_batches():
+    sizes = []
+
+    def batch(items):
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    pipeline = Pipeline([Stage("batch", batch, batch_size=4, max_wait=1.0)])
+    assert sorted(pipeline.run(range(10))) == [x * 2 for x in range(10)]
+    assert sizes == [4, 4, 2]
+
+
+def test_skip_errors():
+    def fail_on_three(x):
+        if x == 3:
+            raise RuntimeError("three")
+        return x
+
+    pipeline = Pipeline([Stage("fail", fail_on_three, workers=2)])
+    assert sorted(pipeline.run(range(5))) == [0, 1, 2, 4]
+    assert pipeline.stats()["fail"]["errors"] == 1
+
+
+def test_stop_on_error():
+    processed = []
+
+    def fail_on_three(x):
+        if x == 3:
+            raise RuntimeError("three")
+        return x
+
+    def slow(x):
+        time.sleep(0.01)
+        processed.append(x)
+        return x
+
+    pipeline = Pipeline(
+        [Stage("fail", fail_on_three, skip_errors=False), Stage("slow", slow)]
+    )
+    with pytest.raises(RuntimeError, match="three"):
+        pipeline.run(range(1000))
+    assert len(processed) < 1000
+
+
+def test_source_error():
+    def records():
+        yield 1
+        raise ValueError("source")
+
+    with pytest.raises(ValueError, match="source"):
+        Pipeline([Stage("id", lambda x: x)]).run(records())
+
+
+def test_backpressure():
+    consumed = []
+    release = threading.Event()
+
+    def source():
+        for i in range(100):
+            consumed.append(i)
+            yield i
+
+    def blocked(x):
+        release.wait()
+        return x
+
+    pipeline = Pipeline([Stage("blocked", blocked, queue_size=5)])
+    thread = threading.Thread(target=pipeline.run, args=(source(),))
+    thread.start()
+    time.sleep(0.3)
+    # one item in process, five in the queue and one waiting to be put
+    assert len(consumed) <= 7
+    release.set()
+    thread.join()
+    assert len(consumed) == 100
+
+
+def test_stages_overlap():
+    def io(x):
+        time.sleep(0.05)
+        return x
+
+    pipeline = Pipeline([Stage("a", io), Stage("b", io)])
+    start = time.perf_counter()
+    pipeline.run(range(10))
+    # 10 items through two 50 ms stages take 1 s in sequence
+    assert time.perf_counter() - start < 0.8
+
+
+def test_pool_stage():
+    with InferencePool(workers=2, models=[]) as pool:
+        pipeline = Pipeline(
+            [
+                Stage("square", square, workers=2, pool=pool),
+                Stage("pid", get_pid, workers=2, pool=pool),
+            ]
+        )
+        pids = pipeline.run(range(6))
+    assert len(pids) == 6
+    assert os.getpid() not in pids
+
+
+def test_invalid_stage():
+    with pytest.raises(ValueError, match="workers should be a positive integer"):
+        Stage("stage", square, workers=0)
+
+
+def test_hooks():
+    results, errors = [], []
+
+    def fail_on_three(x):
+        if x == 3:
+            raise RuntimeError("three")
+        return x if x % 2 == 0 else None
+
+    stage = Stage(
+        "hooked",
+        fail_on_three,
+        on_result=lambda item, result: results.append((item, result)),
+        on_error=lambda item, error: errors.append((item, str(error))),
+    )
+    Pipeline([stage]).run(range(5))
+    assert sorted(results) == [(0, 0), (1, None), (2, 2), (4, 4)]
+    assert errors == [(3, "three")]
+
+
+def test_failing_hook_stops_pipeline():
+    def on_result(item, result):
+        raise OSError("disk full")
+
+    pipeline = Pipeline([Stage("hooked", square, on_result=on_result)])
+    with pytest.raises(OSError, match="disk full"):
+        pipeline.run(range(100))
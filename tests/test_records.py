@@ -0,0 +1,52 @@
+import json
+import sys
+
+import repackage
+
+repackage.up()
+from src.news.records import HeadlineRecord, loads, to_records
+
+ARTICLE = {
+    "source": {"id": "cnn", "name": "CNN"},
+    "author": "Jane Doe",
+    "title": "Title",
+    "description": "Description",
+    "url": "https://edition.cnn.com/article",
+    "urlToImage": "https://edition.cnn.com/image.jpg",
+    "publishedAt": "2023-09-19T10:23:06Z",
+    "content": "Content",
+}
+
+
+def test_from_article():
+    record = HeadlineRecord.from_article(ARTICLE)
+    assert record.source_id == "cnn"
+    assert record.published_at == "2023-09-19T10:23:06Z"
+    assert record.url_to_image == "https://edition.cnn.com/image.jpg"
+    assert record.author == "Jane Doe"
+    # compatible with (url, title, content) tuples
+    assert record[:3] == (ARTICLE["url"], "Title", "Content")
+
+
+def test_from_article_missing_fields():
+    record = HeadlineRecord.from_article({"url": "u", "source": None})
+    assert record == HeadlineRecord("u", None, None)
+
+
+def test_to_records_sorting():
+    later = {**ARTICLE, "url": "later", "publishedAt": "2023-09-20T00:00:00Z"}
+    records = to_records({"articles": [later, ARTICLE]})
+    assert [r.url for r in sorted(records, key=lambda r: r.published_at)] == [
+        ARTICLE["url"],
+        "later",
+    ]
+
+
+def test_record_smaller_than_dict():
+    record = HeadlineRecord.from_article(ARTICLE)
+    assert not hasattr(record, "__dict__")
+    assert sys.getsizeof(record) < sys.getsizeof(dict(record._asdict()))
+
+
+def test_loads():
+    assert loads(json.dumps({"articles": [ARTICLE]}).encode()) == {"articles": [ARTICLE]}
@@ -0,0 +1,85 @@
+import threading
+import time
+
+import pytest
+import repackage
+
+repackage.up()
+from src.news.response_cache import ResponseCache
+
+URL = "https://newsapi.org/v2/top-headlines"
+
+
+class FakeAPI:
+    def __init__(self, status=200, headers=None, delay=0):
+        self.status = status
+        self.headers = headers or {}
+        self.delay = delay
+        self.calls = []
+
+    def send(self, headers):
+        self.calls.append(headers)
+        time.sleep(self.delay)
+        if "If-None-Match" in headers:
+            return 304, None, self.headers
+        return self.status, {"status": "ok", "n": len(self.calls)}, self.headers
+
+
+@pytest.fixture(name="cache")
+def fixture_cache(tmp_path):
+    yield ResponseCache(tmp_path.joinpath("newsapi.sqlite"))
+
+
+def test_fetch_fresh_hit(cache):
+    api = FakeAPI()
+    assert cache.fetch(URL, {"page": 1, "sources": "cnn"}, api.send) == (
+        200,
+        {"status": "ok", "n": 1},
+    )
+    # the same payload in another order is the same request
+    assert cache.fetch(URL, {"sources": "cnn", "page": 1}, api.send)[1]["n"] == 1
+    assert len(api.calls) == 1
+    stats = cache.stats()["top-headlines"]
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["quota_saved"] == 1
+    assert stats["hit_rate"] == 0.5
+
+
+def test_fetch_revalidates_stale_entry(cache):
+    cache.ttls["top-headlines"] = 0
+    api = FakeAPI(headers={"ETag": '"v1"'})
+    cache.fetch(URL, {}, api.send)
+    assert cache.fetch(URL, {}, api.send) == (200, {"status": "ok", "n": 1})
+    assert api.calls == [{}, {"If-None-Match": '"v1"'}]
+    assert cache.stats()["top-headlines"]["revalidated"] == 1
+
+
+def test_fetch_does_not_cache_errors(cache):
+    api = FakeAPI(status=429)
+    assert cache.fetch(URL, {}, api.send)[0] == 429
+    assert cache.fetch(URL, {}, api.send)[0] == 429
+    assert len(api.calls) == 2
+
+
+def test_fetch_coalesces_concurrent_requests(cache):
+    api = FakeAPI(delay=0.2)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.fetch(URL, {}, api.send)))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(api.calls) == 1
+    assert results == [(200, {"status": "ok", "n": 1})] * 4
+    assert cache.stats()["top-headlines"]["quota_saved"] == 3
+
+
+def test_fetch_disabled(cache):
+    cache.enabled = False
+    api = FakeAPI()
+    cache.fetch(URL, {}, api.send)
+    cache.fetch(URL, {}, api.send)
+    assert len(api.calls) == 2
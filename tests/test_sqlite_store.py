@@ -0,0 +1,39 @@
+import os
+
+import repackage
+
+repackage.up()
+from src.utilities.sqlite_store import SqliteStore
+
+
+class Store(SqliteStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS items (key TEXT PRIMARY KEY, value TEXT)",
+        "CREATE INDEX IF NOT EXISTS items_value ON items (value)",
+    )
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.connects = 0
+
+    def _on_connect(self, connection):
+        self.connects += 1
+
+
+def test_schema_created(tmp_path):
+    store = Store(tmp_path.joinpath("nested", "store.sqlite"))
+    connection = store._connect()
+    assert store._connect() is connection
+    assert store.connects == 1
+    names = {row[0] for row in connection.execute("SELECT name FROM sqlite_master")}
+    assert {"items", "items_value"} <= names
+    # the schema is idempotent, a second store opens the same file
+    Store(store.database)._connect().execute("INSERT INTO items VALUES ('a', 'b')")
+
+
+def test_reconnects_after_fork(tmp_path, monkeypatch):
+    store = Store(tmp_path.joinpath("store.sqlite"))
+    connection = store._connect()
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+    assert store._connect() is not connection
+    assert store.connects == 2
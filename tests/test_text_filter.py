@@ -0,0 +1,69 @@
+import pytest
+import repackage
+
+repackage.up()
+from src.parsers.article_parser import filter_text
+from src.utilities.text_filter import TextFilterEngine, get_text_filter
+
+
+@pytest.fixture(name="engine")
+def fixture_engine():
+    yield TextFilterEngine(
+        removals=[r"ad(vert(isement)?)?s?"],
+        replacements={"CNN": "media", "CNN International": "a broadcaster"},
+        detections={"video": r"videos?", "live": r"live"},
+    )
+
+
+def test_removals_on_word_boundaries(engine):
+    text = "Advertisement The road was made of ADS, ads and adverts."
+    assert engine.clean(text) == " The road was made of ,  and ."
+
+
+def test_replacements(engine):
+    assert engine.clean("CNN's reporter") == "media's reporter"
+    assert engine.clean("CNNs and cnn") == "CNNs and cnn"
+
+
+def test_longer_replacement_wins(engine):
+    assert engine.clean("on CNN International") == "on a broadcaster"
+
+
+def test_apply_detects_in_same_scan(engine):
+    text, detected = engine.apply("CNN Video: ads of the LIVE event")
+    assert text == "media Video:  of the LIVE event"
+    assert detected == {"video", "live"}
+
+
+def test_detections_on_word_boundaries(engine):
+    assert engine.contains("video", "Watch the videos")
+    assert engine.contains("video", "VIDEO")
+    assert not engine.contains("video", "videogame review")
+    assert not engine.contains("live", "Russia delivers weapons")
+
+
+def test_keyword_with_non_word_edges():
+    engine = TextFilterEngine(replacements={"(CNN)": ""})
+    assert engine.clean("Washington (CNN) — text") == "Washington  — text"
+
+
+def test_empty_engine():
+    assert TextFilterEngine().apply("text") == ("text", set())
+
+
+def test_get_text_filter_reuses_engine():
+    engine = get_text_filter(replacements={"CNN": "media"})
+    assert get_text_filter(replacements={"CNN": "media"}) is engine
+    assert get_text_filter(replacements={"CNN": "outlet"}) is not engine
+
+
+def test_filter_text():
+    text = "Advertisement\nPyongyang made a deal.\nAds by CNN"
+    # keywords are replaced after rewriting, not in the model input
+    assert filter_text(text) == "Pyongyang made a deal. by CNN"
+    assert filter_text(text, [r"deal"]) == "AdvertisementPyongyang made a .Ads by CNN"
+
+
+def test_patterns_without_known_first_characters():
+    engine = TextFilterEngine(removals=[r"(sponsored|promoted)", r"\d+ ads?"])
+    assert engine.clean("Sponsored: 3 ads, promoted") == ": , "
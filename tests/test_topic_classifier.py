@@ -0,0 +1,154 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+import repackage
+
+repackage.up()
+from src.ai import topic_classifier
+from src.ai.topic_classifier import (
+    EmbeddingClassifier,
+    ZeroShotClassifier,
+    get_topic_classifier,
+)
+
+LABELS = ["politics", "business", "economy"]
+
+
+@pytest.fixture(name="fake_models")
+def fixture_fake_models():
+    """Replaces registry loaders by fakes and restores the real ones afterwards."""
+    registry = topic_classifier.registry
+    topic_classifier._classifiers.clear()
+    loaders = dict(registry._loaders)
+    loads = []
+
+    def register(name, model):
+        def loader():
+            loads.append(name)
+            return model
+
+        registry.register(name, loader)
+
+    yield SimpleNamespace(register=register, loads=loads)
+    for name, loader in loaders.items():
+        registry.register(name, loader)
+    topic_classifier._classifiers.clear()
+
+
+def fake_zero_shot(articles, candidate_labels, batch_size=8):
+    # scores favour the label mentioned in an article
+    return [
+        {
+            "labels": candidate_labels,
+            "scores": [float(label in article) for label in candidate_labels],
+        }
+        for article in articles
+    ]
+
+
+def test_get_topic_classifier_shared(fake_models):
+    fake_models.register("zero-shot", fake_zero_shot)
+    classifier = get_topic_classifier("zero-shot")
+    assert isinstance(classifier, ZeroShotClassifier)
+    assert get_topic_classifier("zero-shot") is classifier
+    assert fake_models.loads == []
+
+
+def test_get_topic_classifier_invalid_backend():
+    with pytest.raises(ValueError, match="backend must be one of"):
+        get_topic_classifier("keywords")
+
+
+def test_zero_shot_prepared_and_classifies(fake_models):
+    fake_models.register("zero-shot", fake_zero_shot)
+    classifier = get_topic_classifier("zero-shot", candidate_labels=LABELS)
+    # the model is loaded when the classifier is prepared, not on the first article
+    assert fake_models.loads == ["zero-shot"]
+    topics = classifier.classify(["a business story", "economy news"], LABELS)
+    assert topics == ["business", "economy"]
+    assert fake_models.loads == ["zero-shot"]
+
+
+class FakeTokenizer:
+    """Whitespace tokenizer padding batches to the longest text with id 0."""
+
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+        self.calls = []
+
+    def __call__(self, texts, **kwargs):
+        import torch
+
+        self.calls.append(list(texts))
+        ids = [
+            [self.vocabulary[word] for word in re.findall(r"\w+", text.lower())]
+            for text in texts
+        ]
+        longest = max(len(row) for row in ids)
+        return {
+            "input_ids": torch.tensor([row + [0] * (longest - len(row)) for row in ids]),
+            "attention_mask": torch.tensor(
+                [[1] * len(row) + [0] * (longest - len(row)) for row in ids]
+            ),
+        }
+
+
+class FakeModel:
+    """Returns a fixed vector of every token id as its hidden state."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __call__(self, input_ids, attention_mask):
+        return SimpleNamespace(last_hidden_state=self.table[input_ids])
+
+
+@pytest.fixture(name="embedder")
+def fixture_embedder(fake_models):
+    torch = pytest.importorskip("torch")
+    words = ["this", "article", "is", "about", *LABELS, "tax", "vote"]
+    vocabulary = {word: i + 1 for i, word in enumerate(words)}
+    table = torch.zeros(len(words) + 1, 3)
+    # padding is far from everything, so pooling it in would change embeddings
+    table[0] = torch.tensor([100.0, -100.0, 100.0])
+    for word, vector in {
+        "politics": [1.0, 0.0, 0.0],
+        "vote": [0.9, 0.1, 0.0],
+        "business": [0.0, 1.0, 0.0],
+        "economy": [0.0, 0.0, 1.0],
+        "tax": [0.1, 0.0, 0.9],
+    }.items():
+        table[vocabulary[word]] = torch.tensor(vector)
+    tokenizer = FakeTokenizer(vocabulary)
+    fake_models.register("embedding", (FakeModel(table), tokenizer))
+    yield SimpleNamespace(table=table, vocabulary=vocabulary, tokenizer=tokenizer)
+
+
+def test_embedding_mean_pooling(embedder):
+    import torch
+
+    classifier = EmbeddingClassifier()
+    # the short text is padded in the batch, padding must not count
+    short, long = classifier.embed(["vote tax", "vote vote vote tax"])
+    vote, tax = embedder.vocabulary["vote"], embedder.vocabulary["tax"]
+    expected = (embedder.table[vote] + embedder.table[tax]) / 2
+    assert torch.allclose(short, expected / expected.norm())
+    assert torch.allclose(long.norm(), torch.tensor(1.0))
+
+
+def test_embedding_ranks_labels_by_similarity(embedder):
+    classifier = EmbeddingClassifier()
+    topics = classifier.classify(["vote vote", "tax tax", "business"], LABELS)
+    assert topics == ["politics", "economy", "business"]
+
+
+def test_embedding_reuses_label_embeddings(embedder):
+    classifier = get_topic_classifier("embedding", candidate_labels=LABELS)
+    label_calls = len(embedder.tokenizer.calls)
+    assert label_calls == 1
+    classifier.classify(["vote"], LABELS)
+    classifier.classify(["tax"], LABELS)
+    get_topic_classifier("embedding", candidate_labels=LABELS)
+    # only articles are embedded after the labels were prepared
+    assert embedder.tokenizer.calls[label_calls:] == [["vote"], ["tax"]]
@@ -0,0 +1,63 @@
+import os
+
+import pytest
+import repackage
+
+repackage.up()
+from src.ai.worker_pool import InferencePool, get_threads_per_worker, registry
+
+
+class FakeModel:
+    def __init__(self):
+        self.loaded_in = os.getpid()
+
+
+def get_pid_and_threads(_):
+    return os.getpid(), os.environ["OMP_NUM_THREADS"]
+
+
+def use_fake_model(_):
+    model = registry.get("fake")
+    return os.getpid(), model.loaded_in, registry.report()["fake"]["loads"]
+
+
+@pytest.fixture(name="pool")
+def fixture_pool():
+    with InferencePool(workers=2, threads_per_worker=3, models=[]) as pool:
+        yield pool
+
+
+def test_map_keeps_order(pool):
+    assert pool.map(abs, [-3, 2, -1]) == [3, 2, 1]
+
+
+def test_map_runs_in_workers(pool):
+    results = pool.map(get_pid_and_threads, range(4))
+    assert os.getpid() not in {pid for pid, _ in results}
+    assert {threads for _, threads in results} == {"3"}
+
+
+def test_preloaded_model_shared_with_workers():
+    registry.register("fake", FakeModel)
+    try:
+        with InferencePool(workers=2, models=["fake"]) as pool:
+            results = pool.map(use_fake_model, range(4))
+    finally:
+        registry.evict("fake")
+    for pid, loaded_in, loads in results:
+        assert pid != os.getpid()
+        # loaded once in the parent, before the workers were forked
+        assert loaded_in == os.getpid()
+        assert loads == 1
+
+
+def test_invalid_workers():
+    with pytest.raises(ValueError, match="workers should be a positive integer"):
+        InferencePool(workers=0, models=[])
+
+
+@pytest.mark.parametrize(
+    "workers,cpus,expected", [(1, 8, 8), (2, 8, 4), (3, 8, 2), (16, 8, 1)]
+)
+def test_get_threads_per_worker(workers, cpus, expected):
+    assert get_threads_per_worker(workers, cpus) == expected